@@ -0,0 +1,204 @@
+"""
+Analytics sink for simulation and tournament results
+
+Headless runners record every finished game - who played, who moved first,
+the result and the full move sequence - into a SQLite database for later
+analysis (see analytics_queries.py). Records are buffered in memory and
+written with executemany in one WAL transaction per batch, so ingestion
+keeps up with the fastest simulations.
+
+Each game is one row; its moves are stored in order as a BLOB of
+little-endian uint16 cell indices (row * size + col), with the first mover
+playing the even plies. decode_moves() turns it back into a list.
+
+Schema:
+    runs(run_id, source, size, win_length, started_at, variant)
+    games(game_id, run_id, x_player, o_player, x_difficulty, o_difficulty,
+          first, result, moves, cells)
+"""
+import sqlite3
+import sys
+import time
+from array import array
+
+FIRST_X = 1
+FIRST_O = 2
+
+RESULT_DRAW = 0
+RESULT_X = 1
+RESULT_O = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    source TEXT,
+    size INTEGER,
+    win_length INTEGER,
+    started_at REAL,
+    variant TEXT
+);
+CREATE TABLE IF NOT EXISTS games (
+    game_id INTEGER PRIMARY KEY,
+    run_id INTEGER REFERENCES runs(run_id),
+    x_player TEXT,
+    o_player TEXT,
+    x_difficulty INTEGER,
+    o_difficulty INTEGER,
+    first INTEGER,
+    result INTEGER,
+    moves INTEGER,
+    cells BLOB
+);
+"""
+
+
+def encode_moves(cells):
+    """
+    Pack a move sequence for the cells column.
+
+    Args:
+        cells: Cell indices in the order they were played
+
+    Returns:
+        bytes: Little-endian uint16 cell indices
+    """
+    packed = array("H", cells)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def decode_moves(blob):
+    """
+    Unpack the cells column of a game.
+
+    Args:
+        blob: Bytes written by encode_moves
+
+    Returns:
+        list: Cell indices in the order they were played
+    """
+    cells = array("H")
+    cells.frombytes(blob)
+    if sys.byteorder == "big":
+        cells.byteswap()
+    return cells.tolist()
+
+
+class GameRecordBuffer:
+    """
+    Collects game records in memory, e.g. inside a worker process whose
+    records are handed to an AnalyticsSink in the parent.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def record_game(self, players, first_index, winner, cells):
+        """
+        Record a finished game.
+
+        Args:
+            players: The two players, X first
+            first_index: Index into players of the side that moved first
+            winner: Winning symbol, or None for a draw
+            cells: Cell indices in the order they were played
+        """
+        x_player, o_player = players
+        if winner is None:
+            result = RESULT_DRAW
+        elif winner == x_player.symbol:
+            result = RESULT_X
+        else:
+            result = RESULT_O
+        self.records.append((
+            x_player.name, o_player.name,
+            getattr(x_player, "difficulty", None), getattr(o_player, "difficulty", None),
+            FIRST_X if first_index == 0 else FIRST_O, result, len(cells), encode_moves(cells),
+        ))
+        self._pending_changed()
+
+    def add_records(self, records):
+        """
+        Add records collected by another buffer.
+
+        Args:
+            records: The other buffer's records list
+        """
+        self.records.extend(records)
+        self._pending_changed()
+
+    def _pending_changed(self):
+        """Hook for subclasses that act on the number of pending records."""
+
+
+class AnalyticsSink(GameRecordBuffer):
+    """
+    Buffers game records and writes them to SQLite in batches.
+    """
+
+    def __init__(self, path, source="simulation", size=3, win_length=None, batch_games=50000,
+                 variant="standard"):
+        """
+        Open (or create) the database and start a new run.
+
+        Args:
+            path: SQLite database file
+            source: Name of the runner, stored with the run
+            size: Board size of the run's games
+            win_length: Marks in a row needed to win (defaults to size)
+            batch_games: Games buffered before they are written in one
+                transaction
+            variant: Name of the rule variant the run's games are played by
+                (see variants.VARIANTS)
+        """
+        super().__init__()
+        self.batch_games = batch_games
+        self.games_written = 0
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+        # Runs recorded before the variant was stored keep a NULL variant
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(runs)")}
+        if "variant" not in columns:
+            self.connection.execute("ALTER TABLE runs ADD COLUMN variant TEXT")
+        self.run_id = self.connection.execute(
+            "INSERT INTO runs (source, size, win_length, started_at, variant) VALUES (?, ?, ?, ?, ?)",
+            (source, size, win_length or size, time.time(), variant),
+        ).lastrowid
+
+    def _pending_changed(self):
+        if len(self.records) >= self.batch_games:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered records in one transaction."""
+        if not self.records:
+            return
+        run_id = self.run_id
+        connection = self.connection
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "INSERT INTO games (run_id, x_player, o_player, x_difficulty, o_difficulty,"
+                " first, result, moves, cells) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id,) + record for record in self.records],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        self.games_written += len(self.records)
+        self.records = []
+
+    def close(self):
+        """Write the remaining records and close the database."""
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
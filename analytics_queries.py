@@ -0,0 +1,195 @@
+"""
+Queries over the analytics database written by analytics.AnalyticsSink
+
+Usage: python analytics_queries.py results.db [--run RUN_ID] [--variant NAME]
+
+Runs of every rule variant are counted together unless --variant (or the
+variant argument of the query functions) picks one; runs recorded before
+the variant was stored have no variant and match none.
+"""
+import argparse
+import sqlite3
+from analytics import FIRST_O, FIRST_X, RESULT_DRAW, RESULT_O, RESULT_X
+
+
+def run_filter(run_id, column="run_id", variant=None):
+    """
+    Return the SQL condition and parameters restricting a query to one run
+    and rule variant.
+
+    Args:
+        run_id: Restrict to one run, or None for all runs
+        column: Column holding the run ID in the queried table
+        variant: Restrict to one rule variant, or None for all variants
+
+    Returns:
+        tuple: (" WHERE ..." condition or "", parameters tuple)
+    """
+    conditions = []
+    parameters = []
+    if run_id is not None:
+        conditions.append(f"{column} = ?")
+        parameters.append(run_id)
+    if variant is not None:
+        conditions.append(f"{column} IN (SELECT run_id FROM runs WHERE variant = ?)")
+        parameters.append(variant)
+    if not conditions:
+        return "", ()
+    return " WHERE " + " AND ".join(conditions), tuple(parameters)
+
+
+def _side_results(connection, key, run_id, variant):
+    """
+    Count wins, losses and draws per value of a player attribute, over the
+    X and O sides together.
+
+    Args:
+        connection: sqlite3 connection
+        key: "difficulty" or "player"
+        run_id: Restrict to one run, or None for all runs
+        variant: Restrict to one rule variant, or None for all variants
+
+    Returns:
+        list: dicts with key, games, wins, losses, draws and win_rate
+    """
+    condition, parameters = run_filter(run_id, variant=variant)
+    query = f"""
+        SELECT side_key, COUNT(*), SUM(result = own), SUM(result = other), SUM(result = {RESULT_DRAW})
+        FROM (
+            SELECT x_{key} AS side_key, result, {RESULT_X} AS own, {RESULT_O} AS other FROM games{condition}
+            UNION ALL
+            SELECT o_{key}, result, {RESULT_O}, {RESULT_X} FROM games{condition}
+        )
+        GROUP BY side_key ORDER BY side_key
+    """
+    rows = connection.execute(query, parameters * 2).fetchall()
+    return [
+        {key: value, "games": games, "wins": wins, "losses": losses, "draws": draws,
+         "win_rate": wins / games if games else 0.0}
+        for value, games, wins, losses, draws in rows
+    ]
+
+
+def win_rates_by_difficulty(connection, run_id=None, variant=None):
+    """
+    Win, loss and draw counts per difficulty level.
+
+    Args:
+        connection: sqlite3 connection
+        run_id: Restrict to one run, or None for all runs
+        variant: Restrict to one rule variant, or None for all variants
+
+    Returns:
+        list: dicts with difficulty, games, wins, losses, draws and win_rate
+    """
+    return _side_results(connection, "difficulty", run_id, variant)
+
+
+def win_rates_by_player(connection, run_id=None, variant=None):
+    """
+    Win, loss and draw counts per player name (e.g. tournament configuration).
+
+    Args:
+        connection: sqlite3 connection
+        run_id: Restrict to one run, or None for all runs
+        variant: Restrict to one rule variant, or None for all variants
+
+    Returns:
+        list: dicts with player, games, wins, losses, draws and win_rate
+    """
+    return _side_results(connection, "player", run_id, variant)
+
+
+def first_mover_advantage(connection, run_id=None, variant=None):
+    """
+    Compare results of the side that moved first with the side that did not,
+    per rule variant, board size and win length.
+
+    Args:
+        connection: sqlite3 connection
+        run_id: Restrict to one run, or None for all runs
+        variant: Restrict to one rule variant, or None for all variants
+
+    Returns:
+        list: dicts with variant, size, win_length, games, first_wins,
+        second_wins, draws and advantage (first-mover minus second-mover
+        win rate)
+    """
+    condition, parameters = run_filter(run_id, "games.run_id", variant)
+    query = f"""
+        SELECT runs.variant, runs.size, runs.win_length, COUNT(*),
+               SUM((first = {FIRST_X} AND result = {RESULT_X}) OR (first = {FIRST_O} AND result = {RESULT_O})),
+               SUM((first = {FIRST_X} AND result = {RESULT_O}) OR (first = {FIRST_O} AND result = {RESULT_X})),
+               SUM(result = {RESULT_DRAW})
+        FROM games JOIN runs USING (run_id){condition}
+        GROUP BY runs.variant, runs.size, runs.win_length
+        ORDER BY runs.variant, runs.size, runs.win_length
+    """
+    return [
+        {"variant": variant_name, "size": size, "win_length": win_length, "games": games,
+         "first_wins": first_wins, "second_wins": second_wins, "draws": draws,
+         "advantage": (first_wins - second_wins) / games if games else 0.0}
+        for variant_name, size, win_length, games, first_wins, second_wins, draws
+        in connection.execute(query, parameters)
+    ]
+
+
+def game_length_histogram(connection, run_id=None, result=None, variant=None):
+    """
+    Number of games per game length.
+
+    Args:
+        connection: sqlite3 connection
+        run_id: Restrict to one run, or None for all runs
+        result: Restrict to RESULT_X, RESULT_O or RESULT_DRAW, or None
+        variant: Restrict to one rule variant, or None for all variants
+
+    Returns:
+        dict: Moves -> number of games, ordered by moves
+    """
+    where, parameters = run_filter(run_id, variant=variant)
+    if result is not None:
+        where += " AND result = ?" if where else " WHERE result = ?"
+        parameters += (result,)
+    rows = connection.execute(
+        f"SELECT moves, COUNT(*) FROM games{where} GROUP BY moves ORDER BY moves", parameters
+    )
+    return dict(rows.fetchall())
+
+
+def main():
+    """Print a summary report of an analytics database."""
+    parser = argparse.ArgumentParser(description="Summarise recorded Tic-Tac-Toe games.")
+    parser.add_argument("database", help="SQLite file written with --analytics")
+    parser.add_argument("--run", type=int, default=None, help="only this run id")
+    parser.add_argument("--variant", default=None, help="only runs of this rule variant (e.g. standard)")
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(args.database)
+    print("Win rates by difficulty:")
+    for row in win_rates_by_difficulty(connection, args.run, args.variant):
+        print(f"  difficulty {row['difficulty']}: {row['games']} games, "
+              f"{row['win_rate']:.1%} won, {row['draws']} draws")
+
+    print("Win rates by player:")
+    for row in win_rates_by_player(connection, args.run, args.variant):
+        print(f"  {row['player']}: {row['games']} games, {row['win_rate']:.1%} won, {row['draws']} draws")
+
+    print("First-mover advantage:")
+    for row in first_mover_advantage(connection, args.run, args.variant):
+        print(f"  {row['variant'] or 'unknown variant'} {row['size']}x{row['size']} "
+              f"(k={row['win_length']}): first wins {row['first_wins']}, "
+              f"second wins {row['second_wins']}, draws {row['draws']}, "
+              f"advantage {row['advantage']:+.1%}")
+
+    print("Game length histogram:")
+    histogram = game_length_histogram(connection, args.run, variant=args.variant)
+    largest = max(histogram.values(), default=0)
+    for moves, count in histogram.items():
+        bar = "#" * round(40 * count / largest) if largest else ""
+        print(f"  {moves:>3} moves {count:>8}  {bar}")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,912 @@
+"""
+Benchmark suite for the Tic-Tac-Toe engine
+
+Run with: python benchmark.py
+"""
+import asyncio
+import gc
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from analytics import AnalyticsSink
+from board import Board
+from game import TicTacToeGame
+from interning import GameSequences, PositionTable
+from mcts import MCTSPlayer
+from renderer import DiffRenderer, render_board
+from player import ComputerPlayer, HumanPlayer
+from simulation import play_headless_game, run_games
+from snapshot import restore_game, snapshot_game
+import tablebase
+from threats import find_forced_win
+from transposition import SharedTranspositionTable, TranspositionTable
+from variants import StandardRules, get_variant
+import win_lines
+
+
+def _time_per_call(func, repeat):
+    """
+    Measure the average wall-clock time of a zero-argument callable.
+
+    Args:
+        func: Callable to measure
+        repeat: Number of calls to average over
+
+    Returns:
+        float: Nanoseconds per call
+    """
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter_ns() - start) / repeat
+
+
+def _scan_empty_positions(board):
+    """
+    Reference implementation of the full grid rescan that Board used to do
+    on every get_empty_positions() call.
+    """
+    empty_positions = []
+    for row in range(board.size):
+        for col in range(board.size):
+            if board.grid[row][col] == board.EMPTY:
+                empty_positions.append((row, col))
+    return empty_positions
+
+
+def _midgame_board(size=3):
+    """
+    Build a board with a few moves played, as seen inside a typical search.
+    """
+    board = Board(size=size)
+    board.make_move(0, 0, board.PLAYER_X)
+    board.make_move(size // 2, size // 2, board.PLAYER_O)
+    board.make_move(0, size - 1, board.PLAYER_X)
+    return board
+
+
+def bench_medium_scan(size=3, win_length=None, repeat=20000):
+    """
+    Compare the medium player's win and block scans done by placing each
+    symbol on every empty cell and checking for a winner with the line scan
+    of Board.winning_cells, in a quiet position where neither scan finds a
+    cell and both run to the end.
+
+    Args:
+        size: Board size to measure
+        win_length: Marks in a row needed to win (defaults to size)
+        repeat: Number of scan pairs
+
+    Returns:
+        dict: Microseconds per pair of scans for each strategy
+    """
+    rng = random.Random(size)
+    board = Board(size=size, win_length=win_length)
+    symbols = (board.PLAYER_X, board.PLAYER_O)
+    # Play random moves, keeping only those that leave nobody a winning cell
+    for ply in range(size * size // 3):
+        moves = board.get_empty_positions()
+        rng.shuffle(moves)
+        for row, col in moves:
+            board.make_move(row, col, symbols[ply % 2])
+            if not any(next(board.winning_cells(symbol), None) for symbol in symbols):
+                break
+            board.undo_move(row, col)
+
+    def probe():
+        for symbol in symbols:
+            for row, col in board.get_empty_positions():
+                board.make_move(row, col, symbol)
+                winner = board.check_winner()
+                board.undo_move(row, col)
+                if winner == symbol:
+                    return row, col
+        return None
+
+    def line_scan():
+        for symbol in symbols:
+            cell = next(board.winning_cells(symbol), None)
+            if cell:
+                return cell
+        return None
+
+    return {
+        "size": size,
+        "win_length": board.win_length,
+        "probe_us": _time_per_call(probe, repeat) / 1000,
+        "line_scan_us": _time_per_call(line_scan, repeat) / 1000,
+    }
+
+
+def bench_empty_tracking(size=3, repeat=200000):
+    """
+    Compare the per-node bookkeeping cost of _minimax (one is_full() call
+    and the list of moves) between a full rescan, the incremental
+    empty-cell set kept by Board, and the lazy iter_empty_positions() that
+    _minimax uses, at a node cut off after its first move.
+
+    Args:
+        size: Board size to measure
+        repeat: Number of simulated nodes
+
+    Returns:
+        dict: Nanoseconds per node for each strategy and the saving
+    """
+    board = _midgame_board(size)
+
+    def scan_node():
+        len(_scan_empty_positions(board)) == 0
+        _scan_empty_positions(board)
+
+    def incremental_node():
+        board.is_full()
+        board.get_empty_positions()
+
+    def lazy_cutoff_node():
+        board.is_full()
+        next(board.iter_empty_positions())
+
+    scan_ns = _time_per_call(scan_node, repeat)
+    incremental_ns = _time_per_call(incremental_node, repeat)
+    lazy_ns = _time_per_call(lazy_cutoff_node, repeat)
+    return {
+        "size": size,
+        "scan_ns_per_node": scan_ns,
+        "incremental_ns_per_node": incremental_ns,
+        "lazy_cutoff_ns_per_node": lazy_ns,
+        "saved_ns_per_node": scan_ns - incremental_ns,
+    }
+
+
+def bench_hard_search(repeat=5):
+    """
+    Time a full hard-difficulty search from the position after a center
+    opening, where the center short-cut cannot apply.
+
+    Args:
+        repeat: Number of searches to average over
+
+    Returns:
+        dict: Milliseconds per search
+    """
+    board = Board()
+    board.make_move(1, 1, board.PLAYER_X)
+    computer = ComputerPlayer(board.PLAYER_O, difficulty=3)
+
+    ns = _time_per_call(lambda: computer._get_hard_move(board), repeat)
+    return {"ms_per_search": ns / 1e6}
+
+
+def bench_rule_variants(repeat=3):
+    """
+    Time a hard move after a corner and a center opening move under each
+    rule variant (past the center short-cut of the core search), and
+    under the standard rules both through the core search and through the
+    generic variant search.
+
+    Args:
+        repeat: Number of searches to average over
+
+    Returns:
+        dict: Milliseconds per search and nodes searched, by rule set
+    """
+    results = {}
+    rule_sets = (("standard (core)", None), ("standard (variant hooks)", StandardRules()),
+                 ("misere", get_variant("misere")), ("wild", get_variant("wild")),
+                 ("order-and-chaos", get_variant("order-and-chaos")))
+    for label, variant in rule_sets:
+        board = variant.new_board() if variant else Board()
+        board.make_move(0, 0, board.PLAYER_X)
+        board.make_move(1, 1, board.PLAYER_O)
+        computer = ComputerPlayer(board.PLAYER_X, difficulty=3, variant=variant)
+        ns = _time_per_call(lambda: computer.choose_move(board), repeat)
+        results[label] = {"ms_per_search": ns / 1e6, "nodes": computer.nodes // repeat}
+    return results
+
+
+def bench_ultimate(plies=10, iterations=2000, seed=7):
+    """
+    Time a move on an Ultimate Tic-Tac-Toe board after random opening
+    moves, by the hard alpha-beta player and by the Monte Carlo tree search
+    player.
+
+    Args:
+        plies: Random moves played before the timed move
+        iterations: Playouts of the Monte Carlo tree search
+        seed: Random seed for the opening
+
+    Returns:
+        dict: Milliseconds per move by player, with nodes searched or
+        playouts per second
+    """
+    variant = get_variant("ultimate")
+    board = variant.new_board()
+    rng = random.Random(seed)
+    symbol = board.PLAYER_X
+    for _ in range(plies):
+        board.make_move(*rng.choice(board.get_empty_positions()), symbol)
+        symbol = variant.opponent(board, symbol)
+
+    computer = ComputerPlayer(symbol, difficulty=3, variant=variant)
+    ns = _time_per_call(lambda: computer.choose_move(board), 1)
+    results = {f"alpha-beta (depth {computer.max_depth})": {"ms_per_move": ns / 1e6, "nodes": computer.nodes}}
+    mcts = MCTSPlayer(symbol, variant=variant, iterations=iterations, seed=seed)
+    ns = _time_per_call(lambda: mcts.choose_move(board), 1)
+    results[f"mcts ({iterations} playouts)"] = {
+        "ms_per_move": ns / 1e6, "playouts_per_second": mcts.playouts / (ns / 1e9),
+    }
+    return results
+
+
+def bench_position_keys(size=3, repeat=200000):
+    """
+    Compare building a position key by hashing the grid against reading the
+    incrementally maintained Zobrist key.
+
+    Args:
+        size: Board size to measure
+        repeat: Number of keys to build
+
+    Returns:
+        dict: Nanoseconds per key for each strategy
+    """
+    board = _midgame_board(size)
+    return {
+        "size": size,
+        "grid_hash_ns": _time_per_call(lambda: hash(tuple(map(tuple, board.grid))), repeat),
+        "zobrist_ns": _time_per_call(lambda: board.hash_key, repeat),
+        "canonical_ns": _time_per_call(board.canonical_key, repeat // 10),
+    }
+
+
+def bench_win_line_tables(size=19, win_length=5):
+    """
+    Compare getting a board's win-line tables by computing them with getting
+    them from a memory-mapped table file, as a fresh process would.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+
+    Returns:
+        dict: build_ms and mmap_ms to get the tables, file_bytes of the table
+        file and first_move_us for the first winner check through a cell
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = win_lines.write_tables(size, win_length, directory)
+
+        win_lines._loaded.clear()
+        start = time.perf_counter_ns()
+        win_lines.load_tables(size, win_length, directory + "-missing")
+        build_ns = time.perf_counter_ns() - start
+
+        win_lines._loaded.clear()
+        start = time.perf_counter_ns()
+        tables = win_lines.load_tables(size, win_length, directory)
+        mmap_ns = time.perf_counter_ns() - start
+
+        center = (size // 2) * size + size // 2
+        start = time.perf_counter_ns()
+        tables.masks_through(center)
+        first_move_ns = time.perf_counter_ns() - start
+
+        result = {
+            "build_ms": build_ns / 1e6,
+            "mmap_ms": mmap_ns / 1e6,
+            "file_bytes": os.path.getsize(path),
+            "first_move_us": first_move_ns / 1e3,
+        }
+        tables.buffer.close()
+        win_lines._loaded.clear()
+    return result
+
+
+def bench_threat_search(repeat=50):
+    """
+    Time threat-space search on a 9x9 five-in-a-row position where X has a
+    forced win through consecutive threats.
+
+    Args:
+        repeat: Number of searches to average over
+
+    Returns:
+        dict: Milliseconds per search and the winning move found
+    """
+    board = Board(size=9, win_length=5)
+    x, o = board.PLAYER_X, board.PLAYER_O
+    for row, col, symbol in ((4, 2, x), (4, 3, x), (4, 4, x), (2, 4, x), (3, 4, x),
+                             (0, 0, o), (8, 8, o), (0, 8, o), (8, 0, o), (1, 1, o)):
+        board.make_move(row, col, symbol)
+
+    ns = _time_per_call(lambda: find_forced_win(board, x), repeat)
+    return {"ms_per_search": ns / 1e6, "move": find_forced_win(board, x)}
+
+
+def _middlegame_4x4():
+    """Build the 4x4 middlegame used by the search benchmarks."""
+    board = Board(size=4)
+    x, o = board.PLAYER_X, board.PLAYER_O
+    for row, col, symbol in ((0, 0, x), (1, 1, o), (2, 2, x), (3, 3, o), (0, 3, x), (3, 0, o)):
+        board.make_move(row, col, symbol)
+    return board
+
+
+def bench_principal_variation(repeat=1):
+    """
+    Compare node counts and search times of the hard player with plain
+    full-window alpha-beta and with principal variation search plus root
+    aspiration windows, on several board sizes.
+
+    Args:
+        repeat: Searches per setup (the node count is per search)
+
+    Returns:
+        list: One dict per board with label and, for "alpha_beta" and
+        "pvs", nodes, ms_per_search and the move chosen
+    """
+    boards = []
+    board = Board()
+    board.make_move(1, 1, board.PLAYER_X)
+    boards.append(("3x3 after a center opening", board, None))
+    boards.append(("4x4 middlegame", _middlegame_4x4(), None))
+    board = Board(size=5, win_length=4)
+    board.make_move(2, 2, board.PLAYER_X)
+    board.make_move(1, 1, board.PLAYER_O)
+    boards.append(("5x5 four-in-a-row, depth 4", board, 4))
+
+    results = []
+    for label, board, max_depth in boards:
+        symbol = board.PLAYER_X if board.move_count % 2 == 0 else board.PLAYER_O
+        result = {"label": label}
+        for variant, use_pvs in (("alpha_beta", False), ("pvs", True)):
+            computer = ComputerPlayer(symbol, difficulty=3, max_depth=max_depth, use_pvs=use_pvs)
+            start = time.perf_counter_ns()
+            for _ in range(repeat):
+                computer._last_score = None
+                move = computer._get_hard_move(board)
+            elapsed = time.perf_counter_ns() - start
+            result[variant] = {"nodes": computer.nodes // repeat, "ms_per_search": elapsed / repeat / 1e6,
+                               "move": move}
+        results.append(result)
+    return results
+
+
+def bench_search_deadline(timeouts=(0.01, 0.05, 0.2)):
+    """
+    Measure how closely an async hard search keeps to its deadline on a 4x4
+    opening, which takes far longer than any of the timeouts to solve.
+
+    Args:
+        timeouts: Deadlines in seconds
+
+    Returns:
+        list: One dict per timeout with timeout_ms, elapsed_ms, overshoot_ms
+        and the move played
+    """
+    board = Board(size=4)
+    board.make_move(2, 2, board.PLAYER_X)
+    board.make_move(1, 1, board.PLAYER_O)
+    computer = ComputerPlayer(board.PLAYER_X, difficulty=3)
+
+    async def timed_search(timeout):
+        start = time.perf_counter()
+        move = await computer.get_move_async(board, timeout=timeout)
+        return time.perf_counter() - start, move
+
+    results = []
+    for timeout in timeouts:
+        elapsed, move = asyncio.run(timed_search(timeout))
+        results.append({
+            "timeout_ms": timeout * 1000,
+            "elapsed_ms": elapsed * 1000,
+            "overshoot_ms": (elapsed - timeout) * 1000,
+            "move": move,
+        })
+    return results
+
+
+def bench_parallel_search(worker_counts=None, repeat=1):
+    """
+    Report the speedup of the parallel root split over the sequential hard
+    search on a 4x4 middlegame, for each worker count.
+
+    Args:
+        worker_counts: Worker counts to try (defaults to 1, 2, 4, ... up to
+            the number of CPUs)
+        repeat: Number of searches to average over
+
+    Returns:
+        list: dicts with workers, ms_per_search, speedup and the move chosen
+    """
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpus:
+            worker_counts.append(worker_counts[-1] * 2)
+
+    board = _middlegame_4x4()
+    x = board.PLAYER_X
+
+    results = []
+    for workers in worker_counts:
+        computer = ComputerPlayer(x, difficulty=3, workers=workers)
+        computer._get_hard_move(board)  # start the pool outside the timing
+        ns = _time_per_call(lambda: computer._get_hard_move(board), repeat)
+        results.append({
+            "workers": workers,
+            "ms_per_search": ns / 1e6,
+            "speedup": results[0]["ms_per_search"] / (ns / 1e6) if results else 1.0,
+            "move": computer._get_hard_move(board),
+        })
+    return results
+
+
+def bench_transposition_table(workers=4):
+    """
+    Compare a hard search of a 4x4 middlegame without a transposition table,
+    with an in-process table and with a shared table used by worker
+    processes. Every search starts from an empty table.
+
+    Args:
+        workers: Worker processes for the shared-table search
+
+    Returns:
+        dict: For each setup, ms_per_search, the move chosen and the table
+        metrics (hit rate, stores, collisions, torn reads)
+    """
+    board = _middlegame_4x4()
+    x = board.PLAYER_X
+    ComputerPlayer(x, difficulty=3, workers=workers)._get_hard_move(board)  # start the pool
+
+    results = {}
+    setups = (
+        ("no table", 1, None),
+        ("in-process table", 1, TranspositionTable()),
+        (f"shared table, {workers} workers", workers, SharedTranspositionTable(1 << 18)),
+    )
+    for label, worker_count, table in setups:
+        computer = ComputerPlayer(x, difficulty=3, workers=worker_count, transposition_table=table)
+        start = time.perf_counter_ns()
+        move = computer._get_hard_move(board)
+        elapsed = time.perf_counter_ns() - start
+        results[label] = {
+            "ms_per_search": elapsed / 1e6,
+            "move": move,
+            "metrics": table.metrics() if table is not None else None,
+        }
+        if isinstance(table, SharedTranspositionTable):
+            table.close()
+    return results
+
+
+def bench_tablebase(max_empty=6):
+    """
+    Generate a 4x4 endgame tablebase and compare a hard search of the 4x4
+    middlegame with and without it.
+
+    Args:
+        max_empty: Largest number of empty cells in the tablebase
+
+    Returns:
+        dict: build_s, positions and file_bytes of the tablebase, and
+        ms_per_search and the move chosen without and with it
+    """
+    board = _middlegame_4x4()
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        path = tablebase.write_tablebase(4, 4, max_empty, directory)
+        build_s = time.perf_counter() - start
+        solved = tablebase.load_tablebase(4, 4, directory)
+        result = {"build_s": build_s, "positions": solved.positions, "file_bytes": os.path.getsize(path)}
+        for label, setup in (("search", None), ("tablebase", solved)):
+            computer = ComputerPlayer(board.PLAYER_X, difficulty=3, tablebase=setup)
+            start = time.perf_counter_ns()
+            move = computer._get_hard_move(board)
+            result[label] = {"ms_per_search": (time.perf_counter_ns() - start) / 1e6, "move": move}
+        solved.buffer.close()
+        del tablebase._loaded[(4, 4, directory)]
+    return result
+
+
+def bench_rendering(size=3):
+    """
+    Compare the output of a full board redraw with a diff-based redraw for
+    one move, and time frame rendering with and without the frame cache.
+
+    Args:
+        size: Board size
+
+    Returns:
+        dict: Bytes per turn for both renderers and microseconds per frame
+    """
+    board = _midgame_board(size)
+    stream = io.StringIO()
+    diff_renderer = DiffRenderer(stream)
+    diff_renderer.draw(board)
+    before = stream.tell()
+    board.make_move(size - 1, 0, board.PLAYER_O)
+    diff_renderer.draw(board)
+    diff_bytes = len(stream.getvalue()[before:].encode())
+
+    fresh_keys = iter(range(1 << 64, (1 << 64) + 10 ** 9))
+
+    def render_uncached():
+        board.hash_key = next(fresh_keys)  # force a cache miss
+        render_board(board)
+
+    return {
+        "full_bytes_per_turn": len(render_board(board).encode()),
+        "diff_bytes_per_turn": diff_bytes,
+        "cached_us_per_frame": _time_per_call(lambda: render_board(board), 20000) / 1000,
+        "uncached_us_per_frame": _time_per_call(render_uncached, 2000) / 1000,
+    }
+
+
+class GCPauseMonitor:
+    """Records how often the garbage collector runs and how long it pauses."""
+
+    def __init__(self):
+        self.collections = 0
+        self.total_pause = 0.0
+        self.max_pause = 0.0
+        self._started_at = 0.0
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._started_at = time.perf_counter()
+        else:
+            pause = time.perf_counter() - self._started_at
+            self.collections += 1
+            self.total_pause += pause
+            self.max_pause = max(self.max_pause, pause)
+
+    def __enter__(self):
+        gc.collect()
+        gc.callbacks.append(self._callback)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        gc.callbacks.remove(self._callback)
+
+
+def bench_analytics_ingest(games=200000):
+    """
+    Measure how many finished games per second the SQLite analytics sink
+    ingests, including packing each game's moves.
+
+    Args:
+        games: Number of synthetic games to record
+
+    Returns:
+        dict: games_per_second and database_bytes per game
+    """
+    board = Board()
+    players = (ComputerPlayer(board.PLAYER_X, 3, "Computer X"), ComputerPlayer(board.PLAYER_O, 1, "Computer O"))
+    move_lists = ([4, 0, 8, 2, 1, 7, 6, 3, 5], [0, 4, 1, 2, 6], [4, 1, 0, 8, 2, 6])
+    winners = (None, board.PLAYER_X, board.PLAYER_O)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "analytics.db")
+        start = time.perf_counter()
+        with AnalyticsSink(path) as sink:
+            for game in range(games):
+                sink.record_game(players, game & 1, winners[game % 3], move_lists[game % 3])
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+    return {"games_per_second": games / seconds, "bytes_per_game": size / games}
+
+
+def bench_snapshot_round_trip(repeat=5000):
+    """
+    Time the per-request work of a stateless front end: restore a 3x3 game
+    from its snapshot, play the computer's reply and snapshot it again, for
+    a computer player without and with a transposition table to carry.
+
+    Args:
+        repeat: Requests per setup
+
+    Returns:
+        dict: For "no table" and "with table", snapshot_bytes,
+        us_per_request and overhead_us, the part of a request spent
+        restoring and snapshotting
+    """
+    results = {}
+    for label, table in (("no table", None), ("with table", TranspositionTable())):
+        game = TicTacToeGame()
+        game.board = Board()
+        x, o = game.board.PLAYER_X, game.board.PLAYER_O
+        game.players = [HumanPlayer(x, "Player"), ComputerPlayer(o, 3, "Computer", transposition_table=table)]
+        game.game_active = True
+        game.board.make_move(1, 1, x)
+        game.board.make_move(*game.players[1].choose_move(game.board), o)
+        game.board.make_move(0, 1, x)
+        game.current_player_index = 1
+        snapshot = snapshot_game(game)
+
+        start = time.perf_counter_ns()
+        for _ in range(repeat):
+            restored = restore_game(snapshot)
+            computer = restored.players[1]
+            restored.board.make_move(*computer.choose_move(restored.board), computer.symbol)
+            restored.current_player_index = 0
+            snapshot_game(restored)
+        elapsed = time.perf_counter_ns() - start
+
+        start = time.perf_counter_ns()
+        for _ in range(repeat):
+            snapshot_game(restore_game(snapshot))
+        overhead = time.perf_counter_ns() - start
+        results[label] = {
+            "snapshot_bytes": len(snapshot),
+            "us_per_request": elapsed / repeat / 1000,
+            "overhead_us": overhead / repeat / 1000,
+        }
+    return results
+
+
+def _play_with_new_players(games):
+    """
+    Play medium vs easy games building a new Board and new players for
+    every game, as an interactive session did before it kept its players.
+
+    Returns:
+        float: Elapsed seconds
+    """
+    random.seed(1)
+    started_at = time.perf_counter()
+    for game in range(games):
+        board = Board()
+        players = [
+            ComputerPlayer(board.PLAYER_X, 2, "Computer X"),
+            ComputerPlayer(board.PLAYER_O, 1, "Computer O"),
+        ]
+        play_headless_game(board, players, game % 2)
+    return time.perf_counter() - started_at
+
+
+def bench_gc_pauses(games=20000):
+    """
+    Compare garbage-collector activity of games that build a new Board and
+    new players each, the headless runner that keeps its players but builds
+    a new Board per game, and the runner with pooled, recycled boards.
+    Boards and players hold no reference cycles, so reference counting
+    frees them and the collector may not run at all; the cost of building
+    them then shows in games per second.
+
+    Args:
+        games: Games per run (medium vs easy, which keeps search cheap)
+
+    Returns:
+        dict: For "new players", "allocating" and "pooled" runs,
+        collections, total and maximum pause in milliseconds, and games per
+        second
+    """
+    runs = (
+        ("new players", lambda: _play_with_new_players(games)),
+        ("allocating", lambda: run_games(games, 2, 1, seed=1)["seconds"]),
+        ("pooled", lambda: run_games(games, 2, 1, seed=1, pooled=True)["seconds"]),
+    )
+    results = {}
+    for label, run in runs:
+        with GCPauseMonitor() as monitor:
+            seconds = run()
+        results[label] = {
+            "collections": monitor.collections,
+            "total_pause_ms": monitor.total_pause * 1000,
+            "max_pause_ms": monitor.max_pause * 1000,
+            "games_per_second": games / seconds,
+        }
+    return results
+
+
+def _bytes_per_object(factory, count):
+    """
+    Measure the traced heap memory retained per object built by factory.
+
+    Args:
+        factory: Zero-argument callable creating one object
+        count: Number of objects to keep alive while measuring
+
+    Returns:
+        float: Bytes per object
+    """
+    tracemalloc.start()
+    try:
+        objects = [factory() for _ in range(count)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return current / count
+
+
+def bench_memory(count=20000):
+    """
+    Report the memory footprint of Board and Player instances, as held in
+    bulk by analysis and simulation workloads.
+
+    Args:
+        count: Number of instances to allocate per measurement
+
+    Returns:
+        dict: Bytes per instance for each object type
+    """
+    return {
+        "board_3x3": _bytes_per_object(Board, count),
+        "board_3x3_midgame": _bytes_per_object(_midgame_board, count),
+        "board_9x9": _bytes_per_object(lambda: Board(size=9), count // 10),
+        "human_player": _bytes_per_object(lambda: HumanPlayer("X"), count),
+        "computer_player": _bytes_per_object(lambda: ComputerPlayer("O", 3), count),
+    }
+
+
+def bench_interning(games=2000, seed=1):
+    """
+    Compare the memory of recorded games kept as one Board per position
+    with the same games interned as position IDs.
+
+    Args:
+        games: Number of random 3x3 games
+        seed: Random seed for the moves
+
+    Returns:
+        dict: positions played, distinct positions (canonical), and bytes
+        per position played for boards and for interned IDs
+    """
+    rng = random.Random(seed)
+    move_lists = []
+    for _ in range(games):
+        board = Board()
+        cells = []
+        symbol = board.PLAYER_X
+        while board.check_winner() is None and not board.is_full():
+            row, col = rng.choice(board.get_empty_positions())
+            board.make_move(row, col, symbol)
+            cells.append(row * board.size + col)
+            symbol = board.PLAYER_O if symbol == board.PLAYER_X else board.PLAYER_X
+        move_lists.append(cells)
+    played = sum(len(cells) + 1 for cells in move_lists)
+
+    tracemalloc.start()
+    try:
+        boards = []
+        for cells in move_lists:
+            board = Board()
+            boards.append(board.get_copy())
+            for ply, cell in enumerate(cells):
+                board.make_move(*board.cells[cell], board.PLAYER_O if ply & 1 else board.PLAYER_X)
+                boards.append(board.get_copy())
+        board_bytes, _ = tracemalloc.get_traced_memory()
+        del boards, board
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        table = PositionTable()
+        sequences = GameSequences()
+        for cells in move_lists:
+            sequences.append(table.add_game(cells))
+        interned_bytes = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return {
+        "positions": played,
+        "distinct": len(table),
+        "board_bytes": board_bytes / played,
+        "interned_bytes": interned_bytes / played,
+    }
+
+
+def main():
+    """Run all benchmarks and print a short report."""
+    print("Empty-cell bookkeeping per _minimax node:")
+    for size in (3, 5, 9):
+        result = bench_empty_tracking(size)
+        print(f"  {size}x{size}: scan {result['scan_ns_per_node']:.0f} ns, "
+              f"incremental {result['incremental_ns_per_node']:.0f} ns, "
+              f"saved {result['saved_ns_per_node']:.0f} ns, "
+              f"lazy with cutoff {result['lazy_cutoff_ns_per_node']:.0f} ns")
+
+    print("Medium win and block scans, quiet position:")
+    for size, win_length in ((3, None), (9, 5), (15, 5)):
+        result = bench_medium_scan(size, win_length, 2000 if size > 3 else 20000)
+        print(f"  {size}x{size} / {result['win_length']}: place and check {result['probe_us']:.1f} us, "
+              f"line scan {result['line_scan_us']:.1f} us")
+
+    print("Position key per lookup:")
+    for size in (3, 9):
+        result = bench_position_keys(size)
+        print(f"  {size}x{size}: grid hash {result['grid_hash_ns']:.0f} ns, "
+              f"zobrist {result['zobrist_ns']:.0f} ns, "
+              f"canonical {result['canonical_ns']:.0f} ns")
+
+    print("Rendering one turn:")
+    for size in (3, 9):
+        result = bench_rendering(size)
+        print(f"  {size}x{size}: full redraw {result['full_bytes_per_turn']} bytes, "
+              f"diff redraw {result['diff_bytes_per_turn']} bytes; frame "
+              f"{result['uncached_us_per_frame']:.1f} us uncached, "
+              f"{result['cached_us_per_frame']:.2f} us cached")
+
+    print("Garbage collection during 20000 headless games:")
+    for label, result in bench_gc_pauses().items():
+        print(f"  {label}: {result['collections']} collections, "
+              f"{result['total_pause_ms']:.1f} ms total pause, "
+              f"{result['max_pause_ms']:.2f} ms max, "
+              f"{result['games_per_second']:.0f} games/s")
+
+    result = bench_analytics_ingest()
+    print(f"Analytics ingestion: {result['games_per_second']:.0f} games/s, "
+          f"{result['bytes_per_game']:.0f} bytes per game")
+
+    print("Snapshot round trip per request (restore, computer reply, snapshot):")
+    for label, result in bench_snapshot_round_trip().items():
+        print(f"  {label}: {result['us_per_request']:.0f} us, of which {result['overhead_us']:.0f} us "
+              f"restoring and snapshotting {result['snapshot_bytes']} bytes")
+
+    print("Memory per instance (tracemalloc):")
+    for name, size in bench_memory().items():
+        print(f"  {name}: {size:.0f} bytes")
+
+    result = bench_interning()
+    print(f"Recorded games, {result['positions']} positions ({result['distinct']} distinct): "
+          f"{result['board_bytes']:.0f} bytes each as boards, {result['interned_bytes']:.1f} interned")
+
+    result = bench_win_line_tables()
+    print(f"Win-line tables, 19x19 five-in-a-row: computed {result['build_ms']:.1f} ms, "
+          f"memory-mapped {result['mmap_ms']:.2f} ms ({result['file_bytes']} bytes), "
+          f"first lookup through a cell {result['first_move_us']:.0f} us")
+
+    result = bench_threat_search()
+    print(f"Threat-space search, 9x9 five-in-a-row: {result['ms_per_search']:.2f} ms "
+          f"(winning move {result['move']})")
+
+    result = bench_hard_search()
+    print(f"Hard search after a center opening: {result['ms_per_search']:.1f} ms")
+
+    print("Hard move after corner and center openings, by rule variant:")
+    for label, result in bench_rule_variants().items():
+        print(f"  {label}: {result['ms_per_search']:.1f} ms, {result['nodes']} nodes")
+
+    print("Ultimate Tic-Tac-Toe move after 10 random plies:")
+    for label, result in bench_ultimate().items():
+        detail = (f"{result['nodes']} nodes" if "nodes" in result
+                  else f"{result['playouts_per_second']:.0f} playouts/s")
+        print(f"  {label}: {result['ms_per_move']:.0f} ms, {detail}")
+
+    print("Principal variation search vs full-window alpha-beta:")
+    for result in bench_principal_variation():
+        plain, pvs = result["alpha_beta"], result["pvs"]
+        print(f"  {result['label']}: {plain['nodes']} -> {pvs['nodes']} nodes "
+              f"({pvs['nodes'] / plain['nodes']:.0%}), {plain['ms_per_search']:.0f} -> "
+              f"{pvs['ms_per_search']:.0f} ms, moves {plain['move']} / {pvs['move']}")
+
+    print("Async hard search with a deadline, 4x4 opening:")
+    for result in bench_search_deadline():
+        print(f"  {result['timeout_ms']:.0f} ms deadline: returned after {result['elapsed_ms']:.1f} ms "
+              f"(+{result['overshoot_ms']:.2f} ms), move {result['move']}")
+
+    print("Parallel root split, 4x4 middlegame:")
+    for result in bench_parallel_search():
+        print(f"  {result['workers']} worker(s): {result['ms_per_search']:.0f} ms, "
+              f"speedup {result['speedup']:.2f}x, move {result['move']}")
+
+    print("Transposition table, 4x4 middlegame:")
+    for label, result in bench_transposition_table().items():
+        line = f"  {label}: {result['ms_per_search']:.0f} ms, move {result['move']}"
+        metrics = result["metrics"]
+        if metrics:
+            line += f", hit rate {metrics['hit_rate']:.1%}, {metrics['stores']} stores"
+            if "torn_reads" in metrics:
+                line += f", {metrics['collisions']} collisions, {metrics['torn_reads']} torn reads"
+        print(line)
+
+    result = bench_tablebase()
+    print(f"Endgame tablebase, 4x4 with up to 6 empty cells: {result['positions']} positions "
+          f"in {result['file_bytes']} bytes, built in {result['build_s']:.1f} s")
+    for label in ("search", "tablebase"):
+        print(f"  {label}: {result[label]['ms_per_search']:.0f} ms, move {result[label]['move']}")
+
+
+if __name__ == "__main__":
+    main()
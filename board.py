@@ -1,7 +1,15 @@
 """
 Board class for Tic-Tac-Toe game
 """
-from ui_utils import Colors, colored_text
+import random
+from renderer import render_board
+from win_lines import load_tables
+
+# Zobrist key toggled on every move, so position keys encode the side to move
+ZOBRIST_SIDE = 0x9E3779B97F4A7C15
+
+# Cached winner value meaning "not known, scan the lines"
+_UNKNOWN = object()
 
 class Board:
     """
@@ -9,7 +17,20 @@ class Board:
     Handles board state, move validation, and winner detection.
     """
     
-    def __init__(self, empty_symbol="⬜️", player_x_symbol="❌", player_o_symbol="⭕"):
+    __slots__ = (
+        "EMPTY", "PLAYER_X", "PLAYER_O", "size", "win_length", "grid", "positions",
+        "cells", "win_lines", "zobrist", "empty_mask", "x_mask", "move_count", "hash_key",
+        "_winner", "_win_ply",
+    )
+    
+    # Position numbers, cell coordinates and Zobrist keys are the same for
+    # every board of a given size, so they are built once per size and
+    # shared by reference. Win lines come from the precomputed tables in
+    # win_lines.py.
+    _layouts = {}
+    _symmetries = {}
+    
+    def __init__(self, empty_symbol="⬜️", player_x_symbol="❌", player_o_symbol="⭕", size=3, win_length=None):
         """
         Initialize a new board with empty cells.
         
@@ -17,59 +38,146 @@ class Board:
             empty_symbol: Symbol for empty cells
             player_x_symbol: Symbol for player X
             player_o_symbol: Symbol for player O
+            size: Number of rows and columns (3 for the classic game)
+            win_length: Marks in a row needed to win (defaults to size)
         """
         self.EMPTY = empty_symbol
         self.PLAYER_X = player_x_symbol
         self.PLAYER_O = player_o_symbol
+        self.size = size
+        self.win_length = win_length or size
         self.grid = self.initialize_grid()
-        self.positions = {
-            1: (0, 0), 2: (0, 1), 3: (0, 2),
-            4: (1, 0), 5: (1, 1), 6: (1, 2),
-            7: (2, 0), 8: (2, 1), 9: (2, 2)
-        }
+        self.positions, self.cells, self.zobrist = self._get_layout(size)
+        self.win_lines = load_tables(size, self.win_length)
+        # Empty cells and X's cells (bit row * size + col), the move counter,
+        # the Zobrist position key and the winner are kept up to date by
+        # make_move/undo_move so search never rescans the grid.
+        self.empty_mask = (1 << (size * size)) - 1
+        self.x_mask = 0
+        self.move_count = 0
+        self.hash_key = 0
+        self._winner = None
+        # Move count at which the cached winner appeared, so undoing that
+        # move can restore "no winner" without a scan
+        self._win_ply = None
+        
+    @classmethod
+    def _get_layout(cls, size):
+        """
+        Get the shared layout tables for a board size.
+        
+        The Zobrist keys come from a generator seeded with the board size, so
+        every process derives the same keys and position keys can be shared
+        between processes and persisted.
+        
+        Args:
+            size: Board size
+            
+        Returns:
+            tuple: (positions, cells, zobrist) where positions maps 1-based
+            position numbers to (row, col), cells lists (row, col) by cell
+            index and zobrist holds the key for cell index i at 2 * i for
+            PLAYER_X and 2 * i + 1 for PLAYER_O. All three are shared between
+            boards and must not be modified.
+        """
+        layout = cls._layouts.get(size)
+        if layout is None:
+            cells = tuple((row, col) for row in range(size) for col in range(size))
+            positions = {index + 1: cell for index, cell in enumerate(cells)}
+            rng = random.Random(f"zobrist-{size}")
+            zobrist = tuple(rng.getrandbits(64) for _ in range(2 * size * size))
+            layout = cls._layouts[size] = (positions, cells, zobrist)
+        return layout
+        
+    @staticmethod
+    def get_lines(size, win_length):
+        """
+        Get every winning line of a board: all runs of win_length cells along
+        rows, columns and both diagonal directions.
+        
+        Args:
+            size: Board size
+            win_length: Marks in a row needed to win
+            
+        Returns:
+            tuple: Tuples of (row, col) cells, shared between boards
+        """
+        return load_tables(size, win_length).lines()
+        
+    @property
+    def lines(self):
+        """Every winning line of this board as tuples of (row, col) cells."""
+        return self.win_lines.lines()
+        
+    @classmethod
+    def get_symmetries(cls, size):
+        """
+        Get the eight rotations and reflections of a square board.
+        
+        Args:
+            size: Board size
+            
+        Returns:
+            tuple: Eight permutations; permutation[i] is the cell index that
+            cell index i maps to. The first one is the identity.
+        """
+        symmetries = cls._symmetries.get(size)
+        if symmetries is None:
+            last = size - 1
+            transforms = (
+                lambda r, c: (r, c),
+                lambda r, c: (c, last - r),
+                lambda r, c: (last - r, last - c),
+                lambda r, c: (last - c, r),
+                lambda r, c: (r, last - c),
+                lambda r, c: (last - r, c),
+                lambda r, c: (c, r),
+                lambda r, c: (last - c, last - r),
+            )
+            symmetries = []
+            for transform in transforms:
+                permutation = []
+                for row in range(size):
+                    for col in range(size):
+                        new_row, new_col = transform(row, col)
+                        permutation.append(new_row * size + new_col)
+                symmetries.append(tuple(permutation))
+            symmetries = cls._symmetries[size] = tuple(symmetries)
+        return symmetries
+        
+    def __getstate__(self):
+        """Pickle only the per-board state; the shared layout is rebuilt on load."""
+        return (self.EMPTY, self.PLAYER_X, self.PLAYER_O, self.size, self.win_length,
+                self.grid, self.empty_mask, self.x_mask, self.move_count, self.hash_key)
+        
+    def __setstate__(self, state):
+        """Restore a pickled board and re-attach the shared layout tables."""
+        (self.EMPTY, self.PLAYER_X, self.PLAYER_O, self.size, self.win_length,
+         self.grid, self.empty_mask, self.x_mask, self.move_count, self.hash_key) = state
+        self.positions, self.cells, self.zobrist = self._get_layout(self.size)
+        self.win_lines = load_tables(self.size, self.win_length)
+        self._winner = _UNKNOWN
+        self._win_ply = None
         
     def initialize_grid(self):
         """
-        Initialize a fresh 3x3 grid filled with empty cells.
+        Initialize a fresh size x size grid filled with empty cells.
         """
-        return [
-            [self.EMPTY, self.EMPTY, self.EMPTY],
-            [self.EMPTY, self.EMPTY, self.EMPTY],
-            [self.EMPTY, self.EMPTY, self.EMPTY]
-        ]
+        return [[self.EMPTY] * self.size for _ in range(self.size)]
         
     def display(self):
         """
         Display the current board state with color-coded symbols.
         """
-        position_labels = {
-            (row, col): str(pos) 
-            for pos, (row, col) in self.positions.items()
-        }
-        
-        print("\n  Current Board:")
-        print("  -------------")
-        
-        for i in range(3):
-            print("  |", end=" ")
-            for j in range(3):
-                cell = self.grid[i][j]
-                if cell == self.EMPTY:
-                    print(colored_text(position_labels[(i, j)], Colors.BLUE), end=" | ")
-                elif cell == self.PLAYER_X:
-                    print(colored_text("X", Colors.RED), end=" | ")
-                else:  # cell == self.PLAYER_O
-                    print(colored_text("O", Colors.GREEN), end=" | ")
-            print("\n  -------------")
-        print()
+        print(render_board(self), end="", flush=True)
         
     def make_move(self, row, col, symbol):
         """
         Place a symbol at the specified position on the grid.
         
         Args:
-            row: Row index (0-2)
-            col: Column index (0-2)
+            row: Row index (0 to size-1)
+            col: Column index (0 to size-1)
             symbol: Symbol to place (PLAYER_X or PLAYER_O)
             
         Returns:
@@ -78,7 +186,53 @@ class Board:
         if not self.is_valid_move(row, col):
             return False
             
+        index = row * self.size + col
+        bit = 1 << index
         self.grid[row][col] = symbol
+        self.empty_mask &= ~bit
+        is_o = symbol != self.PLAYER_X
+        if not is_o:
+            self.x_mask |= bit
+        self.move_count += 1
+        self.hash_key ^= self.zobrist[2 * index + is_o] ^ ZOBRIST_SIDE
+        
+        # Only lines through the new mark can have been completed by it
+        if self._winner is None:
+            marks = ~(self.empty_mask | self.x_mask) if is_o else self.x_mask
+            for mask in self.win_lines.masks_through(index):
+                if marks & mask == mask:
+                    self._winner = symbol
+                    self._win_ply = self.move_count
+                    break
+        return True
+        
+    def undo_move(self, row, col):
+        """
+        Clear a previously occupied cell, reverting make_move.
+        
+        Args:
+            row: Row index (0 to size-1)
+            col: Column index (0 to size-1)
+            
+        Returns:
+            bool: True if a symbol was removed, False if the cell was already empty
+        """
+        symbol = self.grid[row][col]
+        if symbol == self.EMPTY:
+            return False
+            
+        index = row * self.size + col
+        bit = 1 << index
+        self.grid[row][col] = self.EMPTY
+        self.empty_mask |= bit
+        self.x_mask &= ~bit
+        if self._win_ply == self.move_count:
+            self._winner = None
+            self._win_ply = None
+        elif self._winner is not None:
+            self._winner = _UNKNOWN
+        self.move_count -= 1
+        self.hash_key ^= self.zobrist[2 * index + (symbol != self.PLAYER_X)] ^ ZOBRIST_SIDE
         return True
         
     def is_valid_move(self, row, col):
@@ -92,7 +246,7 @@ class Board:
         Returns:
             bool: True if the move is valid, False otherwise
         """
-        if row < 0 or row > 2 or col < 0 or col > 2:
+        if row < 0 or row >= self.size or col < 0 or col >= self.size:
             return False
             
         return self.grid[row][col] == self.EMPTY
@@ -102,15 +256,65 @@ class Board:
         Get all empty positions on the board.
         
         Returns:
-            list: List of (row, col) tuples for all empty cells
+            list: List of (row, col) tuples for all empty cells, in row-major order
         """
+        cells = self.cells
+        mask = self.empty_mask
         empty_positions = []
-        for row in range(3):
-            for col in range(3):
-                if self.grid[row][col] == self.EMPTY:
-                    empty_positions.append((row, col))
+        while mask:
+            lowest = mask & -mask
+            empty_positions.append(cells[lowest.bit_length() - 1])
+            mask ^= lowest
         return empty_positions
         
+    def iter_empty_positions(self):
+        """
+        Lazily yield the empty positions, for search loops.
+        
+        Unlike get_empty_positions() nothing is built up front, so a loop
+        cut off after its first moves (alpha-beta pruning) never looks at
+        the rest. The empty cells are read when iteration starts; moves
+        made and undone inside the loop do not disturb it.
+        
+        Yields:
+            tuple: (row, col) of each empty cell, in row-major order
+        """
+        cells = self.cells
+        mask = self.empty_mask
+        while mask:
+            lowest = mask & -mask
+            yield cells[lowest.bit_length() - 1]
+            mask ^= lowest
+            
+    def winning_cells(self, symbol):
+        """
+        Lazily yield the empty cells where a player would complete a line.
+        
+        Each line is checked by counting its marks with its bit mask, so
+        nothing is copied or placed, and a caller that only needs one cell
+        stops the scan at the first hit:
+        
+            block = next(board.winning_cells(opponent), None)
+        
+        Cells come in line order (rows, columns, diagonals, anti-diagonals;
+        see win_lines.py), and a cell completing several lines is yielded
+        once for each. The board must not change during iteration.
+        
+        Args:
+            symbol: The player's symbol
+            
+        Yields:
+            tuple: (row, col) of each winning cell
+        """
+        empty_mask = self.empty_mask
+        marks = self.x_mask if symbol == self.PLAYER_X else ~(empty_mask | self.x_mask)
+        cells = self.cells
+        for mask in self.win_lines.masks():
+            # The line's cells not held by the player: exactly one, and free
+            gap = mask & ~marks
+            if gap and not gap & (gap - 1) and gap & empty_mask:
+                yield cells[gap.bit_length() - 1]
+                
     def is_full(self):
         """
         Check if the board is full (no empty cells).
@@ -118,7 +322,7 @@ class Board:
         Returns:
             bool: True if board is full, False otherwise
         """
-        return len(self.get_empty_positions()) == 0
+        return self.empty_mask == 0
         
     def check_winner(self):
         """
@@ -127,30 +331,77 @@ class Board:
         Returns:
             Symbol of the winner (PLAYER_X or PLAYER_O) or None if no winner
         """
-        # Check rows
-        for row in range(3):
-            if (self.grid[row][0] != self.EMPTY and 
-                self.grid[row][0] == self.grid[row][1] == self.grid[row][2]):
-                return self.grid[row][0]
-                
-        # Check columns
-        for col in range(3):
-            if (self.grid[0][col] != self.EMPTY and
-                self.grid[0][col] == self.grid[1][col] == self.grid[2][col]):
-                return self.grid[0][col]
-                
-        # Check diagonals
-        if (self.grid[0][0] != self.EMPTY and 
-            self.grid[0][0] == self.grid[1][1] == self.grid[2][2]):
-            return self.grid[0][0]
-            
-        if (self.grid[0][2] != self.EMPTY and 
-            self.grid[0][2] == self.grid[1][1] == self.grid[2][0]):
-            return self.grid[0][2]
+        winner = self._winner
+        if winner is _UNKNOWN:
+            winner = self._winner = self._scan_winner()
+        return winner
+        
+    def _scan_winner(self):
+        """
+        Check every line for a winner, for when the cached winner is unknown.
+        
+        Returns:
+            Symbol of the winner (PLAYER_X or PLAYER_O) or None if no winner
+        """
+        # A complete line needs at least win_length marks on the board
+        if self.move_count < self.win_length:
+            return None
             
+        grid = self.grid
+        empty = self.EMPTY
+        for line in self.lines:
+            row, col = line[0]
+            first = grid[row][col]
+            if first == empty:
+                continue
+            for row, col in line:
+                if grid[row][col] != first:
+                    break
+            else:
+                return first
+                
         # No winner
         return None
         
+    def canonical_transform(self):
+        """
+        Find the symmetry under which this position has the smallest key.
+        
+        Positions that are rotations or reflections of each other share the
+        same canonical key, which lets caches store them once.
+        
+        Returns:
+            tuple: (canonical_key, permutation) where permutation maps cell
+            indices of this board to cell indices of the canonical position
+        """
+        zobrist = self.zobrist
+        side = ZOBRIST_SIDE if self.move_count & 1 else 0
+        occupied = []
+        for index, (row, col) in enumerate(self.cells):
+            cell = self.grid[row][col]
+            if cell != self.EMPTY:
+                occupied.append((index, cell != self.PLAYER_X))
+                
+        best_key = None
+        best_permutation = None
+        for permutation in self.get_symmetries(self.size):
+            key = side
+            for index, piece in occupied:
+                key ^= zobrist[2 * permutation[index] + piece]
+            if best_key is None or key < best_key:
+                best_key = key
+                best_permutation = permutation
+        return best_key, best_permutation
+        
+    def canonical_key(self):
+        """
+        Get the position key shared by all symmetric variants of this board.
+        
+        Returns:
+            int: Smallest Zobrist key over the eight board symmetries
+        """
+        return self.canonical_transform()[0]
+        
     def get_copy(self):
         """
         Create a deep copy of the current board state.
@@ -158,12 +409,35 @@ class Board:
         Returns:
             Board: A new Board object with the same state
         """
-        new_board = Board(self.EMPTY, self.PLAYER_X, self.PLAYER_O)
-        for i in range(3):
-            for j in range(3):
-                new_board.grid[i][j] = self.grid[i][j]
+        new_board = Board(self.EMPTY, self.PLAYER_X, self.PLAYER_O, self.size, self.win_length)
+        new_board.grid = [row[:] for row in self.grid]
+        new_board.empty_mask = self.empty_mask
+        new_board.x_mask = self.x_mask
+        new_board.move_count = self.move_count
+        new_board.hash_key = self.hash_key
+        new_board._winner = self._winner
+        new_board._win_ply = self._win_ply
         return new_board
         
     def reset(self):
-        """Reset the board to its initial empty state."""
-        self.grid = self.initialize_grid()
\ No newline at end of file
+        """
+        Reset the board to its initial empty state.
+        
+        Only the occupied cells are cleared and the grid lists are reused, so
+        pooled boards can be recycled without allocating.
+        """
+        full_mask = (1 << (self.size * self.size)) - 1
+        occupied = full_mask & ~self.empty_mask
+        cells = self.cells
+        grid = self.grid
+        while occupied:
+            lowest = occupied & -occupied
+            row, col = cells[lowest.bit_length() - 1]
+            grid[row][col] = self.EMPTY
+            occupied ^= lowest
+        self.empty_mask = full_mask
+        self.x_mask = 0
+        self.move_count = 0
+        self.hash_key = 0
+        self._winner = None
+        self._win_ply = None
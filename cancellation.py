@@ -0,0 +1,58 @@
+"""
+Cancellation tokens for computer-player searches
+
+A CancellationToken is shared between the code that starts a search and
+the search itself. The search checks it every few hundred nodes and stops
+with SearchCancelled once the token is cancelled, or with DeadlineExceeded
+once its deadline has passed, so a disconnect or a per-request time limit
+stops the search instead of letting it burn CPU to the end.
+"""
+import threading
+import time
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search whose token was cancelled."""
+
+
+class DeadlineExceeded(SearchCancelled):
+    """Raised inside a search whose token's deadline has passed."""
+
+
+class CancellationToken:
+    """
+    Thread-safe flag plus optional deadline, checked by a running search.
+    """
+
+    __slots__ = ("deadline", "_cancelled")
+
+    def __init__(self, timeout=None):
+        """
+        Args:
+            timeout: Seconds from now after which the search should stop,
+                or None for no deadline
+        """
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Ask the search to stop at its next check."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        """True once cancel() has been called."""
+        return self._cancelled.is_set()
+
+    def check(self):
+        """
+        Stop the search if it should not continue.
+
+        Raises:
+            SearchCancelled: If the token was cancelled
+            DeadlineExceeded: If the deadline has passed
+        """
+        if self._cancelled.is_set():
+            raise SearchCancelled()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded()
@@ -0,0 +1,424 @@
+"""
+Exhaustive cross-check of the procedural and object-oriented engines
+
+Enumerates every reachable, unfinished 3x3 position (with either side
+having moved first), asks every engine and difficulty for a move and
+checks the answers:
+
+- every move must be legal;
+- hard moves must keep the best result a full minimax finds (win, draw or
+  loss) and reach it in as few plies as possible, or put off a loss as
+  long as possible;
+- medium moves must take an immediate win and otherwise block the
+  opponent's immediate win;
+- the procedural and object-oriented engines must agree: easy and medium
+  moves exactly (random choices are made from the same seed), hard moves
+  in the result they keep and how many plies it takes;
+- the cancellable hard search must also run with its root moves split
+  across worker processes; it is checked on every position with two marks,
+  past the opening short-cut.
+
+Positions are checked in parallel and the time each engine spends per
+position is reported, so the run doubles as a performance regression gate:
+
+    python crosscheck.py --workers 4
+    python crosscheck.py --write-baseline crosscheck_baseline.json
+    python crosscheck.py --baseline crosscheck_baseline.json --max-slowdown 0.25
+
+The exit status is 1 if any check fails or an engine is slower than the
+baseline allows.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from board import Board
+from cancellation import CancellationToken
+from old_procedual_version import coreLogic
+from player import ComputerPlayer
+from tablebase import load_tablebase
+
+EMPTY = coreLogic.EMPTY
+PLAYER_X = coreLogic.PLAYER_X
+PLAYER_O = coreLogic.PLAYER_O
+
+_LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6),
+)
+
+# Results from the point of view of the side to move, ordered worst first
+LOSS, DRAW, WIN = 0, 1, 2
+_RESULT_NAMES = ("loss", "draw", "win")
+
+_solved = {}
+
+
+def _other(symbol):
+    return PLAYER_O if symbol == PLAYER_X else PLAYER_X
+
+
+def _winner(cells):
+    for a, b, c in _LINES:
+        if cells[a] != EMPTY and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return None
+
+
+def reachable_positions():
+    """
+    Enumerate the unfinished positions of games started by either side.
+
+    Returns:
+        list: (cells, to_move) pairs, cells being a tuple of nine symbols
+        in row-major order, in a fixed order
+    """
+    seen = set()
+    positions = []
+
+    def visit(cells, to_move):
+        if (cells, to_move) in seen:
+            return
+        seen.add((cells, to_move))
+        if _winner(cells) or EMPTY not in cells:
+            return
+        positions.append((cells, to_move))
+        for index in range(9):
+            if cells[index] == EMPTY:
+                visit(cells[:index] + (to_move,) + cells[index + 1:], _other(to_move))
+
+    for first in (PLAYER_X, PLAYER_O):
+        visit((EMPTY,) * 9, first)
+    return positions
+
+
+def solve(cells, to_move):
+    """
+    Full minimax value of a position, independent of both engines.
+
+    Args:
+        cells: Tuple of nine symbols
+        to_move: Symbol of the side to move
+
+    Returns:
+        tuple: (result, plies) with result LOSS, DRAW or WIN for the side
+        to move and plies the length of the rest of the game with best play
+        (fast wins, slow losses)
+    """
+    key = (cells, to_move)
+    value = _solved.get(key)
+    if value is None:
+        if _winner(cells):
+            value = (LOSS, 0)
+        elif EMPTY not in cells:
+            value = (DRAW, 0)
+        else:
+            value = max(
+                (move_value(cells, to_move, index) for index in range(9) if cells[index] == EMPTY),
+                key=_preference,
+            )
+        _solved[key] = value
+    return value
+
+
+def move_value(cells, to_move, index):
+    """
+    Value of playing one move, from the mover's point of view.
+
+    Returns:
+        tuple: (result, plies) as in solve()
+    """
+    result, plies = solve(cells[:index] + (to_move,) + cells[index + 1:], _other(to_move))
+    return 2 - result, plies + 1
+
+
+def _preference(value):
+    """Order values from the mover's point of view: win fast, lose slowly."""
+    result, plies = value
+    return (result, -plies if result == WIN else plies if result == LOSS else 0)
+
+
+def _procedural_board(cells):
+    return [list(cells[row * 3:row * 3 + 3]) for row in range(3)]
+
+
+def _oop_board(cells):
+    board = Board()
+    for index, symbol in enumerate(cells):
+        if symbol != EMPTY:
+            board.make_move(index // 3, index % 3, symbol)
+    return board
+
+
+def _engines():
+    """
+    Build the engines under test.
+
+    Each engine is (name, difficulty, family, prepare, move) where
+    prepare(cells, to_move) builds its input outside the timed call and
+    move(state) returns (row, col).
+    """
+    def procedural(difficulty):
+        def prepare(cells, to_move):
+            return _procedural_board(cells), to_move
+
+        def move(state):
+            board, to_move = state
+            return coreLogic.computer_move(board, difficulty, _other(to_move), to_move)
+        return prepare, move
+
+    def oop(difficulty, **options):
+        def prepare(cells, to_move):
+            return _oop_board(cells), ComputerPlayer(to_move, difficulty, **options)
+
+        def move(state):
+            board, player = state
+            return player.choose_move(board)
+        return prepare, move
+
+    engines = []
+    for difficulty, label in ((1, "easy"), (2, "medium"), (3, "hard")):
+        engines.append((f"procedural-{label}", difficulty, "procedural") + procedural(difficulty))
+        engines.append((f"oop-{label}", difficulty, "oop") + oop(difficulty))
+    engines.append(("oop-hard-alpha-beta", 3, "variant") + oop(3, use_pvs=False))
+    engines.append(("oop-medium-threats", 2, "variant") + oop(2, threat_search=True))
+    solved = load_tablebase(3, 3)
+    if solved is not None:
+        engines.append(("oop-hard-tablebase", 3, "variant") + oop(3, tablebase=solved))
+    return engines
+
+
+def _value_failure(value, best):
+    """Describe how a move's value falls short of the best, or return None."""
+    if value[0] < best[0]:
+        return f"{_RESULT_NAMES[value[0]]} instead of {_RESULT_NAMES[best[0]]}"
+    if value != best:
+        return (f"{_RESULT_NAMES[value[0]]} in {value[1]} plies "
+                f"instead of {best[1]}")
+    return None
+
+
+def _immediate_wins(cells, symbol):
+    wins = set()
+    for index in range(9):
+        if cells[index] == EMPTY and _winner(cells[:index] + (symbol,) + cells[index + 1:]):
+            wins.add(index)
+    return wins
+
+
+def _check_chunk(chunk, seed):
+    """
+    Run every engine on a chunk of positions.
+
+    Args:
+        chunk: List of (position_index, cells, to_move)
+        seed: Base random seed; each call is seeded with seed + position_index
+
+    Returns:
+        dict: failures (list of strings), agreement (engine pair ->
+        identical moves) and times (engine -> per-position nanoseconds)
+    """
+    engines = _engines()
+    failures = []
+    agreement = {}
+    times = {name: [] for name, *_ in engines}
+    for position_index, cells, to_move in chunk:
+        best = solve(cells, to_move)
+        wins = _immediate_wins(cells, to_move)
+        threats = _immediate_wins(cells, _other(to_move))
+        moves = {}
+        for name, difficulty, family, prepare, move in engines:
+            state = prepare(cells, to_move)
+            random.seed(seed + position_index)
+            start = time.perf_counter_ns()
+            row, col = move(state)
+            times[name].append(time.perf_counter_ns() - start)
+            index = row * 3 + col
+            moves[name] = index
+
+            where = f"{name} at {''.join(cells)} ({to_move} to move) played {index + 1}"
+            if not (0 <= index < 9) or cells[index] != EMPTY:
+                failures.append(f"{where}: illegal move")
+                continue
+            if difficulty == 3:
+                failure = _value_failure(move_value(cells, to_move, index), best)
+                if failure:
+                    failures.append(f"{where}: {failure}")
+            elif difficulty == 2:
+                if wins and index not in wins:
+                    failures.append(f"{where}: missed a win at {sorted(cell + 1 for cell in wins)}")
+                elif not wins and threats and index not in threats:
+                    failures.append(f"{where}: did not block {sorted(cell + 1 for cell in threats)}")
+
+        for label in ("easy", "medium", "hard"):
+            procedural_move, oop_move = moves[f"procedural-{label}"], moves[f"oop-{label}"]
+            pair = f"procedural-{label} / oop-{label}"
+            if procedural_move == oop_move:
+                agreement[pair] = agreement.get(pair, 0) + 1
+            elif label != "hard":
+                failures.append(f"{pair} at {''.join(cells)} ({to_move} to move): "
+                                f"{procedural_move + 1} vs {oop_move + 1}")
+            elif (move_value(cells, to_move, procedural_move)
+                  != move_value(cells, to_move, oop_move)):
+                failures.append(f"{pair} at {''.join(cells)} ({to_move} to move): "
+                                f"{procedural_move + 1} and {oop_move + 1} reach different results or distances")
+    return {"failures": failures, "agreement": agreement, "times": times}
+
+
+def check_parallel_cancellable(positions, workers=2):
+    """
+    Run the cancellable hard search with a parallel root split, which hands
+    the player to worker processes while its token is set.
+
+    Args:
+        positions: (cells, to_move) pairs; those with two marks are checked
+        workers: Worker processes of the root split
+
+    Returns:
+        list: Failure messages
+    """
+    failures = []
+    for cells, to_move in positions:
+        if sum(cell != EMPTY for cell in cells) != 2:
+            continue
+        where = f"oop-hard-parallel-cancellable at {''.join(cells)} ({to_move} to move)"
+        player = ComputerPlayer(to_move, 3, workers=workers)
+        try:
+            row, col = player.choose_move_cancellable(_oop_board(cells), CancellationToken())
+        except Exception as error:
+            failures.append(f"{where}: {type(error).__name__}: {error}")
+            continue
+        failure = _value_failure(move_value(cells, to_move, row * 3 + col), solve(cells, to_move))
+        if failure:
+            failures.append(f"{where} played {row * 3 + col + 1}: {failure}")
+    return failures
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_crosscheck(workers=None, seed=0, chunk_size=250):
+    """
+    Check every engine on every reachable position.
+
+    Args:
+        workers: Worker processes (None uses every CPU, 1 runs in-process)
+        seed: Base random seed for the easy and medium engines
+        chunk_size: Positions per task
+
+    Returns:
+        dict: positions, failures, agreement and timings (engine ->
+        mean_us, p50_us, p99_us and max_us per position)
+    """
+    positions = reachable_positions()
+    chunks = [
+        [(index, cells, to_move) for index, (cells, to_move) in enumerate(positions)][start:start + chunk_size]
+        for start in range(0, len(positions), chunk_size)
+    ]
+    if workers == 1:
+        results = [_check_chunk(chunk, seed) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_check_chunk, chunks, [seed] * len(chunks)))
+
+    failures = check_parallel_cancellable(positions)
+    agreement = {}
+    times = {}
+    for result in results:
+        failures.extend(result["failures"])
+        for pair, count in result["agreement"].items():
+            agreement[pair] = agreement.get(pair, 0) + count
+        for name, values in result["times"].items():
+            times.setdefault(name, []).extend(values)
+
+    timings = {}
+    for name, values in times.items():
+        values.sort()
+        timings[name] = {
+            "mean_us": sum(values) / len(values) / 1000,
+            "p50_us": _percentile(values, 0.50) / 1000,
+            "p99_us": _percentile(values, 0.99) / 1000,
+            "max_us": values[-1] / 1000,
+        }
+    return {
+        "positions": len(positions),
+        "failures": failures,
+        "agreement": agreement,
+        "timings": timings,
+    }
+
+
+def compare_with_baseline(timings, baseline, max_slowdown):
+    """
+    Find engines that got slower than a saved baseline allows.
+
+    Args:
+        timings: Timings from run_crosscheck()
+        baseline: Engine -> mean_us from an earlier run
+        max_slowdown: Allowed relative increase of the mean (0.25 = 25 %)
+
+    Returns:
+        list: Messages for the engines over the limit
+    """
+    regressions = []
+    for name, previous in baseline.items():
+        current = timings.get(name)
+        if current and current["mean_us"] > previous * (1 + max_slowdown):
+            regressions.append(f"{name}: {current['mean_us']:.1f} us per position, "
+                               f"baseline {previous:.1f} us (+{current['mean_us'] / previous - 1:.0%})")
+    return regressions
+
+
+def main():
+    """Command-line entry point: run the cross-check and print a report."""
+    parser = argparse.ArgumentParser(description="Cross-check the Tic-Tac-Toe engines on every 3x3 position.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for random move choices")
+    parser.add_argument("--baseline", default=None, help="JSON file of mean times to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=0.25,
+                        help="allowed relative slowdown against the baseline")
+    parser.add_argument("--write-baseline", default=None, help="save this run's mean times as a baseline")
+    parser.add_argument("--show", type=int, default=20, help="failures to print")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    report = run_crosscheck(args.workers, args.seed)
+    elapsed = time.perf_counter() - started_at
+
+    print(f"{report['positions']} positions checked in {elapsed:.1f} s")
+    print(f"  {'engine':<22}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for name, timing in report["timings"].items():
+        print(f"  {name:<22}{timing['mean_us']:>10.1f}{timing['p50_us']:>10.1f}"
+              f"{timing['p99_us']:>10.1f}{timing['max_us']:>10.1f}")
+    for pair, count in report["agreement"].items():
+        print(f"  {pair}: same move in {count} of {report['positions']} positions")
+
+    failed = bool(report["failures"])
+    if failed:
+        print(f"{len(report['failures'])} check(s) failed:")
+        for failure in report["failures"][:args.show]:
+            print(f"  {failure}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare_with_baseline(report["timings"], json.load(baseline_file), args.max_slowdown)
+        for regression in regressions:
+            print(f"Slower than baseline: {regression}")
+        failed = failed or bool(regressions)
+    if args.write_baseline:
+        with open(args.write_baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump({name: timing["mean_us"] for name, timing in report["timings"].items()},
+                      baseline_file, indent=2)
+        print(f"Baseline written to {args.write_baseline}")
+    if not failed:
+        print("All checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
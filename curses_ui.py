@@ -0,0 +1,183 @@
+"""
+Full-screen curses front end for Tic-Tac-Toe
+
+Plays against the computer in a curses window: only the cells that change
+are repainted, and curses batches the updates into one refresh per turn.
+
+Controls: arrow keys move the cursor, Enter or Space places a mark, number
+keys 1-9 place a mark directly, r starts a new game and q quits.
+
+Usage: python curses_ui.py --difficulty 3
+"""
+import argparse
+import random
+from board import Board
+from player import ComputerPlayer
+
+try:
+    import curses
+except ImportError:  # e.g. Windows without the windows-curses package
+    curses = None
+
+
+class CursesGame:
+    """A human-vs-computer game drawn and controlled with curses."""
+
+    def __init__(self, screen, difficulty=3, size=3, win_length=None):
+        """
+        Args:
+            screen: The curses window to draw on
+            difficulty: Computer difficulty (1-3)
+            size: Board size
+            win_length: Marks in a row needed to win (defaults to size)
+        """
+        self.screen = screen
+        self.difficulty = difficulty
+        self.size = size
+        self.win_length = win_length
+        self.cell_width = len(str(size * size)) + 2
+        self.new_game()
+
+    def new_game(self):
+        """Reset the board and randomly decide who moves first."""
+        self.board = Board(size=self.size, win_length=self.win_length)
+        self.human_symbol = self.board.PLAYER_X
+        self.computer = ComputerPlayer(self.board.PLAYER_O, self.difficulty)
+        self.cursor = (self.size // 2, self.size // 2)
+        self.message = "Your move (X)."
+        self.finished = False
+        self.screen.clear()
+        self._draw_grid()
+        if random.choice([True, False]):
+            self._computer_turn()
+        self._draw_all_cells()
+
+    def _cell_origin(self, row, col):
+        """Return the screen (y, x) of a cell's text."""
+        return 2 + row * 2, 2 + col * (self.cell_width + 1)
+
+    def _draw_grid(self):
+        """Draw the static title and grid lines once per game."""
+        self.screen.addstr(0, 2, "Tic-Tac-Toe  (arrows + Enter, 1-9, r = restart, q = quit)")
+        width = self.size * (self.cell_width + 1) + 1
+        for row in range(self.size + 1):
+            self.screen.addstr(1 + row * 2, 1, "-" * width)
+        for row in range(self.size):
+            self.screen.addstr(2 + row * 2, width, "|")
+
+    def _draw_cell(self, row, col):
+        """Repaint one cell, highlighting it if the cursor is on it."""
+        cell = self.board.grid[row][col]
+        if cell == self.board.PLAYER_X:
+            text, color = "X", 1
+        elif cell == self.board.PLAYER_O:
+            text, color = "O", 2
+        else:
+            text, color = str(row * self.size + col + 1), 3
+        attributes = curses.color_pair(color)
+        if (row, col) == self.cursor and not self.finished:
+            attributes |= curses.A_REVERSE
+        y, x = self._cell_origin(row, col)
+        self.screen.addstr(y, x - 1, "|" + text.center(self.cell_width), attributes)
+
+    def _draw_all_cells(self):
+        """Repaint every cell and the status line."""
+        for row in range(self.size):
+            for col in range(self.size):
+                self._draw_cell(row, col)
+        self._draw_status()
+
+    def _draw_status(self):
+        """Repaint the status line below the board."""
+        y = 3 + self.size * 2
+        self.screen.move(y, 0)
+        self.screen.clrtoeol()
+        self.screen.addstr(y, 2, self.message)
+
+    def _finish_if_over(self):
+        """Set the result message if the game has ended."""
+        winner = self.board.check_winner()
+        if winner == self.human_symbol:
+            self.message = "You won! Press r to play again or q to quit."
+        elif winner:
+            self.message = "Computer won! Press r to play again or q to quit."
+        elif self.board.is_full():
+            self.message = "It's a draw! Press r to play again or q to quit."
+        else:
+            return False
+        self.finished = True
+        return True
+
+    def _computer_turn(self):
+        """Let the computer move and repaint its cell."""
+        row, col = self.computer.choose_move(self.board)
+        self.board.make_move(row, col, self.computer.symbol)
+        self._draw_cell(row, col)
+        if not self._finish_if_over():
+            self.message = "Your move (X)."
+
+    def _human_move(self, row, col):
+        """Place the human's mark and answer with the computer's move."""
+        if self.finished or not self.board.make_move(row, col, self.human_symbol):
+            return
+        self._draw_cell(row, col)
+        if not self._finish_if_over():
+            self._computer_turn()
+        if self.finished:
+            self._draw_all_cells()
+        else:
+            self._draw_status()
+
+    def _move_cursor(self, d_row, d_col):
+        """Move the cursor and repaint the two affected cells."""
+        old_row, old_col = self.cursor
+        self.cursor = ((old_row + d_row) % self.size, (old_col + d_col) % self.size)
+        self._draw_cell(old_row, old_col)
+        self._draw_cell(*self.cursor)
+
+    def run(self):
+        """Process key presses until the player quits."""
+        moves = {
+            curses.KEY_UP: (-1, 0), curses.KEY_DOWN: (1, 0),
+            curses.KEY_LEFT: (0, -1), curses.KEY_RIGHT: (0, 1),
+        }
+        while True:
+            self.screen.refresh()
+            key = self.screen.getch()
+            if key in (ord("q"), ord("Q")):
+                return
+            elif key in (ord("r"), ord("R")):
+                self.new_game()
+            elif key in moves:
+                self._move_cursor(*moves[key])
+            elif key in (curses.KEY_ENTER, 10, 13, ord(" ")):
+                self._human_move(*self.cursor)
+            elif ord("1") <= key <= ord("9") and key - ord("0") in self.board.positions:
+                self._human_move(*self.board.positions[key - ord("0")])
+
+
+def _main(screen, args):
+    """curses.wrapper entry point."""
+    curses.curs_set(0)
+    curses.use_default_colors()
+    curses.init_pair(1, curses.COLOR_RED, -1)
+    curses.init_pair(2, curses.COLOR_GREEN, -1)
+    curses.init_pair(3, curses.COLOR_BLUE, -1)
+    CursesGame(screen, args.difficulty, args.size, args.win_length).run()
+
+
+def main():
+    """Command-line entry point for the curses front end."""
+    parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe in a full-screen curses window.")
+    parser.add_argument("--difficulty", type=int, default=3, choices=(1, 2, 3))
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, default=None)
+    args = parser.parse_args()
+
+    if curses is None:
+        parser.exit(1, "The curses module is not available on this system.\n")
+    curses.wrapper(_main, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Heuristic position evaluation for depth-limited search
+
+Scores non-terminal positions by looking at every winning line of the
+board. Each scorer rates a line from the number of marks each side has in
+it; an Evaluator combines weighted scorers into a single lookup table
+indexed by (x_marks, o_marks), so scoring a line is one table lookup.
+
+The Evaluator also keeps per-line mark counts and the running total, and
+updates them incrementally as moves are made and undone during search. An
+optional NumPy path scores many positions in one vectorised call.
+"""
+from board import ZOBRIST_SIDE
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only evaluate_batch needs it
+    np = None
+
+
+class LineScorer:
+    """
+    Base class for line scorers.
+    
+    Subclasses rate a line by the marks each side has in it; the score is
+    from the point of view of the player owning own_marks.
+    """
+    
+    def line_value(self, own_marks, other_marks, win_length):
+        """
+        Rate one line for a player.
+        
+        Args:
+            own_marks: The player's marks in the line
+            other_marks: The opponent's marks in the line
+            win_length: Length of the line
+            
+        Returns:
+            float: Value of the line for the player
+        """
+        raise NotImplementedError("Subclasses must implement line_value()")
+
+
+class OpenLineScorer(LineScorer):
+    """Counts lines a player has started and the opponent has not blocked."""
+    
+    def line_value(self, own_marks, other_marks, win_length):
+        return 1.0 if own_marks and not other_marks else 0.0
+
+
+class LinePotentialScorer(LineScorer):
+    """
+    Rates unblocked lines exponentially by how filled they are, so one line
+    one move from completion outweighs many barely started ones.
+    """
+    
+    def __init__(self, base=4.0):
+        """
+        Args:
+            base: Growth factor per additional mark in a line
+        """
+        self.base = base
+        
+    def line_value(self, own_marks, other_marks, win_length):
+        if not own_marks or other_marks:
+            return 0.0
+        return self.base ** (own_marks - 1)
+
+
+class ThreatScorer(LineScorer):
+    """Counts threats: unblocked lines one mark away from completion."""
+    
+    def line_value(self, own_marks, other_marks, win_length):
+        return 1.0 if own_marks == win_length - 1 and not other_marks else 0.0
+
+
+DEFAULT_SCORERS = ((LinePotentialScorer(), 1.0), (ThreatScorer(), 4.0))
+
+
+class Evaluator:
+    """
+    Weighted combination of line scorers with incremental line counts.
+    """
+    
+    def __init__(self, scorers=DEFAULT_SCORERS, scale=None):
+        """
+        Args:
+            scorers: Sequence of (LineScorer, weight) pairs
+            scale: Raw score that maps to a normalised score of 0.5; defaults
+                to the weight of one threat-level line of the board scored
+        """
+        self.scorers = tuple(scorers)
+        self.scale = scale
+        # Scale in use for the prepared board shape
+        self._scale = scale
+        self._table = None
+        self._table_key = None
+        self._lines = ()
+        self._lines_of_cell = ()
+        self._x_counts = []
+        self._o_counts = []
+        self._total = 0.0
+        self._key = None
+        
+    def signature(self):
+        """
+        Describe the scorers and weights in a form that is the same in every
+        process, so cached scores are only shared between equal evaluators.
+        
+        Returns:
+            str: Scorer class names, parameters and weights
+        """
+        return ";".join(
+            f"{type(scorer).__name__}{sorted(vars(scorer).items())}*{weight!r}"
+            for scorer, weight in self.scorers
+        ) + f";scale={self.scale!r}"
+        
+    def _prepare(self, board):
+        """Build the lookup tables for the board's size and win length."""
+        key = (board.size, board.win_length)
+        if self._table_key == key:
+            return
+        win_length = board.win_length
+        table = [[0.0] * (win_length + 1) for _ in range(win_length + 1)]
+        for x_marks in range(win_length + 1):
+            for o_marks in range(win_length + 1 - x_marks):
+                value = 0.0
+                for scorer, weight in self.scorers:
+                    value += weight * (
+                        scorer.line_value(x_marks, o_marks, win_length)
+                        - scorer.line_value(o_marks, x_marks, win_length)
+                    )
+                table[x_marks][o_marks] = value
+        # The default scale follows the board shape, like the table
+        self._scale = self.scale if self.scale is not None else max(abs(table[win_length - 1][0]), 1.0)
+        
+        size = board.size
+        lines_of_cell = [[] for _ in range(size * size)]
+        lines = []
+        for line_index, line in enumerate(board.lines):
+            cells = tuple(row * size + col for row, col in line)
+            lines.append(cells)
+            for cell in cells:
+                lines_of_cell[cell].append(line_index)
+        self._lines = tuple(lines)
+        self._lines_of_cell = tuple(tuple(indices) for indices in lines_of_cell)
+        self._table = table
+        self._table_key = key
+        
+    def reset(self, board):
+        """
+        Recount every line of a board from scratch.
+        
+        Args:
+            board: The board to synchronise with
+        """
+        self._prepare(board)
+        grid = board.grid
+        size = board.size
+        x_symbol = board.PLAYER_X
+        o_symbol = board.PLAYER_O
+        table = self._table
+        self._x_counts = x_counts = []
+        self._o_counts = o_counts = []
+        total = 0.0
+        for line in self._lines:
+            x_marks = o_marks = 0
+            for cell in line:
+                symbol = grid[cell // size][cell % size]
+                if symbol == x_symbol:
+                    x_marks += 1
+                elif symbol == o_symbol:
+                    o_marks += 1
+            x_counts.append(x_marks)
+            o_counts.append(o_marks)
+            total += table[x_marks][o_marks]
+        self._total = total
+        self._key = board.hash_key
+        
+    def _update(self, board, row, col, symbol, delta):
+        """Apply one mark being added (delta=1) or removed (delta=-1)."""
+        cell = row * board.size + col
+        previous_key = board.hash_key ^ board.zobrist[2 * cell + (symbol != board.PLAYER_X)] ^ ZOBRIST_SIDE
+        if self._key != previous_key or self._table_key != (board.size, board.win_length):
+            self.reset(board)
+            return
+            
+        counts = self._x_counts if symbol == board.PLAYER_X else self._o_counts
+        x_counts = self._x_counts
+        o_counts = self._o_counts
+        table = self._table
+        total = self._total
+        for line_index in self._lines_of_cell[cell]:
+            total -= table[x_counts[line_index]][o_counts[line_index]]
+            counts[line_index] += delta
+            total += table[x_counts[line_index]][o_counts[line_index]]
+        self._total = total
+        self._key = board.hash_key
+        
+    def push(self, board, row, col, symbol):
+        """
+        Account for a move just made with board.make_move().
+        
+        Args:
+            board: The board the move was made on
+            row: Row of the move
+            col: Column of the move
+            symbol: Symbol that was placed
+        """
+        self._update(board, row, col, symbol, 1)
+        
+    def pop(self, board, row, col, symbol):
+        """
+        Account for a move just undone with board.undo_move().
+        
+        Args:
+            board: The board the move was undone on
+            row: Row of the move
+            col: Column of the move
+            symbol: Symbol that was removed
+        """
+        self._update(board, row, col, symbol, -1)
+        
+    def raw_score(self, board, symbol):
+        """
+        Get the weighted line score of a position.
+        
+        Args:
+            board: The board to score (resynchronised if it does not match
+                the pushed moves)
+            symbol: Player whose point of view the score is from
+            
+        Returns:
+            float: Positive when the position favours symbol
+        """
+        if self._key != board.hash_key or self._table_key != (board.size, board.win_length):
+            self.reset(board)
+        return self._total if symbol == board.PLAYER_X else -self._total
+        
+    def score(self, board, symbol):
+        """
+        Get the line score squashed into the open interval (-1, 1), so it
+        always ranks below a proven win and above a proven loss.
+        
+        Args:
+            board: The board to score
+            symbol: Player whose point of view the score is from
+            
+        Returns:
+            float: Normalised score
+        """
+        raw = self.raw_score(board, symbol)
+        return raw / (abs(raw) + self._scale)
+        
+    def evaluate_batch(self, board, cells, symbol):
+        """
+        Score many positions of the same board shape at once with NumPy.
+        
+        Args:
+            board: Any board with the size and win length of the positions
+            cells: Array-like of shape (positions, size * size) holding 1 for
+                PLAYER_X, -1 for PLAYER_O and 0 for empty cells
+            symbol: Player whose point of view the scores are from
+            
+        Returns:
+            numpy.ndarray: Normalised scores, one per position
+            
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("evaluate_batch requires NumPy (pip install numpy)")
+        self._prepare(board)
+        cells = np.asarray(cells)
+        line_cells = cells[:, np.array(self._lines)]
+        x_marks = (line_cells == 1).sum(axis=2)
+        o_marks = (line_cells == -1).sum(axis=2)
+        raw = np.array(self._table)[x_marks, o_marks].sum(axis=1)
+        if symbol != board.PLAYER_X:
+            raw = -raw
+        return raw / (np.abs(raw) + self._scale)
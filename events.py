@@ -0,0 +1,163 @@
+"""
+Machine-readable game event stream for Tic-Tac-Toe
+
+Games report game_start, move and game_end events to a GameEventLog, which
+writes them as JSON lines from a background thread. Emitting an event only
+appends a tuple to an in-memory buffer, so the game loop never waits on
+serialisation or disk I/O.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+_game_counter = itertools.count(1)
+
+
+def new_game_id():
+    """
+    Create an identifier for a game that is unique across processes.
+
+    Returns:
+        str: Game identifier
+    """
+    return f"{os.getpid()}-{int(time.time())}-{next(_game_counter)}"
+
+
+def describe_player(player):
+    """
+    Summarise a player for game_start events.
+
+    Args:
+        player: A Player instance
+
+    Returns:
+        dict: Name, symbol, player type and difficulty (if any)
+    """
+    return {
+        "name": player.name,
+        "symbol": player.symbol,
+        "type": type(player).__name__,
+        "difficulty": getattr(player, "difficulty", None),
+    }
+
+
+class GameEventLog:
+    """
+    Buffered JSON-lines event writer with size- and time-based flushing
+    and size-based log rotation.
+    """
+
+    # Events serialised per write, which bounds how far a file can overshoot
+    # max_bytes before it is rotated
+    _WRITE_CHUNK = 1000
+
+    def __init__(self, path, flush_events=10000, flush_interval=1.0,
+                 max_bytes=64 * 1024 * 1024, backup_count=5, max_pending=1000000):
+        """
+        Open the log and start the writer thread.
+
+        Args:
+            path: File to append events to
+            flush_events: Wake the writer once this many events are pending
+            flush_interval: Seconds between flushes when the stream is quiet
+            max_bytes: Rotate the file once it grows beyond this size
+                (0 disables rotation)
+            backup_count: Number of rotated files (path.1 ... path.N) to keep
+            max_pending: Events buffered before new ones are dropped instead
+                of stalling the caller
+        """
+        self.path = path
+        self.flush_events = flush_events
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_pending = max_pending
+        self.events_written = 0
+        self.events_dropped = 0
+
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="GameEventLog", daemon=True)
+        self._thread.start()
+
+    def emit(self, event, **fields):
+        """
+        Queue an event without blocking.
+
+        Args:
+            event: Event type, e.g. "game_start", "move" or "game_end"
+            **fields: JSON-serialisable event data
+        """
+        pending = self._pending
+        if len(pending) >= self.max_pending:
+            self.events_dropped += 1
+            return
+        pending.append((time.time(), event, fields))
+        if len(pending) >= self.flush_events:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all pending events now (called from the writer thread or on close)."""
+        pending = self._pending
+        if not pending:
+            return
+        lines = []
+        while pending:
+            timestamp, event, fields = pending.popleft()
+            record = {"ts": timestamp, "event": event}
+            record.update(fields)
+            lines.append(json.dumps(record, ensure_ascii=False))
+            if len(lines) >= self._WRITE_CHUNK:
+                self._write(lines)
+                lines = []
+        if lines:
+            self._write(lines)
+        self._file.flush()
+
+    def _write(self, lines):
+        """Append serialised events and rotate the file once it is too large."""
+        self._file.write("\n".join(lines) + "\n")
+        self.events_written += len(lines)
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """Shift path -> path.1 -> ... -> path.N and start a fresh file."""
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _run(self):
+        """Writer thread: flush on a timer or when woken by a full buffer."""
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Flush remaining events, stop the writer thread and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -2,8 +2,12 @@
 Game class for Tic-Tac-Toe
 """
 import random
+import time
 from board import Board
+from events import describe_player, new_game_id
+from mcts import MCTSPlayer
 from player import HumanPlayer, ComputerPlayer
+from tablebase import load_tablebase
 from ui_utils import print_info, print_success, print_warning, print_error, Colors, colored_text
 
 class TicTacToeGame:
@@ -11,20 +15,74 @@ class TicTacToeGame:
     Main game class that manages the game flow and state.
     """
     
-    def __init__(self):
-        """Initialize a new game instance."""
+    # Difficulty offered in rule variants, played by MCTSPlayer
+    EXPERT = 4
+    
+    def __init__(self, event_log=None, ladder=None, renderer=None, variant=None):
+        """
+        Initialize a new game instance.
+        
+        Args:
+            event_log: Optional GameEventLog that receives game_start, move
+                and game_end events
+            ladder: Optional calibrated difficulty ladder (see
+                tuning.load_ladder) offered instead of the three fixed
+                difficulty levels; a ladder calibrated on another board
+                size or win length is ignored
+            renderer: Optional renderer (see renderer.py) used instead of
+                Board.display, e.g. a DiffRenderer for remote terminals
+            variant: Optional variants.RuleVariant to play instead of the
+                standard rules
+        """
         self.board = None
         self.players = []
         self.current_player_index = 0
         self.vs_computer = True
         self.game_active = False
+        self.event_log = event_log
+        self.ladder = self._matching_ladder(ladder)
+        self.renderer = renderer
+        self.variant = variant
+        self.game_id = None
+        self._game_started_at = 0.0
+        # Computer players of earlier rounds by (difficulty, symbol), reused
+        # when the menu choices repeat
+        self._computers = {}
+        
+    def _matching_ladder(self, ladder):
+        """
+        Get the levels of a ladder calibrated on the standard 3x3 board.
+        
+        Args:
+            ladder: Ladder from tuning.load_ladder, or None
+        
+        Returns:
+            list: Ladder entries, or None if there is no ladder or it was
+            calibrated on another board
+        """
+        if not ladder:
+            return None
+        board = Board()
+        if ladder["size"] != board.size or ladder["win_length"] != board.win_length:
+            print_warning(f"Ignoring the difficulty ladder: it was not calibrated on a "
+                          f"{board.size}x{board.size} board with {board.win_length} in a row.")
+            return None
+        return ladder["levels"]
         
     def setup_game(self):
         """
         Set up a new game by initializing the board and players.
         """
-        # Create a new board
-        self.board = Board()
+        variant = self.variant
+        
+        # Reuse the board from the previous round, or create the first one
+        if self.board is None:
+            self.board = variant.new_board() if variant else Board()
+        else:
+            self.board.reset()
+            
+        if variant:
+            print_info(f"\n{variant.title} rules: {variant.description}.")
         
         # Choose game mode
         self.vs_computer = self._choose_game_mode()
@@ -33,10 +91,31 @@ class TicTacToeGame:
         if self.vs_computer:
             difficulty = self._choose_difficulty()
             player_symbol, computer_symbol = self._choose_symbol()
+            # Endgames are looked up if a tablebase has been generated
+            solved = load_tablebase(self.board.size, self.board.win_length) if not variant else None
             
+            # The variant and ladder are fixed for the session, so the same
+            # choices give the same player; its search state is kept and
+            # only its statistics start over
+            computer = self._computers.get((difficulty, computer_symbol))
+            if computer is not None:
+                computer.reset_stats()
+            # The ladder is calibrated on the standard rules
+            elif self.ladder and not variant:
+                computer = ComputerPlayer.from_config(
+                    computer_symbol, self.ladder[difficulty - 1]["config"], "Computer",
+                    tablebase=solved
+                )
+            elif difficulty == self.EXPERT:
+                computer = MCTSPlayer(computer_symbol, "Computer", variant)
+            else:
+                computer = ComputerPlayer(computer_symbol, difficulty, "Computer", tablebase=solved,
+                                          variant=variant)
+            self._computers[(difficulty, computer_symbol)] = computer
+                
             self.players = [
-                HumanPlayer(player_symbol, "Player"),
-                ComputerPlayer(computer_symbol, difficulty, "Computer")
+                HumanPlayer(player_symbol, "Player", variant),
+                computer
             ]
         else:
             # Human vs Human
@@ -44,46 +123,84 @@ class TicTacToeGame:
             player1_symbol, player2_symbol = self._choose_symbol()
             
             self.players = [
-                HumanPlayer(player1_symbol, "Player 1"),
-                HumanPlayer(player2_symbol, "Player 2")
+                HumanPlayer(player1_symbol, "Player 1", variant),
+                HumanPlayer(player2_symbol, "Player 2", variant)
             ]
         
         # Determine who goes first
-        self.current_player_index = 0 if self._determine_first_player() else 1
+        if variant and variant.x_moves_first:
+            self.current_player_index = 0 if self.players[0].symbol == self.board.PLAYER_X else 1
+            print_info(f"\n{self.players[self.current_player_index].name} ({self.board.PLAYER_X}) goes first!")
+        else:
+            self.current_player_index = 0 if self._determine_first_player() else 1
         
         # Display the initial board
-        self.board.display()
+        self._draw_board()
         
         # Set game as active
         self.game_active = True
+        self._game_started_at = time.perf_counter()
+        
+        if self.event_log:
+            self.game_id = new_game_id()
+            self.event_log.emit(
+                "game_start", game_id=self.game_id, mode="headed",
+                size=self.board.size, win_length=self.board.win_length,
+                variant=variant.name if variant else "standard",
+                players=[describe_player(p) for p in self.players],
+                first_player=self.players[self.current_player_index].name,
+            )
         
     def play(self):
         """
         Main game loop that handles the turns and checks for game end.
         """
+        variant = self.variant
         while self.game_active:
             # Get current player
             current_player = self.players[self.current_player_index]
             
-            # Get and make move
-            row, col = current_player.get_move(self.board)
-            self.board.make_move(row, col, current_player.symbol)
-            self.board.display()
+            # Get and make move; in some variants the player picks the mark
+            move_started_at = time.perf_counter()
+            row, col, *mark = current_player.get_move(self.board)
+            symbol = mark[0] if mark else current_player.symbol
+            self.board.make_move(row, col, symbol)
+            
+            if self.event_log:
+                self.event_log.emit(
+                    "move", game_id=self.game_id, ply=self.board.move_count,
+                    player=current_player.name, symbol=symbol,
+                    row=row, col=col,
+                    think_ms=(time.perf_counter() - move_started_at) * 1000,
+                )
+                
+            self._draw_board()
             
             # Check for winner
-            winner = self.board.check_winner()
+            if variant:
+                winner = variant.winner(self.board, current_player.symbol)
+            else:
+                winner = self.board.check_winner()
             if winner:
                 self._handle_winner(winner)
                 break
                 
             # Check for draw
-            if self.board.is_full():
+            if variant.is_draw(self.board) if variant else self.board.is_full():
                 self._handle_draw()
                 break
                 
             # Switch to next player
             self.current_player_index = (self.current_player_index + 1) % 2
             
+    def _draw_board(self):
+        """Show the board through the configured renderer."""
+        # The renderers draw Board grids; other boards draw themselves
+        if self.renderer and isinstance(self.board, Board):
+            self.renderer.draw(self.board)
+        else:
+            self.board.display()
+            
     def _handle_winner(self, winner_symbol):
         """
         Handle the end of the game when there's a winner.
@@ -108,6 +225,7 @@ class TicTacToeGame:
         else:
             print_success(f"{winner.name} wins! 🏆")
             
+        self._emit_game_end("win", winner.name)
         self.game_active = False
         
     def _handle_draw(self):
@@ -118,8 +236,24 @@ class TicTacToeGame:
         for player in self.players:
             player.update_stats("draw")
             
+        self._emit_game_end("draw", None)
         self.game_active = False
         
+    def _emit_game_end(self, result, winner_name):
+        """
+        Report the end of the game to the event log, if one is attached.
+        
+        Args:
+            result: "win" or "draw"
+            winner_name: Name of the winning player, or None for a draw
+        """
+        if self.event_log:
+            self.event_log.emit(
+                "game_end", game_id=self.game_id, result=result,
+                winner=winner_name, moves=self.board.move_count,
+                duration_ms=(time.perf_counter() - self._game_started_at) * 1000,
+            )
+        
     def _choose_game_mode(self):
         """
         Let the player choose the game mode.
@@ -148,20 +282,51 @@ class TicTacToeGame:
         Let the player choose the difficulty level when playing against computer.
         
         Returns:
-            int: Difficulty level (1-3)
+            int: Difficulty level (1-3, EXPERT in variants, or a level of the
+            calibrated ladder)
         """
+        if self.ladder and not self.variant:
+            return self._choose_ladder_level()
+            
         print_info("\nSelect difficulty level:")
         print("1. Easy (Random moves)")
         print("2. Medium (Blocks winning moves)")
         print("3. Hard (Optimal strategy)")
+        # Variants may be too large to search to the end, where random
+        # playouts help
+        levels = self.EXPERT if self.variant else 3
+        if self.variant:
+            print(f"{self.EXPERT}. Expert (Monte Carlo tree search)")
         
         while True:
             try:
-                difficulty = int(input("Enter difficulty (1-3): ").strip())
-                if 1 <= difficulty <= 3:
+                difficulty = int(input(f"Enter difficulty (1-{levels}): ").strip())
+                if 1 <= difficulty <= levels:
                     return difficulty
                 else:
-                    print("Invalid choice. Please enter a number between 1 and 3.")
+                    print(f"Invalid choice. Please enter a number between 1 and {levels}.")
+            except ValueError:
+                print("Invalid input. Please enter a number.")
+                
+    def _choose_ladder_level(self):
+        """
+        Let the player choose a level from the calibrated difficulty ladder.
+        
+        Returns:
+            int: Ladder level (1 to the number of levels)
+        """
+        levels = len(self.ladder)
+        print_info("\nSelect difficulty level:")
+        for entry in self.ladder:
+            print(f"{entry['level']}. {entry['name']} (Elo {entry['elo']:+.0f})")
+            
+        while True:
+            try:
+                level = int(input(f"Enter difficulty (1-{levels}): ").strip())
+                if 1 <= level <= levels:
+                    return level
+                else:
+                    print(f"Invalid choice. Please enter a number between 1 and {levels}.")
             except ValueError:
                 print("Invalid input. Please enter a number.")
                 
@@ -0,0 +1,382 @@
+"""
+Interned positions for analysis workloads
+
+Millions of recorded games pass through far fewer distinct positions. A
+PositionTable stores each distinct position once - as its X and O cell
+masks and the side to move - and hands out a small integer ID for it, so a
+game becomes a sequence of IDs instead of a sequence of Board objects, and
+per-position annotations (visit counts, results, solved values) live once
+in flat arrays indexed by ID:
+
+    table, games = load_games(sqlite3.connect("results.db"), run_id=1)
+    busiest = max(range(len(table)), key=table.visits.__getitem__)
+    print(table.board(busiest).grid, table.visits[busiest])
+
+With canonical=True positions that are rotations or reflections of each
+other share one ID. The arrays support the buffer protocol, so with NumPy
+an aggregation is one call, e.g. numpy.frombuffer(table.x_wins, "u8") /
+numpy.frombuffer(table.visits, "u8"). A full Board is only built on demand
+by board().
+
+Position keys are exact (the masks themselves, not a hash), so distinct
+positions never share an ID.
+"""
+import argparse
+import math
+import sqlite3
+from array import array
+from analytics import FIRST_X, RESULT_O, RESULT_X, decode_moves
+from analytics_queries import run_filter
+from board import Board
+from tablebase import DRAW, INVALID, WIN
+
+# Per board size, for each symmetry, byte-wise lookup tables mapping the
+# bits of one byte of a cell mask to their permuted positions
+_permutation_tables = {}
+
+
+def _get_permutation_tables(size):
+    """
+    Get the byte-wise mask permutation tables of the eight board symmetries.
+
+    Args:
+        size: Board size
+
+    Returns:
+        tuple: Per symmetry, a tuple of 256-entry tables, one per mask byte
+    """
+    tables = _permutation_tables.get(size)
+    if tables is None:
+        cells = size * size
+        tables = []
+        for permutation in Board.get_symmetries(size):
+            byte_tables = []
+            for start in range(0, cells, 8):
+                table = [0] * 256
+                for value in range(256):
+                    mask = 0
+                    for bit in range(8):
+                        if value >> bit & 1 and start + bit < cells:
+                            mask |= 1 << permutation[start + bit]
+                    table[value] = mask
+                byte_tables.append(tuple(table))
+            tables.append(tuple(byte_tables))
+        tables = _permutation_tables[size] = tuple(tables)
+    return tables
+
+
+def _permute(mask, byte_tables):
+    """Apply one symmetry to a cell mask."""
+    permuted = 0
+    for table in byte_tables:
+        permuted |= table[mask & 255]
+        mask >>= 8
+    return permuted
+
+
+class PositionTable:
+    """
+    Interns positions of one board shape as consecutive integer IDs.
+    """
+
+    def __init__(self, size=3, win_length=None, canonical=True):
+        """
+        Args:
+            size: Board size
+            win_length: Marks in a row needed to win (defaults to size)
+            canonical: Give positions that are rotations or reflections of
+                each other the same ID
+        """
+        self.size = size
+        self.win_length = win_length or size
+        self.canonical = canonical
+        self._cells = size * size
+        self._symmetries = _get_permutation_tables(size)[1:] if canonical else ()
+        # Position key -> ID; the key packs X's mask, O's mask and the side
+        # to move into one int, and the canonical position has the smallest
+        self._ids = {}
+        # Masks wider than 64 bits do not fit an array, so large boards keep
+        # them in lists
+        mask_type = (lambda: array("Q")) if self._cells <= 64 else list
+        self.x_masks = mask_type()
+        self.o_masks = mask_type()
+        self.x_to_move = array("B")
+        # Annotations, one entry per ID
+        self.visits = array("Q")
+        self.x_wins = array("Q")
+        self.o_wins = array("Q")
+        self.values = array("d")
+
+    def __len__(self):
+        """Number of distinct positions."""
+        return len(self.x_to_move)
+
+    def intern(self, x_mask, o_mask, x_to_move):
+        """
+        Get the ID of a position, adding the position if it is new.
+
+        Args:
+            x_mask: X's cells (bit row * size + col)
+            o_mask: O's cells
+            x_to_move: True if X is to move
+
+        Returns:
+            int: Position ID
+        """
+        cells = self._cells
+        exact_key = x_mask | o_mask << cells | x_to_move << 2 * cells
+        position_id = self._ids.get(exact_key)
+        if position_id is not None:
+            return position_id
+
+        key = exact_key
+        for byte_tables in self._symmetries:
+            permuted = (_permute(x_mask, byte_tables) | _permute(o_mask, byte_tables) << cells
+                        | x_to_move << 2 * cells)
+            if permuted < key:
+                key = permuted
+        position_id = self._ids.get(key)
+        # Orientations seen so far are indexed too, so a repeat skips the
+        # symmetry search
+        self._ids[exact_key] = position_id
+        if position_id is None:
+            position_id = self._ids[key] = self._ids[exact_key] = len(self.x_to_move)
+            full = (1 << cells) - 1
+            self.x_masks.append(key & full)
+            self.o_masks.append(key >> cells & full)
+            self.x_to_move.append(x_to_move)
+            self.visits.append(0)
+            self.x_wins.append(0)
+            self.o_wins.append(0)
+            self.values.append(math.nan)
+        return position_id
+
+    def intern_board(self, board, symbol_to_move):
+        """
+        Get the ID of a board position.
+
+        Args:
+            board: Board with this table's size
+            symbol_to_move: Symbol of the side to move
+
+        Returns:
+            int: Position ID
+        """
+        full = (1 << self._cells) - 1
+        o_mask = ~(board.empty_mask | board.x_mask) & full
+        return self.intern(board.x_mask, o_mask, symbol_to_move == board.PLAYER_X)
+
+    def add_game(self, cells, x_first=True, result=None):
+        """
+        Intern every position of a game and count it in the annotations.
+
+        Each position is counted once per game, so visits is the number of
+        games that reached it and x_wins / o_wins how many of those each side
+        won.
+
+        Args:
+            cells: Cell indices in the order they were played
+            x_first: True if X made the first move
+            result: analytics RESULT_X, RESULT_O or RESULT_DRAW, or None if
+                the result is not known
+
+        Returns:
+            array: Position IDs of the game, starting with the empty board,
+            one more than the number of moves
+        """
+        x_mask = o_mask = 0
+        x_to_move = x_first
+        ids = array("I", (self.intern(0, 0, x_to_move),))
+        for cell in cells:
+            if x_to_move:
+                x_mask |= 1 << cell
+            else:
+                o_mask |= 1 << cell
+            x_to_move = not x_to_move
+            ids.append(self.intern(x_mask, o_mask, x_to_move))
+
+        visits = self.visits
+        wins = self.x_wins if result == RESULT_X else self.o_wins if result == RESULT_O else None
+        for position_id in ids:
+            visits[position_id] += 1
+            if wins is not None:
+                wins[position_id] += 1
+        return ids
+
+    def position(self, position_id):
+        """
+        Get a position's masks.
+
+        Args:
+            position_id: ID from intern()
+
+        Returns:
+            tuple: (x_mask, o_mask, x_to_move) of the stored (canonical)
+            position
+        """
+        return self.x_masks[position_id], self.o_masks[position_id], bool(self.x_to_move[position_id])
+
+    def board(self, position_id):
+        """
+        Build a Board for a position.
+
+        Args:
+            position_id: ID from intern()
+
+        Returns:
+            Board: A new board holding the stored (canonical) position
+        """
+        board = Board(size=self.size, win_length=self.win_length)
+        x_mask, o_mask, _ = self.position(position_id)
+        cells = board.cells
+        for marks, symbol in ((x_mask, board.PLAYER_X), (o_mask, board.PLAYER_O)):
+            while marks:
+                lowest = marks & -marks
+                board.make_move(*cells[lowest.bit_length() - 1], symbol)
+                marks ^= lowest
+        return board
+
+    def annotate_values(self, tablebase):
+        """
+        Fill in the solved value of every position the tablebase covers.
+
+        Args:
+            tablebase: Tablebase for this table's board shape
+
+        Returns:
+            int: Number of positions annotated; values holds 1 where X wins
+            with best play, -1 where O wins, 0 for draws and NaN elsewhere
+        """
+        full = (1 << self._cells) - 1
+        values = self.values
+        annotated = 0
+        for position_id in range(len(self)):
+            x_mask, o_mask, x_to_move = self.position(position_id)
+            empty_mask = ~(x_mask | o_mask) & full
+            if bin(empty_mask).count("1") > tablebase.max_empty:
+                continue
+            rank = tablebase.rank(empty_mask, x_mask, x_to_move)
+            if rank is None:
+                continue
+            result = tablebase.code(rank) >> 6
+            if result == INVALID:
+                continue
+            if result == DRAW:
+                values[position_id] = 0
+            else:
+                values[position_id] = 1 if (result == WIN) == x_to_move else -1
+            annotated += 1
+        return annotated
+
+    def memory_bytes(self):
+        """
+        Approximate memory held by the table: the ID index plus the arrays.
+
+        Returns:
+            int: Bytes
+        """
+        arrays = (self.x_masks, self.o_masks, self.x_to_move, self.visits,
+                  self.x_wins, self.o_wins, self.values)
+        total = self._ids.__sizeof__() + 32 * len(self._ids)
+        for values in arrays:
+            if isinstance(values, array):
+                total += values.buffer_info()[1] * values.itemsize
+            else:
+                total += values.__sizeof__() + sum(mask.__sizeof__() for mask in values)
+        return total
+
+
+class GameSequences:
+    """
+    Many games as position IDs, concatenated into one array.
+    """
+
+    def __init__(self):
+        self.ids = array("I")
+        # Game i is ids[offsets[i]:offsets[i + 1]]
+        self.offsets = array("Q", (0,))
+
+    def __len__(self):
+        """Number of games."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """Position IDs of one game."""
+        if not 0 <= index < len(self):
+            raise IndexError("game index out of range")
+        return self.ids[self.offsets[index]:self.offsets[index + 1]]
+
+    def append(self, ids):
+        """
+        Add a game.
+
+        Args:
+            ids: Position IDs of the game
+        """
+        self.ids.extend(ids)
+        self.offsets.append(len(self.ids))
+
+
+def load_games(connection, run_id=None, canonical=True, variant=None):
+    """
+    Intern every game of an analytics database.
+
+    Args:
+        connection: sqlite3 connection to a database written by
+            analytics.AnalyticsSink
+        run_id: Only this run, or None for all runs
+        canonical: Share IDs between symmetric positions
+        variant: Only runs of this rule variant, or None for all runs
+
+    Returns:
+        tuple: (PositionTable, GameSequences) with the games in game_id order
+
+    Raises:
+        ValueError: If the selected runs use different board shapes or
+            rule variants
+    """
+    condition, parameters = run_filter(run_id, variant=variant)
+    shapes = connection.execute(
+        f"SELECT DISTINCT size, win_length, variant FROM runs{condition}", parameters
+    ).fetchall()
+    if len(shapes) > 1:
+        raise ValueError("Runs with different board shapes or rule variants; choose one with run_id or variant")
+    size, win_length = shapes[0][:2] if shapes else (3, 3)
+
+    table = PositionTable(size, win_length, canonical)
+    games = GameSequences()
+    rows = connection.execute(
+        f"SELECT first, result, cells FROM games{condition} ORDER BY game_id", parameters
+    )
+    for first, result, cells in rows:
+        games.append(table.add_game(decode_moves(cells), first == FIRST_X, result))
+    return table, games
+
+
+def main():
+    """Report the distinct and most-visited positions of an analytics database."""
+    parser = argparse.ArgumentParser(description="Intern the positions of recorded Tic-Tac-Toe games.")
+    parser.add_argument("database", help="SQLite file written with --analytics")
+    parser.add_argument("--run", type=int, default=None, help="only this run id")
+    parser.add_argument("--variant", default=None, help="only runs of this rule variant (e.g. standard)")
+    parser.add_argument("--exact", action="store_true", help="do not merge symmetric positions")
+    parser.add_argument("--top", type=int, default=10, help="most-visited positions to show")
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(args.database)
+    table, games = load_games(connection, args.run, canonical=not args.exact, variant=args.variant)
+    connection.close()
+    print(f"{len(games)} games, {len(games.ids)} positions played, {len(table)} distinct "
+          f"({table.memory_bytes() + games.ids.itemsize * len(games.ids)} bytes interned)")
+    busiest = sorted(range(len(table)), key=table.visits.__getitem__, reverse=True)[:args.top]
+    for position_id in busiest:
+        board = table.board(position_id)
+        visits = table.visits[position_id]
+        cells = "".join(board.grid[row][col] for row, col in board.cells)
+        to_move = board.PLAYER_X if table.x_to_move[position_id] else board.PLAYER_O
+        print(f"  {cells} {to_move} to move {visits:>8} games, X won {table.x_wins[position_id] / visits:.1%}, "
+              f"O won {table.o_wins[position_id] / visits:.1%}")
+
+
+if __name__ == "__main__":
+    main()
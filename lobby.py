@@ -0,0 +1,511 @@
+"""
+Network lobby and matchmaking for Tic-Tac-Toe
+
+LobbyServer accepts players on a local network, pairs waiting players and
+fills the gap with a ComputerPlayer bot when nobody else turns up in time.
+After each game both players are offered a rematch on the same connection;
+a player whose opponent leaves or declines goes back to the queue without
+reconnecting, and a waiting player who disconnects leaves the queue at once.
+The server is a single asyncio event loop, so thousands of idle
+connections cost only a socket and a stream buffer each. Queue waits are
+recorded, and match latency percentiles are available through a "stats"
+request.
+
+Protocol: one JSON object per line. Clients send hello (with a name), move
+(with a cell index), rematch (accept true/false) or stats. The server sends
+waiting, match, state, your_turn, invalid, game_over, rematch,
+rematch_declined, opponent_left and stats.
+
+Usage:
+    python lobby.py serve --port 5555 --bot-wait 10
+    python main_oop.py --lobby localhost:5555 --name Alice
+    python lobby.py stats --address localhost:5555
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import time
+from collections import deque
+from board import Board
+from netutil import parse_address, percentile
+from player import ComputerPlayer, HumanPlayer
+from ui_utils import print_error, print_info, print_success, print_warning
+
+_LETTERS = ("X", "O")
+_LATENCY_SAMPLES = 10000
+
+
+class SeatLeft(Exception):
+    """Raised when a player disconnects or sends something unreadable."""
+
+
+class _ClientSeat:
+    """A connected player, as seen by the server."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.name = None
+        self.queued_at = None
+        self.queue_token = 0
+        self.closed = False
+        self.done = asyncio.get_running_loop().create_future()
+        # Task reading the connection while the player waits in the queue
+        self.watcher = None
+
+    async def send(self, message):
+        """Send one message, raising SeatLeft if the connection is gone."""
+        if self.closed:
+            raise SeatLeft(self)
+        try:
+            self.writer.write(json.dumps(message).encode("utf-8") + b"\n")
+            await self.writer.drain()
+        except (ConnectionError, RuntimeError) as error:
+            self.closed = True
+            raise SeatLeft(self) from error
+
+    async def receive(self):
+        """Read one message, raising SeatLeft if the connection is gone."""
+        try:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("connection closed")
+            return json.loads(line)
+        except (ConnectionError, ValueError) as error:
+            self.closed = True
+            raise SeatLeft(self) from error
+
+    async def request_move(self, board):
+        """Ask for a move until a legal one arrives; returns (row, col)."""
+        await self.send({"type": "your_turn"})
+        while True:
+            message = await self.receive()
+            cell = message.get("cell") if message.get("type") == "move" else None
+            if isinstance(cell, int) and 0 <= cell < board.size * board.size:
+                row, col = divmod(cell, board.size)
+                if board.is_valid_move(row, col):
+                    return row, col
+            await self.send({"type": "invalid", "reason": "That cell is not free."})
+
+    async def ask_rematch(self):
+        """Offer a rematch; returns True if the player accepts."""
+        await self.send({"type": "rematch"})
+        message = await self.receive()
+        return message.get("type") == "rematch" and bool(message.get("accept"))
+
+    async def stop_watching(self):
+        """Stop the queue watcher, so a match can read the connection."""
+        watcher, self.watcher = self.watcher, None
+        if watcher is not None:
+            watcher.cancel()
+            try:
+                await watcher
+            except asyncio.CancelledError:
+                pass
+
+    def finish(self):
+        """Release the connection handler waiting on this seat."""
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+class _BotSeat:
+    """A ComputerPlayer filling an empty seat."""
+
+    closed = False
+
+    def __init__(self, difficulty, think_time):
+        self.name = f"Bot ({difficulty})"
+        self.difficulty = difficulty
+        self.think_time = think_time
+        self.player = None
+
+    async def send(self, message):
+        if message.get("type") == "match":
+            board = Board()
+            symbol = board.PLAYER_X if message["symbol"] == "X" else board.PLAYER_O
+            self.player = ComputerPlayer(symbol, self.difficulty, self.name)
+
+    async def request_move(self, board):
+        # The search runs in a worker thread so other matches keep moving,
+        # stops at the think time and is abandoned if the match is cancelled
+        return await self.player.get_move_async(board, timeout=self.think_time)
+
+    async def ask_rematch(self):
+        return True
+
+    async def stop_watching(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+class LobbyServer:
+    """
+    Asyncio matchmaking server.
+    """
+
+    def __init__(self, host="0.0.0.0", port=5555, bot_wait=10.0, bot_difficulty=2, bot_think_time=2.0):
+        """
+        Args:
+            host: Interface to listen on
+            port: TCP port
+            bot_wait: Seconds a player waits for a human opponent before a
+                bot takes the seat (None never adds bots)
+            bot_difficulty: Difficulty of bot opponents (1-3)
+            bot_think_time: Seconds a bot may search per move, capping the
+                CPU time a bot match costs the server
+        """
+        self.host = host
+        self.port = port
+        self.bot_wait = bot_wait
+        self.bot_difficulty = bot_difficulty
+        self.bot_think_time = bot_think_time
+        self._waiting = deque()
+        self._server = None
+        self._matches = set()
+        self._handlers = {}
+        self._latencies = deque(maxlen=_LATENCY_SAMPLES)
+        self.connections_open = 0
+        self.connections_total = 0
+        self.matches_started = 0
+        self.bot_matches = 0
+        self.rematches = 0
+
+    async def start(self):
+        """Start listening; returns once the socket is bound."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start (if needed) and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting players, end running matches and disconnect everyone."""
+        if self._server:
+            self._server.close()
+        for task in list(self._matches):
+            task.cancel()
+        for seat in list(self._handlers):
+            seat.finish()
+        await asyncio.gather(*self._matches, *self._handlers.values(), return_exceptions=True)
+        if self._server:
+            await self._server.wait_closed()
+
+    def stats(self):
+        """
+        Get lobby metrics.
+
+        Returns:
+            dict: Connection and match counters plus percentiles (in ms) of
+            the time players waited in the queue before being matched
+        """
+        latencies = sorted(self._latencies)
+        return {
+            "connections_open": self.connections_open,
+            "connections_total": self.connections_total,
+            "waiting": sum(1 for seat in self._waiting if not seat.closed),
+            "matches_started": self.matches_started,
+            "bot_matches": self.bot_matches,
+            "rematches": self.rematches,
+            "match_latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(latencies, 0.50) * 1000,
+                "p90": percentile(latencies, 0.90) * 1000,
+                "p99": percentile(latencies, 0.99) * 1000,
+                "max": (latencies[-1] if latencies else 0.0) * 1000,
+            },
+        }
+
+    async def _handle_client(self, reader, writer):
+        """Connection handler: greet, queue and wait until the player leaves."""
+        self.connections_open += 1
+        self.connections_total += 1
+        seat = _ClientSeat(reader, writer)
+        self._handlers[seat] = asyncio.current_task()
+        try:
+            hello = await seat.receive()
+            if hello.get("type") == "stats":
+                await seat.send({"type": "stats", **self.stats()})
+                return
+            seat.name = str(hello.get("name") or f"Player {self.connections_total}")[:32]
+            await self._enqueue(seat)
+            await seat.done
+        except SeatLeft:
+            pass
+        finally:
+            seat.closed = True
+            if seat.watcher is not None:
+                seat.watcher.cancel()
+            del self._handlers[seat]
+            self.connections_open -= 1
+            writer.close()
+
+    async def _enqueue(self, seat):
+        """Pair a player with a waiting one, or queue them (and maybe call a bot)."""
+        while self._waiting:
+            opponent = self._waiting.popleft()
+            if not opponent.closed:
+                self._start_match([opponent, seat])
+                return
+        seat.queued_at = time.perf_counter()
+        seat.queue_token += 1
+        self._waiting.append(seat)
+        await seat.send({"type": "waiting"})
+        seat.watcher = asyncio.create_task(self._watch_queued(seat))
+        if self.bot_wait is not None:
+            asyncio.get_running_loop().call_later(
+                self.bot_wait, self._fill_with_bot, seat, seat.queue_token
+            )
+
+    async def _watch_queued(self, seat):
+        """Drop a waiting player from the queue as soon as they disconnect."""
+        # Nothing is expected from a waiting player, so only the end of the
+        # connection matters; stop_watching() cancels this once matched
+        try:
+            while await seat.reader.readline():
+                pass
+        except (ConnectionError, ValueError):
+            pass
+        seat.closed = True
+        seat.watcher = None
+        if seat in self._waiting:
+            self._waiting.remove(seat)
+        seat.finish()
+
+    def _fill_with_bot(self, seat, token):
+        """Give a player who is still waiting a bot opponent."""
+        if seat.closed or seat.queue_token != token or seat not in self._waiting:
+            return
+        self._waiting.remove(seat)
+        self.bot_matches += 1
+        self._start_match([seat, _BotSeat(self.bot_difficulty, self.bot_think_time)])
+
+    def _start_match(self, seats):
+        """Record queue latency and run the match as its own task."""
+        now = time.perf_counter()
+        for seat in seats:
+            if getattr(seat, "queued_at", None) is not None:
+                self._latencies.append(now - seat.queued_at)
+                seat.queued_at = None
+        random.shuffle(seats)
+        self.matches_started += 1
+        task = asyncio.create_task(self._run_match(seats))
+        self._matches.add(task)
+        task.add_done_callback(self._matches.discard)
+
+    async def _run_match(self, seats):
+        """Play games between two seats until one of them stops."""
+        requeued = []
+        try:
+            for seat in seats:
+                await seat.stop_watching()
+            first = random.randrange(2)
+            games = 0
+            while True:
+                try:
+                    for index, seat in enumerate(seats):
+                        await seat.send({
+                            "type": "match", "opponent": seats[1 - index].name,
+                            "symbol": _LETTERS[index], "first": index == first, "game": games + 1,
+                        })
+                    await self._play_game(seats, first)
+                    games += 1
+                    answers = await asyncio.gather(*(seat.ask_rematch() for seat in seats),
+                                                   return_exceptions=True)
+                    declined = any(answer is False for answer in answers)
+                    for seat, answer in zip(seats, answers):
+                        if isinstance(answer, SeatLeft):
+                            for other in seats:
+                                if other is not seat and not other.closed:
+                                    await other.send({"type": "opponent_left"})
+                except SeatLeft as left:
+                    declined = False
+                    answers = [seat is not left.args[0] and not seat.closed for seat in seats]
+                    for seat in seats:
+                        if seat is not left.args[0]:
+                            try:
+                                await seat.send({"type": "opponent_left"})
+                            except SeatLeft:
+                                answers = [False, False]
+                answers = [answer is True for answer in answers]
+                if all(answers):
+                    self.rematches += 1
+                    first ^= 1
+                    continue
+                break
+
+            # Players who wanted to go on return to the queue on the same
+            # connection, told first if their opponent said no
+            for seat, answer in zip(seats, answers):
+                if isinstance(seat, _ClientSeat) and answer and not seat.closed:
+                    try:
+                        if declined:
+                            await seat.send({"type": "rematch_declined"})
+                        await self._enqueue(seat)
+                        requeued.append(seat)
+                    except SeatLeft:
+                        pass
+        finally:
+            # Everyone else is released, also when the match fails or is
+            # cancelled, so no connection handler waits forever
+            for seat in seats:
+                if seat not in requeued:
+                    seat.finish()
+
+    async def _play_game(self, seats, first):
+        """Play one game; raises SeatLeft if a player disconnects."""
+        board = Board()
+        symbols = (board.PLAYER_X, board.PLAYER_O)
+        index = first
+        while True:
+            row, col = await seats[index].request_move(board)
+            board.make_move(row, col, symbols[index])
+            winner = board.check_winner()
+            over = winner is not None or board.is_full()
+            state = {
+                "type": "state",
+                "cells": "".join(
+                    "X" if cell == board.PLAYER_X else "O" if cell == board.PLAYER_O else "."
+                    for grid_row in board.grid for cell in grid_row
+                ),
+                "last": row * board.size + col,
+                "to_move": None if over else _LETTERS[1 - index],
+            }
+            for seat in seats:
+                await seat.send(state)
+            if over:
+                result = None if winner is None else _LETTERS[symbols.index(winner)]
+                for seat in seats:
+                    await seat.send({"type": "game_over", "winner": result})
+                return result
+            index ^= 1
+
+
+def _load_cells(board, cells):
+    """Set a local board to the position in a state message."""
+    board.reset()
+    for index, letter in enumerate(cells):
+        if letter != ".":
+            board.make_move(*divmod(index, board.size), board.PLAYER_X if letter == "X" else board.PLAYER_O)
+
+
+def play_online(address, name, ask_rematch):
+    """
+    Play in a lobby from the terminal.
+
+    Args:
+        address: "host:port" of the lobby
+        name: Name shown to opponents
+        ask_rematch: Callable returning True if the player wants another game
+    """
+    host, port = parse_address(address)
+    with socket.create_connection((host, port)) as connection:
+        stream = connection.makefile("rwb")
+
+        def send(message):
+            stream.write(json.dumps(message).encode("utf-8") + b"\n")
+            stream.flush()
+
+        send({"type": "hello", "name": name})
+        board = Board()
+        player = None
+        for line in stream:
+            message = json.loads(line)
+            kind = message["type"]
+            if kind == "waiting":
+                print_info("Waiting for an opponent...")
+            elif kind == "match":
+                board.reset()
+                symbol = board.PLAYER_X if message["symbol"] == "X" else board.PLAYER_O
+                if player is None:
+                    player = HumanPlayer(symbol, name)
+                player.symbol = symbol
+                print_info(f"\nGame {message['game']} against {message['opponent']}: you play {symbol}.")
+                print_info("You go first!" if message["first"] else f"{message['opponent']} goes first.")
+                board.display()
+            elif kind == "state":
+                _load_cells(board, message["cells"])
+                board.display()
+            elif kind == "your_turn":
+                row, col = player.get_move(board)
+                send({"type": "move", "cell": row * board.size + col})
+            elif kind == "invalid":
+                print_warning(message["reason"])
+            elif kind == "game_over":
+                winner = message["winner"]
+                if winner is None:
+                    print_warning("It's a draw! The board is full. 🤝")
+                    player.update_stats("draw")
+                elif (winner == "X") == (player.symbol == board.PLAYER_X):
+                    print_success("Congratulations! You won! 🏆")
+                    player.update_stats("win")
+                else:
+                    print_error("Your opponent won! Better luck next time. 😞")
+                    player.update_stats("loss")
+                player.display_stats()
+            elif kind == "rematch":
+                send({"type": "rematch", "accept": ask_rematch()})
+            elif kind == "rematch_declined":
+                print_warning("Your opponent declined the rematch; back to the queue.")
+            elif kind == "opponent_left":
+                print_warning("Your opponent left the lobby.")
+        print_success("\nThanks for playing! Goodbye! 👋")
+
+
+def fetch_stats(address):
+    """
+    Ask a running lobby for its metrics.
+
+    Args:
+        address: "host:port" of the lobby
+
+    Returns:
+        dict: The server's stats() output
+    """
+    host, port = parse_address(address)
+    with socket.create_connection((host, port)) as connection:
+        stream = connection.makefile("rwb")
+        stream.write(b'{"type": "stats"}\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def main():
+    """Command-line entry point for running a lobby or querying it."""
+    parser = argparse.ArgumentParser(description="Tic-Tac-Toe network lobby.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run a lobby server")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=5555)
+    serve.add_argument("--bot-wait", type=float, default=10.0,
+                       help="seconds before a waiting player gets a bot (negative: never)")
+    serve.add_argument("--bot-difficulty", type=int, default=2, choices=(1, 2, 3))
+    serve.add_argument("--bot-think-time", type=float, default=2.0,
+                       help="seconds a bot may search per move")
+    stats = commands.add_parser("stats", help="print a running lobby's metrics")
+    stats.add_argument("--address", default="localhost:5555")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(fetch_stats(args.address), indent=2))
+        return
+
+    server = LobbyServer(args.host, args.port, None if args.bot_wait < 0 else args.bot_wait,
+                         args.bot_difficulty, args.bot_think_time)
+    print(f"Lobby listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,131 @@
 """
 Main module for the Tic-Tac-Toe game (Object-Oriented version)
 """
+import argparse
 from ascii_art import display_title
+from board import Board
+from events import GameEventLog
 from game import TicTacToeGame
+from lobby import play_online
+from mcts import MCTSPlayer
+from player import ComputerPlayer, HumanPlayer
+from profiling import PhaseProfiler, add_profile_arguments, finish_session
+from renderer import DiffRenderer
+from tuning import DEFAULT_LADDER_PATH, load_ladder
+from ultimate import UltimateBoard
 from ui_utils import print_info, print_success, colored_text, Colors
+from variants import VARIANTS, get_variant
 
 def main():
     """Main function to run the game."""
+    parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe in the terminal.")
+    parser.add_argument("--event-log", default=None,
+                        help="append machine-readable JSON-lines game events to this file")
+    parser.add_argument("--ladder", default=DEFAULT_LADDER_PATH,
+                        help="calibrated difficulty ladder from tuning.py (used if the file exists)")
+    parser.add_argument("--diff-render", action="store_true",
+                        help="keep the board at the top of the screen and redraw only changed cells")
+    parser.add_argument("--lobby", default=None, metavar="HOST:PORT",
+                        help="play against other people (or bots) in a network lobby (see lobby.py)")
+    parser.add_argument("--name", default="Player", help="name shown to lobby opponents")
+    parser.add_argument("--variant", default="standard", choices=sorted(VARIANTS),
+                        help="rule variant to play (see variants.py)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.lobby:
+        display_title()
+        play_online(args.lobby, args.name, ask_play_again)
+        return
+    
+    event_log = GameEventLog(args.event_log) if args.event_log else None
+    renderer = DiffRenderer() if args.diff_render else None
+    profiler = None
+    if args.profile:
+        profiler = PhaseProfiler(args.profile_stats)
+        instrument_game(profiler)
+        profiler.start_session()
+    try:
+        run_session(event_log, load_ladder(args.ladder), renderer, profiler, get_variant(args.variant))
+    finally:
+        if renderer:
+            renderer.close()
+        if event_log:
+            event_log.close()
+        if profiler:
+            finish_session(profiler, args.profile_export)
+            
+def instrument_game(profiler):
+    """
+    Time the phases of every turn of the object-oriented game.
+    
+    Args:
+        profiler: PhaseProfiler collecting the timings
+    """
+    profiler.instrument(TicTacToeGame, "setup_game", "setup")
+    profiler.instrument(HumanPlayer, "get_move", "input")
+    profiler.instrument(ComputerPlayer, "get_move", "search")
+    profiler.instrument(MCTSPlayer, "get_move", "search")
+    profiler.instrument(TicTacToeGame, "_draw_board", "render")
+    profiler.instrument(Board, "check_winner", "check_winner")
+    profiler.instrument(UltimateBoard, "check_winner", "check_winner")
+    
+def run_session(event_log=None, ladder=None, renderer=None, profiler=None, variant=None):
+    """
+    Play games until the player declines another round.
+    
+    Args:
+        event_log: Optional GameEventLog receiving every game's events
+        ladder: Optional calibrated difficulty ladder for computer opponents
+        renderer: Optional board renderer (see renderer.py)
+        profiler: Optional PhaseProfiler; a breakdown is printed after each game
+        variant: Optional variants.RuleVariant to play instead of the
+            standard rules
+    """
     # Display title
     display_title()
     
     # Main program loop
     play_again = True
-    game = TicTacToeGame()
+    game = TicTacToeGame(event_log, ladder, renderer, variant)
     
     while play_again:
         # Setup and play a new game
+        if profiler:
+            profiler.start_game()
         game.setup_game()
         game.play()
+        if profiler:
+            report = profiler.end_game()
+            print(PhaseProfiler.format_breakdown(f"Profile: game {len(profiler.games)}", report))
         
         # Display statistics
         game.display_stats()
         
         # Ask if the player wants to play again
-        print_info("\n------------------------")
-        print_info("Want to challenge your skills again?")
-        
-        while True:
-            choice = input(f"Do you want to play again? ({colored_text('yes', Colors.GREEN)}/{colored_text('no', Colors.RED)}): ").strip().lower()
-            if choice == 'yes' or choice == 'y':
-                print_success("Great! Let's play another round!")
-                break
-            elif choice == 'no' or choice == 'n':
-                play_again = False
-                print_success("\nThanks for playing! Goodbye! 👋")
-                break
-            else:
-                print(f"{colored_text('Invalid input.', Colors.RED)} Please enter 'yes' or 'no'.")
+        play_again = ask_play_again()
+        if not play_again:
+            print_success("\nThanks for playing! Goodbye! 👋")
+            
+def ask_play_again():
+    """
+    Ask whether the player wants another round (a rematch in a lobby).
+    
+    Returns:
+        bool: True to play again
+    """
+    print_info("\n------------------------")
+    print_info("Want to challenge your skills again?")
+    
+    while True:
+        choice = input(f"Do you want to play again? ({colored_text('yes', Colors.GREEN)}/{colored_text('no', Colors.RED)}): ").strip().lower()
+        if choice == 'yes' or choice == 'y':
+            print_success("Great! Let's play another round!")
+            return True
+        elif choice == 'no' or choice == 'n':
+            return False
+        else:
+            print(f"{colored_text('Invalid input.', Colors.RED)} Please enter 'yes' or 'no'.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Monte Carlo tree search player
+
+MCTSPlayer picks moves by playing many random games from the current
+position and growing a search tree towards the moves that win them most
+often (UCT: upper confidence bounds applied to trees). It needs no
+evaluation function, which suits games whose positions are hard to score,
+such as Ultimate Tic-Tac-Toe, and it plays every rule variant through the
+same hooks as ComputerPlayer (see variants.py). Without a variant it plays
+the standard rules.
+
+All playouts make and undo moves on the one board passed in, so the search
+allocates tree nodes but never copies boards.
+"""
+import math
+import random
+import time
+from player import Player
+from ui_utils import print_info
+from variants import StandardRules
+
+
+class _Node:
+    """One position in the search tree, reached by its move."""
+
+    __slots__ = ("move", "mover", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, mover, parent, untried):
+        # The move that leads here, made by mover
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        # Moves not expanded yet (empty when the game is over here)
+        self.untried = untried
+        self.visits = 0
+        # Playout results from mover's point of view: 1 a win, 0.5 a draw
+        self.wins = 0.0
+
+
+class MCTSPlayer(Player):
+    """
+    Computer player using Monte Carlo tree search.
+    """
+
+    __slots__ = ("iterations", "time_limit", "exploration", "playouts", "_rng", "_standard_rules")
+
+    def __init__(self, symbol, name="MCTS", variant=None, iterations=2000, time_limit=None,
+                 exploration=1.4, seed=None):
+        """
+        Args:
+            symbol: The player's symbol
+            name: The player's name
+            variant: Optional variants.RuleVariant to play by
+            iterations: Playouts per move
+            time_limit: Optional seconds per move; the search stops when
+                either limit is reached
+            exploration: UCT exploration constant; higher values try
+                rarely visited moves more often
+            seed: Optional random seed for reproducible play
+        """
+        super().__init__(symbol, name, variant)
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        # Playouts run by this player, for benchmarks
+        self.playouts = 0
+        self._rng = random.Random(seed)
+        self._standard_rules = None
+
+    def get_move(self, board):
+        """
+        Get the player's move, announcing it on the console.
+
+        Args:
+            board: The current game board
+
+        Returns:
+            tuple: (row, col) position of the move, or (row, col, mark) in
+            a variant where players may place either mark
+        """
+        print_info(f"{self.name}'s turn (thinking...)")
+        return self.choose_move(board)
+
+    def _rules(self, board):
+        """Get the variant to play by, the standard rules if there is none."""
+        if self.variant is not None:
+            return self.variant
+        rules = self._standard_rules
+        if rules is None or rules.size != board.size or rules.win_length != board.win_length:
+            rules = self._standard_rules = StandardRules(board.size, board.win_length)
+        return rules
+
+    def choose_move(self, board):
+        """
+        Pick a move by Monte Carlo tree search, without printing anything.
+
+        Args:
+            board: The current game board (left unchanged)
+
+        Returns:
+            tuple: (row, col) position of the move, or (row, col, mark) in
+            a variant where players may place either mark; None if the game
+            is already over
+        """
+        rules = self._rules(board)
+        opponent = rules.opponent(board, self.symbol)
+        if rules.winner(board, opponent) is not None or rules.is_draw(board):
+            return None
+        rng = self._rng
+        root = _Node(None, opponent, None, rules.moves(board, self.symbol))
+        rng.shuffle(root.untried)
+        log = math.log
+        sqrt = math.sqrt
+        exploration = self.exploration
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+
+        for iteration in range(self.iterations):
+            if deadline is not None and not iteration & 15 and time.perf_counter() >= deadline:
+                break
+            node = root
+            path = []
+
+            # Selection: descend through fully expanded nodes by UCT
+            while not node.untried and node.children:
+                scale = exploration * sqrt(log(node.visits))
+                best_value = -1.0
+                for child in node.children:
+                    value = child.wins / child.visits + scale / sqrt(child.visits)
+                    if value > best_value:
+                        best_value = value
+                        node = child
+                row, col, mark = node.move
+                board.make_move(row, col, mark)
+                path.append(node.move)
+
+            # Expansion: add one untried move, unless the game is over here
+            winner = None
+            finished = False
+            if node.untried:
+                move = node.untried.pop()
+                mover = rules.opponent(board, node.mover)
+                board.make_move(move[0], move[1], move[2])
+                path.append(move)
+                winner = rules.winner(board, mover)
+                finished = winner is not None or rules.is_draw(board)
+                untried = [] if finished else rules.moves(board, rules.opponent(board, mover))
+                rng.shuffle(untried)
+                child = _Node(move, mover, node, untried)
+                node.children.append(child)
+                node = child
+            elif node is not root:
+                winner = rules.winner(board, node.mover)
+                finished = True
+
+            # Simulation: random moves to the end of the game
+            if not finished:
+                mover = node.mover
+                while True:
+                    mover = rules.opponent(board, mover)
+                    move = rng.choice(rules.moves(board, mover))
+                    board.make_move(move[0], move[1], move[2])
+                    path.append(move)
+                    winner = rules.winner(board, mover)
+                    if winner is not None or rules.is_draw(board):
+                        break
+
+            # Undo every move of this iteration, newest first
+            for move in reversed(path):
+                board.undo_move(move[0], move[1])
+
+            # Backpropagation
+            while node is not None:
+                node.visits += 1
+                if winner is None:
+                    node.wins += 0.5
+                elif winner == node.mover:
+                    node.wins += 1.0
+                node = node.parent
+            self.playouts += 1
+
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda child: child.visits)
+        return best.move if rules.free_marks else best.move[:2]
@@ -0,0 +1,34 @@
+"""
+Small helpers shared by the network servers (lobby.py, service.py)
+"""
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction (0.99 for p99)
+
+    Returns:
+        The value at that rank, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def parse_address(address):
+    """
+    Split a "host:port" address.
+
+    Args:
+        address: "host:port", or ":port" for localhost
+
+    Returns:
+        tuple: (host, port)
+    """
+    host, _, port = address.rpartition(":")
+    return host or "localhost", int(port)
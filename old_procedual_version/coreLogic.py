@@ -184,6 +184,34 @@ def make_move(board, row, col, symbol):
     board[row][col] = symbol
     return board
 
+# Every line of the board: rows, columns, then the two diagonals
+LINES = (
+    ((0, 0), (0, 1), (0, 2)), ((1, 0), (1, 1), (1, 2)), ((2, 0), (2, 1), (2, 2)),
+    ((0, 0), (1, 0), (2, 0)), ((0, 1), (1, 1), (2, 1)), ((0, 2), (1, 2), (2, 2)),
+    ((0, 0), (1, 1), (2, 2)), ((0, 2), (1, 1), (2, 0)),
+)
+
+def winning_cells(board, symbol):
+    """
+    Lazily yields the empty cells where symbol would complete a line, as (row, col).
+    Each line's marks are counted in place, without copying the board, and the scan
+    stops as soon as the caller has what it needs.
+    """
+    for line in LINES:
+        marks = 0
+        gap = None
+        for row, col in line:
+            cell = board[row][col]
+            if cell == symbol:
+                marks += 1
+            elif cell == EMPTY and gap is None:
+                gap = (row, col)
+            else:
+                break
+        else:
+            if marks == 2 and gap is not None:
+                yield gap
+
 def check_winner(board):
     """
     Checks if there is a winner on the board.
@@ -289,29 +317,16 @@ def computer_move_medium(board, player_symbol):
     Medium difficulty: Computer blocks player's winning moves or makes winning moves when possible.
     If no winning opportunity exists, makes a random move.
     """
-    # First check if computer can win in the next move
-    for row in range(3):
-        for col in range(3):
-            if board[row][col] == EMPTY:
-                # Try this position and see if computer would win
-                board_copy = [row[:] for row in board]  # Create a deep copy to avoid modifying original
-                board_copy[row][col] = PLAYER_X if player_symbol == PLAYER_O else PLAYER_O
-                
-                # If this move results in a win, choose it
-                if check_winner(board_copy) == (PLAYER_X if player_symbol == PLAYER_O else PLAYER_O):
-                    return row, col
+    computer_symbol = PLAYER_X if player_symbol == PLAYER_O else PLAYER_O
     
-    # Next, check if player could win in their next move and block it
-    for row in range(3):
-        for col in range(3):
-            if board[row][col] == EMPTY:
-                # Try this position and see if player would win
-                board_copy = [row[:] for row in board]  # Create a deep copy
-                board_copy[row][col] = player_symbol
-                
-                # If this move would let player win, block it
-                if check_winner(board_copy) == player_symbol:
-                    return row, col
+    # First check if computer can win in the next move, then if the player
+    # could and must be blocked; each scan stops at its first hit
+    winning_cell = next(winning_cells(board, computer_symbol), None)
+    if winning_cell:
+        return winning_cell
+    blocking_cell = next(winning_cells(board, player_symbol), None)
+    if blocking_cell:
+        return blocking_cell
     
     # If no winning move to make or block, prefer center position
     if board[1][1] == EMPTY:
@@ -330,8 +345,10 @@ def computer_move_hard(board, computer_symbol, player_symbol):
     """
     Hard difficulty: Computer uses minimax algorithm with alpha-beta pruning to find optimal move.
     """
-    # Check if center is available - often a good first move
-    if board[1][1] == EMPTY:
+    # In the opening the center is always a good move; later a free center
+    # can be a blunder, so the search decides
+    marks = sum(cell != EMPTY for row in board for cell in row)
+    if marks <= 1 and board[1][1] == EMPTY:
         return 1, 1
     
     best_score = float('-inf')
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 
@@ -5,30 +6,68 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from ascii_art import display_title
+from old_procedual_version import startGame
 from old_procedual_version.startGame import play_game
+from profiling import PhaseProfiler, add_profile_arguments, finish_session
 from ui_utils import print_info, print_success, colored_text, Colors
 
-# Display title
-display_title()
+def instrument_game(profiler):
+    """
+    Time the phases of every turn of the procedural game.
+    
+    startGame imports the core logic functions into its own namespace, so
+    they are replaced there; the minimax search keeps calling the
+    uninstrumented functions in coreLogic.
+    """
+    profiler.instrument(startGame, "setup_game", "setup")
+    profiler.instrument(startGame, "validate_move", "input")
+    profiler.instrument(startGame, "computer_move", "search")
+    profiler.instrument(startGame, "display_board", "render")
+    profiler.instrument(startGame, "check_winner", "check_winner")
 
-# Main program loop
-play_again = True
-while play_again:
-    play_game()
+def main():
+    parser = argparse.ArgumentParser(description="Play the procedural version of Tic-Tac-Toe.")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
     
-    # Ask if the player wants to play again
-    print_info("\n------------------------")
-    print_info("Want to challenge your skills again?")
+    profiler = None
+    if args.profile:
+        profiler = PhaseProfiler(args.profile_stats)
+        instrument_game(profiler)
+        profiler.start_session()
     
-    while True:
-        choice = input(f"Do you want to play again? ({colored_text('yes', Colors.GREEN)}/{colored_text('no', Colors.RED)}): ").strip().lower()
-        if choice == 'yes' or choice == 'y':
-            print_success("Great! Let's play another round!")
-            break
-        elif choice == 'no' or choice == 'n':
-            play_again = False
-            print_success("\nThanks for playing! Goodbye! 👋")
-            break
-        else:
-            print(f"{colored_text('Invalid input.', Colors.RED)} Please enter 'yes' or 'no'.")
+    try:
+        # Display title
+        display_title()
+        
+        # Main program loop
+        play_again = True
+        while play_again:
+            if profiler:
+                profiler.start_game()
+            play_game()
+            if profiler:
+                report = profiler.end_game()
+                print(PhaseProfiler.format_breakdown(f"Profile: game {len(profiler.games)}", report))
+            
+            # Ask if the player wants to play again
+            print_info("\n------------------------")
+            print_info("Want to challenge your skills again?")
+            
+            while True:
+                choice = input(f"Do you want to play again? ({colored_text('yes', Colors.GREEN)}/{colored_text('no', Colors.RED)}): ").strip().lower()
+                if choice == 'yes' or choice == 'y':
+                    print_success("Great! Let's play another round!")
+                    break
+                elif choice == 'no' or choice == 'n':
+                    play_again = False
+                    print_success("\nThanks for playing! Goodbye! 👋")
+                    break
+                else:
+                    print(f"{colored_text('Invalid input.', Colors.RED)} Please enter 'yes' or 'no'.")
+    finally:
+        if profiler:
+            finish_session(profiler, args.profile_export)
 
+if __name__ == "__main__":
+    main()
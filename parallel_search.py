@@ -0,0 +1,152 @@
+"""
+Parallel root-split search for the hard computer player
+
+The root moves of a hard-difficulty search are independent minimax calls,
+so they can be spread over a process pool. The first root move is searched
+on its own (Young Brothers Wait) to establish a bound, then its siblings
+are searched in parallel. Workers publish every improved root score through
+a shared value, and later searches start from the best score found so far.
+
+Each sibling is searched with a window just below the shared bound, so any
+move that can tie or beat the best score is scored exactly. The chosen move
+is therefore the same one the sequential search picks.
+
+Searches with the same worker count share one pool and its bound, so
+they take turns: a second thread searching at the same time waits until
+the first one has collected its results.
+
+Give the player a transposition.SharedTranspositionTable to let all workers
+reuse each other's results; an in-process table would be copied to every
+task instead of shared.
+"""
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import transposition
+
+# Lower bound of the window each sibling is searched with, relative to the
+# shared best score. Any positive margin keeps ties exact.
+_TIE_MARGIN = 1
+
+_pools = {}
+_pools_lock = threading.Lock()
+_shared_alpha = None
+
+
+def _init_worker(shared_alpha, stats_lock):
+    """
+    Process pool initializer: keep a handle to the shared root bound and
+    share the transposition statistics lock.
+    """
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+    transposition.init_worker(stats_lock)
+
+
+def _score_root_move(player, board, move, opponent_symbol):
+    """
+    Score one root move in a worker process.
+
+    Args:
+        player: The ComputerPlayer doing the search
+        board: Root board (a private copy in this process)
+        move: (row, col) root move to score
+        opponent_symbol: Symbol of the opponent
+
+    Returns:
+        Score of the move, exact when it can tie or beat the best root score
+    """
+    alpha = _shared_alpha.value - _TIE_MARGIN
+    row, col = move
+    board.make_move(row, col, player.symbol)
+    score = player._minimax(board, 0, False, player.symbol, opponent_symbol, alpha)
+    board.undo_move(row, col)
+    if player.transposition_table is not None:
+        player.transposition_table.flush_metrics()
+
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return score
+
+
+def _get_pool(workers):
+    """
+    Get (or start) the process pool for a worker count.
+
+    Args:
+        workers: Number of worker processes
+
+    Returns:
+        tuple: (executor, shared_alpha, lock), where the lock is held by
+        the search currently using the pool
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            shared_alpha = multiprocessing.Value("d", float("-inf"))
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(shared_alpha, transposition.stats_lock()),
+            )
+            pool = _pools[workers] = (executor, shared_alpha, threading.Lock())
+    return pool
+
+
+def shutdown_pools():
+    """Stop all worker processes started by parallel searches."""
+    for executor, _, _ in _pools.values():
+        executor.shutdown()
+    _pools.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+def parallel_root_search(player, board, opponent_symbol, workers):
+    """
+    Find the best root move by splitting the root moves across processes.
+
+    Args:
+        player: The ComputerPlayer doing the search
+        board: The current game board (left unchanged)
+        opponent_symbol: Symbol of the opponent
+        workers: Number of worker processes
+
+    Returns:
+        tuple: (best_move, best_score), or (None, -inf) if there are no moves
+    """
+    moves = board.get_empty_positions()
+    if not moves:
+        return None, float("-inf")
+
+    # Eldest brother first: searched alone with the full window
+    first_row, first_col = moves[0]
+    board.make_move(first_row, first_col, player.symbol)
+    first_score = player._minimax(board, 0, False, player.symbol, opponent_symbol)
+    board.undo_move(first_row, first_col)
+
+    best_move, best_score = moves[0], first_score
+    siblings = moves[1:]
+    if not siblings:
+        return best_move, best_score
+
+    executor, shared_alpha, search_lock = _get_pool(workers)
+    # The shared bound belongs to one search at a time
+    with search_lock:
+        with shared_alpha.get_lock():
+            shared_alpha.value = first_score
+
+        futures = [
+            executor.submit(_score_root_move, player, board, move, opponent_symbol)
+            for move in siblings
+        ]
+        # Keep the first move with the highest score, exactly as the
+        # sequential root loop does
+        for move, future in zip(siblings, futures):
+            score = future.result()
+            if score > best_score:
+                best_score = score
+                best_move = move
+    return best_move, best_score
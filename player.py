@@ -1,7 +1,16 @@
 """
 Player classes for Tic-Tac-Toe game
 """
+import asyncio
+import math
 import random
+import zlib
+from cancellation import CancellationToken, DeadlineExceeded
+from evaluation import Evaluator, LinePotentialScorer, OpenLineScorer, ThreatScorer
+from parallel_search import parallel_root_search
+from tablebase import DRAW, WIN
+from threats import find_forced_win
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, UNLIMITED_DEPTH, TranspositionTable
 from ui_utils import print_info
 
 class Player:
@@ -9,16 +18,21 @@ class Player:
     Base class for all player types in the game.
     """
     
-    def __init__(self, symbol, name="Player"):
+    __slots__ = ("symbol", "name", "variant", "wins", "losses", "draws")
+    
+    def __init__(self, symbol, name="Player", variant=None):
         """
         Initialize a player.
         
         Args:
             symbol: The player's symbol (X or O)
             name: The player's name
+            variant: Optional variants.RuleVariant the player plays by
+                (None for the standard rules)
         """
         self.symbol = symbol
         self.name = name
+        self.variant = variant
         self.wins = 0
         self.losses = 0
         self.draws = 0
@@ -32,7 +46,8 @@ class Player:
             board: The current game board
             
         Returns:
-            tuple: (row, col) position of the move
+            tuple: (row, col) position of the move, or (row, col, mark) in a
+            variant where players may place either mark
         """
         raise NotImplementedError("Subclasses must implement get_move()")
         
@@ -50,6 +65,12 @@ class Player:
         else:  # Draw
             self.draws += 1
             
+    def reset_stats(self):
+        """Clear the player's statistics, e.g. before reusing it for another game."""
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+            
     def display_stats(self):
         """Display the player's statistics."""
         print(f"{self.name} stats: Wins: {self.wins}, Losses: {self.losses}, Draws: {self.draws}")
@@ -60,10 +81,28 @@ class HumanPlayer(Player):
     Human player that gets moves from user input.
     """
     
+    __slots__ = ()
+    
     def get_move(self, board):
         """
         Get move from human player via console input.
         
+        Args:
+            board: The current game board
+            
+        Returns:
+            tuple: (row, col) position of the move, plus the chosen mark in a
+            variant where players may place either mark
+        """
+        row, col = self._ask_position(board)
+        if self.variant is not None and self.variant.free_marks:
+            return row, col, self._ask_mark(board)
+        return row, col
+        
+    def _ask_position(self, board):
+        """
+        Ask for an empty position by its number.
+        
         Args:
             board: The current game board
             
@@ -72,15 +111,16 @@ class HumanPlayer(Player):
         """
         max_attempts = 5
         attempts = 0
+        last = len(board.positions)
         
         print_info(f"{self.name}'s turn!")
         
         while attempts < max_attempts:
             try:
-                move_str = input("Enter a number between 1-9: ").strip()
+                move_str = input(f"Enter a number between 1-{last}: ").strip()
                 
                 if not move_str:
-                    print("No input detected. Please enter a number between 1 and 9.")
+                    print(f"No input detected. Please enter a number between 1 and {last}.")
                     attempts += 1
                     continue
                 
@@ -91,14 +131,14 @@ class HumanPlayer(Player):
                     attempts += 1
                     continue
                 
-                if move < 1 or move > 9:
-                    print("Invalid input! Please enter a number between 1 and 9.")
+                if move < 1 or move > last:
+                    print(f"Invalid input! Please enter a number between 1 and {last}.")
                     attempts += 1
                     continue
                 
                 # Get position from move number
                 if move not in board.positions:
-                    print("Invalid position! Please enter a number between 1 and 9.")
+                    print(f"Invalid position! Please enter a number between 1 and {last}.")
                     attempts += 1
                     continue
                 
@@ -119,17 +159,35 @@ class HumanPlayer(Player):
         print("Too many invalid attempts. Please try one more time carefully.")
         while True:
             try:
-                move = int(input("Enter a number between 1-9 (for an empty position): "))
-                if 1 <= move <= 9:
+                move = int(input(f"Enter a number between 1-{last} (for an empty position): "))
+                if 1 <= move <= last:
                     row, col = board.positions[move]
                     if board.is_valid_move(row, col):
                         return row, col
                     else:
                         print("Position already taken. Try another one.")
                 else:
-                    print("Invalid number. Please enter 1-9.")
+                    print(f"Invalid number. Please enter 1-{last}.")
             except ValueError:
                 print("Please enter a valid number.")
+                
+    def _ask_mark(self, board):
+        """
+        Ask which mark to place, for variants where either may be placed.
+        
+        Args:
+            board: The current game board
+            
+        Returns:
+            The chosen symbol (PLAYER_X or PLAYER_O)
+        """
+        while True:
+            choice = input(f"Place which mark? X ({board.PLAYER_X}) or O ({board.PLAYER_O}): ").strip().upper()
+            if choice == 'X':
+                return board.PLAYER_X
+            elif choice == 'O':
+                return board.PLAYER_O
+            print(f"Invalid choice '{choice}'. Please enter either 'X' or 'O'.")
 
 
 class ComputerPlayer(Player):
@@ -137,7 +195,27 @@ class ComputerPlayer(Player):
     Computer player with different difficulty levels.
     """
     
-    def __init__(self, symbol, difficulty=1, name="Computer"):
+    __slots__ = ("difficulty", "threat_search", "workers", "max_depth", "evaluator", "noise",
+                 "transposition_table", "tablebase", "use_pvs", "nodes", "_table_salt", "_last_score",
+                 "_token", "_progress", "_best_so_far")
+    
+    # Scorers that configuration dictionaries can weight by name
+    SCORERS = {
+        "open": OpenLineScorer,
+        "potential": LinePotentialScorer,
+        "threat": ThreatScorer,
+    }
+    
+    # Nodes between two checks of a search's cancellation token
+    CANCEL_CHECK_INTERVAL = 256
+    
+    # Half-width of the root aspiration window. Below 1, so a window around
+    # an exact win, loss or draw score admits only that score.
+    ASPIRATION_WINDOW = 0.5
+    
+    def __init__(self, symbol, difficulty=1, name="Computer", threat_search=False, workers=1,
+                 max_depth=None, evaluator=None, noise=0.0, transposition_table=None,
+                 tablebase=None, use_pvs=True, variant=None):
         """
         Initialize computer player.
         
@@ -145,9 +223,109 @@ class ComputerPlayer(Player):
             symbol: The computer's symbol
             difficulty: 1=Easy, 2=Medium, 3=Hard
             name: The computer's name
+            threat_search: Look for forced wins with threat-space search
+                before Medium's one-move scan or Hard's full search (a
+                depth-limited Hard always does)
+            workers: Number of processes Hard splits its root moves across
+                (1 searches in this process)
+            max_depth: Plies Hard looks ahead, counting its own move, before
+                scoring positions heuristically (None searches to the end)
+            evaluator: Evaluator scoring positions at the depth limit
+                (defaults to evaluation.Evaluator() when max_depth is set)
+            noise: Probability of playing a random move instead, used to
+                grade strength between the fixed difficulty levels
+            transposition_table: Optional transposition.TranspositionTable or
+                SharedTranspositionTable that Hard caches search results in;
+                a shared table is also used by every worker process
+            tablebase: Optional tablebase.Tablebase that Hard looks up
+                endgame positions in instead of searching them
+            use_pvs: Search with principal variation search and root
+                aspiration windows (False searches every move with a full
+                alpha-beta window, for comparison)
+            variant: Optional variants.RuleVariant to play by. Variants are
+                searched with a generic alpha-beta search in this process
+                (workers, tablebase, threat search and PVS only apply to the
+                standard rules), to the variant's default depth unless
+                max_depth is given.
         """
-        super().__init__(symbol, name)
+        super().__init__(symbol, name, variant)
         self.difficulty = difficulty
+        self.threat_search = threat_search
+        self.workers = workers
+        if max_depth is None and variant is not None:
+            max_depth = variant.default_max_depth
+        self.max_depth = max_depth
+        if evaluator is None and max_depth is not None:
+            evaluator = Evaluator()
+        self.evaluator = evaluator
+        self.noise = noise
+        self.transposition_table = transposition_table
+        self.tablebase = tablebase
+        self.use_pvs = use_pvs
+        # _minimax calls made by this player, for comparing search variants
+        self.nodes = 0
+        # Root score of the previous hard search, the next aspiration guess
+        self._last_score = None
+        # Cancellation token, progress callback and best root move of the
+        # running cancellable search (see choose_move_cancellable)
+        self._token = None
+        self._progress = None
+        self._best_so_far = None
+        # Set by each search for the board it searches (see _search_salt)
+        self._table_salt = None
+        
+    def __getstate__(self):
+        """
+        Pickle the player, e.g. for parallel search workers, without the
+        running search's cancellation token, progress callback and best
+        move so far; they only mean something in this process (and the
+        token's event cannot be pickled).
+        """
+        state = {
+            name: getattr(self, name)
+            for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ())
+            if hasattr(self, name)
+        }
+        state.update(_token=None, _progress=None, _best_so_far=None)
+        return state
+        
+    def __setstate__(self, state):
+        """Restore a pickled player."""
+        for name, value in state.items():
+            setattr(self, name, value)
+        
+    @classmethod
+    def from_config(cls, symbol, config, name="Computer", transposition_table=None, tablebase=None):
+        """
+        Build a computer player from a configuration dictionary, as stored
+        in a calibrated difficulty ladder.
+        
+        Args:
+            symbol: The computer's symbol
+            config: dict with optional keys difficulty, max_depth, noise,
+                threat_search and weights (scorer name -> weight, see SCORERS)
+            name: The computer's name
+            transposition_table: Optional table for Hard to cache results in
+            tablebase: Optional endgame tablebase for Hard
+            
+        Returns:
+            ComputerPlayer: The configured player
+        """
+        evaluator = None
+        if config.get("weights"):
+            evaluator = Evaluator(tuple(
+                (cls.SCORERS[scorer](), weight)
+                for scorer, weight in sorted(config["weights"].items())
+            ))
+        return cls(
+            symbol, config.get("difficulty", 3), name,
+            threat_search=config.get("threat_search", False),
+            max_depth=config.get("max_depth"),
+            evaluator=evaluator,
+            noise=config.get("noise", 0.0),
+            transposition_table=transposition_table,
+            tablebase=tablebase,
+        )
         
     def get_move(self, board):
         """
@@ -160,7 +338,106 @@ class ComputerPlayer(Player):
             tuple: (row, col) position of the move
         """
         print_info(f"{self.name}'s turn (thinking...)")
+        return self.choose_move(board)
+        
+    async def get_move_async(self, board, timeout=None, token=None, progress=None, executor=None):
+        """
+        Get the computer's move without blocking the event loop.
+        
+        The search runs on a copy of the board in an executor. If the
+        awaiting task is cancelled (e.g. the client disconnected), the
+        search is stopped as well.
+        
+        Args:
+            board: The current game board (not modified)
+            timeout: Seconds the search may take; when they are up the best
+                move found so far is played
+            token: Optional CancellationToken to stop the search from
+                elsewhere; its deadline applies if timeout is not given
+            progress: Optional callable receiving a dict (move, score,
+                searched, total, nodes) on the event loop whenever the
+                hard search finds a better root move
+            executor: Executor to search in (defaults to the loop's)
+            
+        Returns:
+            tuple: (row, col) position of the move
+            
+        Raises:
+            SearchCancelled: If the token was cancelled
+        """
+        loop = asyncio.get_running_loop()
+        if token is None:
+            token = CancellationToken(timeout)
+        elif timeout is not None:
+            token.deadline = CancellationToken(timeout).deadline
+        report = None
+        if progress is not None:
+            def report(update):
+                loop.call_soon_threadsafe(progress, update)
+        search = loop.run_in_executor(executor, self.choose_move_cancellable, board.get_copy(), token, report)
+        try:
+            return await search
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+            
+    def choose_move_cancellable(self, board, token, progress=None):
+        """
+        Pick a move like choose_move, checking a cancellation token during
+        the search. With workers > 1 only the first root move is searched
+        in this process, so the token cannot stop the other workers.
+        
+        Args:
+            board: The current game board (not modified)
+            token: CancellationToken checked every CANCEL_CHECK_INTERVAL nodes
+            progress: Optional callable receiving a dict (move, score,
+                searched, total, nodes) whenever the hard search finds a
+                better root move
+            
+        Returns:
+            tuple: (row, col) of the best move, or of the best one found so
+            far if the deadline passed (the medium move if no root move had
+            been scored yet)
+            
+        Raises:
+            SearchCancelled: If the token was cancelled
+        """
+        self._token = token
+        self._progress = progress
+        self._best_so_far = None
+        try:
+            # An interrupted search leaves its moves on the board, so it
+            # searches a copy
+            return self.choose_move(board.get_copy())
+        except DeadlineExceeded:
+            if self._best_so_far is not None:
+                return self._best_so_far[1]
+            if self.variant is not None:
+                return self._get_variant_move(board, 2)
+            return self._get_medium_move(board)
+        finally:
+            self._token = None
+            self._progress = None
+            
+    def choose_move(self, board):
+        """
+        Pick a move for the difficulty level without printing anything,
+        for headless simulations.
         
+        Args:
+            board: The current game board
+            
+        Returns:
+            tuple: (row, col) position of the move, or (row, col, mark) in
+            a variant where players may place either mark
+        """
+        if self.variant is not None:
+            difficulty = 1 if self.noise and random.random() < self.noise else self.difficulty
+            return self._get_variant_move(board, difficulty)
+            
+        if self.noise and random.random() < self.noise:
+            return self._get_easy_move(board)
+            
         if self.difficulty == 1:
             return self._get_easy_move(board)
         elif self.difficulty == 2:
@@ -168,6 +445,25 @@ class ComputerPlayer(Player):
         else:  # difficulty == 3
             return self._get_hard_move(board)
             
+    def evaluate(self, board):
+        """
+        Score the position for this player, to move, with the hard search
+        (standard rules only), whatever the difficulty level.
+        
+        Args:
+            board: The current game board (left unchanged)
+        
+        Returns:
+            tuple: (score, move) with the best move. Wins score
+            _win_score(board) minus the plies after the first move until the
+            game is won, losses the negative of that and draws 0; scores
+            strictly between -1 and 1 are heuristic, from a search that
+            stopped at max_depth. (-inf, None) if there is no move.
+        """
+        opponent_symbol = board.PLAYER_X if self.symbol == board.PLAYER_O else board.PLAYER_O
+        self._table_salt = self._search_salt(board)
+        return self._search_root(board, opponent_symbol)
+        
     def _get_easy_move(self, board):
         """
         Easy difficulty: Make a random move.
@@ -196,21 +492,19 @@ class ComputerPlayer(Player):
         """
         opponent_symbol = board.PLAYER_X if self.symbol == board.PLAYER_O else board.PLAYER_O
         
-        # First, check if computer can win in the next move
-        for row, col in board.get_empty_positions():
-            board_copy = board.get_copy()
-            board_copy.make_move(row, col, self.symbol)
-            
-            if board_copy.check_winner() == self.symbol:
-                return row, col
-                
-        # Next, check if opponent can win in the next move and block it
-        for row, col in board.get_empty_positions():
-            board_copy = board.get_copy()
-            board_copy.make_move(row, col, opponent_symbol)
-            
-            if board_copy.check_winner() == opponent_symbol:
-                return row, col
+        if self.threat_search:
+            forced_win = find_forced_win(board, self.symbol)
+            if forced_win:
+                return forced_win
+        
+        # First, check if computer can win in the next move, then if the
+        # opponent can and must be blocked; each scan stops at its first hit
+        winning_cell = next(board.winning_cells(self.symbol), None)
+        if winning_cell:
+            return winning_cell
+        blocking_cell = next(board.winning_cells(opponent_symbol), None)
+        if blocking_cell:
+            return blocking_cell
                 
         # If no winning moves, prefer center
         if board.is_valid_move(1, 1):
@@ -236,33 +530,169 @@ class ComputerPlayer(Player):
         Returns:
             tuple: (row, col) position of the move
         """
-        # Check if center is available (often a good first move)
-        if board.is_valid_move(1, 1):
-            return 1, 1
+        # Endgames solved ahead of time need no search at all
+        if self.tablebase is not None:
+            solved_move = self.tablebase.best_move(board, self.symbol)
+            if solved_move:
+                return solved_move
+                
+        # A forced win made of consecutive threats is found far faster by
+        # threat-space search than by the minimax below, but not always the
+        # fastest one, so a full-depth search only uses it when asked to; a
+        # depth-limited search may not see the win at all
+        if self.threat_search or self.max_depth is not None:
+            forced_win = find_forced_win(board, self.symbol)
+            if forced_win:
+                return forced_win
+            
+        # In the opening the center is always a good move; later a free
+        # center can be a blunder, so the search decides
+        center = board.size // 2
+        if board.move_count <= 1 and board.is_valid_move(center, center):
+            return center, center
             
         opponent_symbol = board.PLAYER_X if self.symbol == board.PLAYER_O else board.PLAYER_O
+        self._table_salt = self._search_salt(board)
+        
+        if self.workers > 1:
+            best_move, _ = parallel_root_search(self, board, opponent_symbol, self.workers)
+            return best_move if best_move else self._get_easy_move(board)
+            
+        if not self.use_pvs:
+            best_score, best_move = self._search_root(board, opponent_symbol)
+            return best_move if best_move else self._get_easy_move(board)
+            
+        # Aspiration: expect the score of the previous search, whose outcome
+        # is now two plies nearer, and widen to the full window only if the
+        # result falls outside
+        guess = 0 if self._last_score is None else self._score_to_table(self._last_score, 2)
+        alpha = guess - self.ASPIRATION_WINDOW
+        beta = guess + self.ASPIRATION_WINDOW
+        best_score, best_move = self._search_root(board, opponent_symbol, alpha, beta)
+        if not alpha < best_score < beta:
+            best_score, best_move = self._search_root(board, opponent_symbol)
+        self._last_score = best_score
+        return best_move if best_move else self._get_easy_move(board)
         
+    def _search_root(self, board, opponent_symbol, alpha=float('-inf'), beta=float('inf')):
+        """
+        Score the root moves and pick the first one with the highest score.
+        
+        With use_pvs, the first move is searched with the window and every
+        later one with a null window that only tells whether it beats the
+        best score so far; moves that do are searched again for their exact
+        score. Without it every move gets the full window.
+        
+        Args:
+            board: The current game board (left unchanged)
+            opponent_symbol: Symbol of the opponent
+            alpha: Lower bound of the root window
+            beta: Upper bound of the root window
+            
+        Returns:
+            tuple: (best_score, best_move). The score is exact if it lies
+            inside the window and a bound otherwise.
+        """
         best_score = float('-inf')
         best_move = None
         
         # Try all possible moves and evaluate them
-        for row, col in board.get_empty_positions():
-            board_copy = board.get_copy()
-            board_copy.make_move(row, col, self.symbol)
+        moves = board.get_empty_positions()
+        for searched, (row, col) in enumerate(moves, 1):
+            board.make_move(row, col, self.symbol)
             
             # Use minimax to evaluate this move
-            score = self._minimax(board_copy, 0, False, self.symbol, opponent_symbol)
+            if best_move is None or not self.use_pvs:
+                score = self._minimax(board, 0, False, self.symbol, opponent_symbol, alpha, beta)
+            else:
+                bound = max(alpha, best_score)
+                score = self._minimax(board, 0, False, self.symbol, opponent_symbol,
+                                      bound, math.nextafter(bound, math.inf))
+                if bound < score < beta:
+                    score = self._minimax(board, 0, False, self.symbol, opponent_symbol, bound, beta)
+            board.undo_move(row, col)
             
             if score > best_score:
                 best_score = score
                 best_move = (row, col)
+                # A score at or below alpha only bounds the move from above
+                self._note_best_move(best_move, score if score > alpha else float('-inf'),
+                                     searched, len(moves))
+            if best_score >= beta:
+                break
                 
-        return best_move if best_move else self._get_easy_move(board)
+        return best_score, best_move
+        
+    def _note_best_move(self, move, score, searched, total):
+        """
+        Remember the best root move found so far by a cancellable search
+        and report it.
+        
+        Args:
+            move: (row, col) of the move
+            score: Its score, or -inf if only an upper bound is known
+            searched: Root moves searched so far in this pass
+            total: Root moves in this pass
+        """
+        if self._best_so_far is not None and score <= self._best_so_far[0]:
+            return
+        self._best_so_far = (score, move)
+        if self._progress:
+            self._progress({"move": move, "score": score, "searched": searched,
+                            "total": total, "nodes": self.nodes})
+        
+    def _search_salt(self, board):
+        """
+        Key component that keeps cached scores of different searches apart.
+        
+        Scores depend on whose point of view they take, on the evaluator
+        scoring the depth limit and on the board's size and win length (the
+        same marks can be a win with three in a row and nothing with four),
+        so searches that differ in any of them must not share table entries.
+        Either player may have started the game, so the side to move is not
+        implied by the marks and is keyed separately. The values are the
+        same in every process.
+        
+        Args:
+            board: The board about to be searched
+            
+        Returns:
+            tuple: 64-bit values XORed into the key of positions where the
+            opponent (index 0) or the computer (index 1) is to move
+        """
+        evaluation = self.evaluator.signature() if self.max_depth is not None else "exact"
+        if self.variant is not None:
+            evaluation = f"{self.variant.name}|{evaluation}"
+        evaluation = f"{board.size}x{board.win_length}|{evaluation}"
+        return tuple(
+            (zlib.crc32(f"{self.symbol}|{to_move}|{evaluation}".encode("utf-8")) * 0x9E3779B97F4A7C15)
+            & 0xFFFFFFFFFFFFFFFF
+            for to_move in ("opponent", "computer")
+        )
+        
+    @staticmethod
+    def _win_score(board):
+        """
+        Score awarded for a win found at depth 0.
+        
+        It is one more than the number of cells, so a win stays positive at
+        any depth; on the classic 3x3 board this is the familiar 10.
+        
+        Args:
+            board: The board being searched
+            
+        Returns:
+            int: Base score for a win
+        """
+        return board.size * board.size + 1
         
     def _minimax(self, board, depth, is_maximizing, comp_symbol, player_symbol, alpha=float('-inf'), beta=float('inf')):
         """
         Minimax algorithm with alpha-beta pruning for optimal move finding.
         
+        Moves are made and undone in place on the given board, so the board
+        is left unchanged when the call returns.
+        
         Args:
             board: Current board state
             depth: Current search depth
@@ -275,28 +705,92 @@ class ComputerPlayer(Player):
         Returns:
             int: Score of the current board state
         """
+        self.nodes += 1
+        if self._token is not None and not self.nodes % self.CANCEL_CHECK_INTERVAL:
+            self._token.check()
+        
         # Check terminal states
         winner = board.check_winner()
         
         if winner == comp_symbol:
-            return 10 - depth  # Computer wins
+            return self._win_score(board) - depth  # Computer wins
         elif winner == player_symbol:
-            return depth - 10  # Player wins
+            return depth - self._win_score(board)  # Player wins
         elif board.is_full():
             return 0  # Draw
             
+        # Look up solved endgames; their exact scores also beat heuristics
+        # at the depth limit
+        if self.tablebase is not None:
+            solved = self.tablebase.probe(board, comp_symbol if is_maximizing else player_symbol)
+            if solved is not None:
+                result, distance = solved
+                if result == DRAW:
+                    return 0
+                score = self._win_score(board) - depth - distance
+                return score if (result == WIN) == is_maximizing else -score
+            
+        # Depth-limited search: score the position heuristically. The score
+        # lies in (-1, 1), so proven wins and losses always outrank it.
+        evaluator = None
+        if self.max_depth is not None:
+            if depth + 1 >= self.max_depth:
+                return self.evaluator.score(board, comp_symbol)
+            evaluator = self.evaluator
+            
+        # Reuse the result of an earlier search of this position if it went
+        # at least as deep, or at least narrows the window
+        table = self.transposition_table
+        if table is not None:
+            remaining = UNLIMITED_DEPTH
+            if self.max_depth is not None:
+                remaining = min(self.max_depth - depth - 1, UNLIMITED_DEPTH - 1)
+            key = board.hash_key ^ self._table_salt[is_maximizing]
+            entry = table.probe(key)
+            if entry is not None and entry[1] >= remaining:
+                value = self._score_from_table(entry[0], depth)
+                flag = entry[2]
+                if flag == EXACT:
+                    return value
+                elif flag == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return value
+            alpha_start, beta_start = alpha, beta
+            
+        # Principal variation search: after the first move, a null window
+        # only proves that a move is no better than the best so far, which is
+        # cheaper than scoring it; the rare move that is better is searched
+        # again with the full window
+        pvs = self.use_pvs
         if is_maximizing:
             # Computer's turn
             best_score = float('-inf')
             
-            for row, col in board.get_empty_positions():
-                board_copy = board.get_copy()
-                board_copy.make_move(row, col, comp_symbol)
-                
-                score = self._minimax(
-                    board_copy, depth + 1, False, 
-                    comp_symbol, player_symbol, alpha, beta
-                )
+            for row, col in board.iter_empty_positions():
+                board.make_move(row, col, comp_symbol)
+                if evaluator:
+                    evaluator.push(board, row, col, comp_symbol)
+                if pvs and best_score != float('-inf'):
+                    score = self._minimax(
+                        board, depth + 1, False,
+                        comp_symbol, player_symbol, alpha, math.nextafter(alpha, math.inf)
+                    )
+                    if alpha < score < beta:
+                        score = self._minimax(
+                            board, depth + 1, False,
+                            comp_symbol, player_symbol, alpha, beta
+                        )
+                else:
+                    score = self._minimax(
+                        board, depth + 1, False, 
+                        comp_symbol, player_symbol, alpha, beta
+                    )
+                board.undo_move(row, col)
+                if evaluator:
+                    evaluator.pop(board, row, col, comp_symbol)
                 
                 best_score = max(score, best_score)
                 alpha = max(alpha, best_score)
@@ -304,20 +798,32 @@ class ComputerPlayer(Player):
                 # Alpha-beta pruning
                 if beta <= alpha:
                     break
-                    
-            return best_score
         else:
             # Player's turn
             best_score = float('inf')
             
-            for row, col in board.get_empty_positions():
-                board_copy = board.get_copy()
-                board_copy.make_move(row, col, player_symbol)
-                
-                score = self._minimax(
-                    board_copy, depth + 1, True, 
-                    comp_symbol, player_symbol, alpha, beta
-                )
+            for row, col in board.iter_empty_positions():
+                board.make_move(row, col, player_symbol)
+                if evaluator:
+                    evaluator.push(board, row, col, player_symbol)
+                if pvs and best_score != float('inf'):
+                    score = self._minimax(
+                        board, depth + 1, True,
+                        comp_symbol, player_symbol, math.nextafter(beta, -math.inf), beta
+                    )
+                    if alpha < score < beta:
+                        score = self._minimax(
+                            board, depth + 1, True,
+                            comp_symbol, player_symbol, alpha, beta
+                        )
+                else:
+                    score = self._minimax(
+                        board, depth + 1, True, 
+                        comp_symbol, player_symbol, alpha, beta
+                    )
+                board.undo_move(row, col)
+                if evaluator:
+                    evaluator.pop(board, row, col, player_symbol)
                 
                 best_score = min(score, best_score)
                 beta = min(beta, best_score)
@@ -326,4 +832,230 @@ class ComputerPlayer(Player):
                 if beta <= alpha:
                     break
                     
-            return best_score
\ No newline at end of file
+        if table is not None:
+            if best_score <= alpha_start:
+                flag = UPPER_BOUND
+            elif best_score >= beta_start:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            table.store(key, self._score_to_table(best_score, depth), remaining, flag)
+        return best_score
+        
+    def _get_variant_move(self, board, difficulty):
+        """
+        Pick a move under the player's rule variant.
+        
+        Easy plays a random legal move, Medium wins at once if it can and
+        otherwise avoids moves that let the opponent win at once, and Hard
+        searches with alpha-beta.
+        
+        Args:
+            board: The current game board
+            difficulty: 1=Easy, 2=Medium, 3=Hard
+            
+        Returns:
+            tuple: (row, col) of the move, or (row, col, mark) if the
+            variant lets players place either mark
+        """
+        variant = self.variant
+        moves = variant.moves(board, self.symbol)
+        if difficulty > 1:
+            opponent_symbol = variant.opponent(board, self.symbol)
+            move = self._find_variant_move(board, difficulty, moves, opponent_symbol)
+        else:
+            move = random.choice(moves)
+        return move if variant.free_marks else move[:2]
+        
+    def _find_variant_move(self, board, difficulty, moves, opponent_symbol):
+        """
+        Pick a Medium or Hard move under the player's rule variant.
+        
+        Args:
+            board: The current game board
+            difficulty: 2=Medium, 3=Hard
+            moves: The player's legal (row, col, mark) moves
+            opponent_symbol: Symbol of the opponent
+            
+        Returns:
+            tuple: (row, col, mark) of the move
+        """
+        variant = self.variant
+        for row, col, mark in moves:
+            board.make_move(row, col, mark)
+            winner = variant.winner(board, self.symbol)
+            board.undo_move(row, col)
+            if winner == self.symbol:
+                return row, col, mark
+                
+        if difficulty >= 3:
+            self._table_salt = self._search_salt(board)
+            best_move = self._search_variant_root(board, moves, opponent_symbol)
+            return best_move if best_move else random.choice(moves)
+            
+        safe_moves = []
+        for row, col, mark in moves:
+            board.make_move(row, col, mark)
+            winner = variant.winner(board, self.symbol)
+            if winner is None and not variant.is_draw(board):
+                for reply_row, reply_col, reply_mark in variant.moves(board, opponent_symbol):
+                    board.make_move(reply_row, reply_col, reply_mark)
+                    winner = variant.winner(board, opponent_symbol)
+                    board.undo_move(reply_row, reply_col)
+                    if winner == opponent_symbol:
+                        break
+            board.undo_move(row, col)
+            if winner != opponent_symbol:
+                safe_moves.append((row, col, mark))
+        return random.choice(safe_moves or moves)
+        
+    def _search_variant_root(self, board, moves, opponent_symbol):
+        """
+        Score the root moves under the player's rule variant and pick the
+        first one with the highest score.
+        
+        Args:
+            board: The current game board (left unchanged)
+            moves: The player's legal (row, col, mark) moves
+            opponent_symbol: Symbol of the opponent
+            
+        Returns:
+            tuple: (row, col, mark) of the best move, or None if there are
+            no moves
+        """
+        # Variant positions recur through many move orders, so a search
+        # without a configured table still caches them for this move
+        table = self.transposition_table
+        if table is None:
+            table = TranspositionTable()
+        variant = self.variant
+        alpha = float('-inf')
+        best_move = None
+        for searched, (row, col, mark) in enumerate(moves, 1):
+            board.make_move(row, col, mark)
+            winner = variant.winner(board, self.symbol)
+            if winner is not None:
+                score = self._win_score(board) if winner == self.symbol else -self._win_score(board)
+            elif variant.is_draw(board):
+                score = 0
+            else:
+                score = -self._variant_search(board, 1, opponent_symbol, self.symbol,
+                                              float('-inf'), -alpha, table)
+            board.undo_move(row, col)
+            if score > alpha:
+                alpha = score
+                best_move = (row, col, mark)
+                self._note_best_move(best_move, score, searched, len(moves))
+        return best_move
+        
+    def _variant_search(self, board, depth, to_move, waiting, alpha, beta, table):
+        """
+        Negamax search with alpha-beta pruning under the player's rule
+        variant, for positions whose game is not over.
+        
+        Args:
+            board: Current board state (left unchanged)
+            depth: Plies played since the root
+            to_move: Symbol of the player to move
+            waiting: Symbol of the other player
+            alpha: Alpha value for pruning
+            beta: Beta value for pruning
+            table: Transposition table caching the results
+            
+        Returns:
+            Score of the position from the point of view of to_move
+        """
+        self.nodes += 1
+        if self._token is not None and not self.nodes % self.CANCEL_CHECK_INTERVAL:
+            self._token.check()
+            
+        variant = self.variant
+        if self.max_depth is not None and depth >= self.max_depth:
+            return variant.evaluate(board, to_move)
+            
+        remaining = UNLIMITED_DEPTH
+        if self.max_depth is not None:
+            remaining = min(self.max_depth - depth, UNLIMITED_DEPTH - 1)
+        key = board.hash_key ^ self._table_salt[to_move == self.symbol]
+        entry = table.probe(key)
+        if entry is not None and entry[1] >= remaining:
+            value = self._score_from_table(entry[0], depth)
+            flag = entry[2]
+            if flag == EXACT:
+                return value
+            elif flag == LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if beta <= alpha:
+                return value
+        alpha_start = alpha
+        
+        win_score = self._win_score(board) - depth
+        best_score = float('-inf')
+        for row, col, mark in variant.moves(board, to_move):
+            board.make_move(row, col, mark)
+            winner = variant.winner(board, to_move)
+            if winner is not None:
+                score = win_score if winner == to_move else -win_score
+            elif variant.is_draw(board):
+                score = 0
+            else:
+                score = -self._variant_search(board, depth + 1, waiting, to_move, -beta, -alpha, table)
+            board.undo_move(row, col)
+            
+            if score > best_score:
+                best_score = score
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+                    
+        if best_score <= alpha_start:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        table.store(key, self._score_to_table(best_score, depth), remaining, flag)
+        return best_score
+        
+    @staticmethod
+    def _score_to_table(score, depth):
+        """
+        Convert a score to the form stored in a transposition table.
+        
+        Win and loss scores count plies from the root; the table stores them
+        counted from the position itself, so the entry stays valid when the
+        position is reached at another depth. Heuristic scores in (-1, 1)
+        and draws are stored unchanged.
+        
+        Args:
+            score: Score relative to the root
+            depth: Depth of the position
+            
+        Returns:
+            Score relative to the position
+        """
+        if score >= 1:
+            return score + depth
+        elif score <= -1:
+            return score - depth
+        return score
+        
+    @staticmethod
+    def _score_from_table(value, depth):
+        """
+        Convert a stored score back to one relative to the root.
+        
+        Args:
+            value: Score relative to the position, as stored
+            depth: Depth at which the position was reached
+            
+        Returns:
+            Score relative to the root
+        """
+        if value >= 1:
+            return value - depth
+        elif value <= -1:
+            return value + depth
+        return value
@@ -0,0 +1,84 @@
+"""
+Object pools for Board instances
+
+Simulation loops that play millions of games would otherwise build a new
+Board for every game and leave the old one to the garbage collector. The
+pools below hand out reset boards and take them back for reuse. Players
+need no pool: the headless runners keep their two players for the whole
+batch, and the interactive game reuses its computer player whenever a
+round's menu choices repeat (see TicTacToeGame.setup_game), so a
+steady-state loop creates no new boards or players.
+"""
+from contextlib import contextmanager
+from board import Board
+
+
+class ObjectPool:
+    """
+    Generic free-list pool of reusable objects.
+    """
+
+    def __init__(self, factory, reset, max_size=None):
+        """
+        Args:
+            factory: Zero-argument callable creating a new object
+            reset: Callable returning a released object to its initial state
+            max_size: Maximum number of idle objects kept (None for no limit)
+        """
+        self.factory = factory
+        self.reset = reset
+        self.max_size = max_size
+        self.created = 0
+        self.reused = 0
+        self._free = []
+
+    def acquire(self):
+        """
+        Take an object from the pool, creating one if none are idle.
+
+        Returns:
+            An object in its initial state
+        """
+        if self._free:
+            self.reused += 1
+            return self._free.pop()
+        self.created += 1
+        return self.factory()
+
+    def release(self, obj):
+        """
+        Reset an object and return it to the pool.
+
+        Args:
+            obj: An object previously returned by acquire()
+        """
+        if self.max_size is None or len(self._free) < self.max_size:
+            self.reset(obj)
+            self._free.append(obj)
+
+    @contextmanager
+    def borrowed(self):
+        """Context manager that acquires an object and releases it afterwards."""
+        obj = self.acquire()
+        try:
+            yield obj
+        finally:
+            self.release(obj)
+
+    def __len__(self):
+        """Number of idle objects in the pool."""
+        return len(self._free)
+
+
+class BoardPool(ObjectPool):
+    """Pool of empty boards of one size and win length."""
+
+    def __init__(self, size=3, win_length=None, max_size=None):
+        """
+        Args:
+            size: Board size
+            win_length: Marks in a row needed to win (defaults to size)
+            max_size: Maximum number of idle boards kept
+        """
+        super().__init__(lambda: Board(size=size, win_length=win_length), Board.reset, max_size)
+
@@ -0,0 +1,258 @@
+"""
+Per-phase profiling for interactive sessions
+
+PhaseProfiler wraps the functions that make up a turn (reading input,
+computer search, rendering, winner checks) with timers and reports how much
+wall-clock time each phase took, per game and for the whole session.
+
+Phases are exclusive: while one phase is being timed, calls that belong to
+other phases (e.g. check_winner inside the minimax search) count towards
+the outer phase and are not timed separately, so the breakdown adds up and
+nested calls cost only a flag check. Time outside every phase (menus, the
+play-again prompt) is reported as "other".
+
+Optionally the whole session also runs under cProfile and the hot functions
+are written to a pstats file.
+"""
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+
+
+class PhaseProfiler:
+    """
+    Collects call counts and wall-clock time per phase.
+    """
+
+    def __init__(self, stats_path=None):
+        """
+        Args:
+            stats_path: If given, run cProfile as well and dump its
+                statistics to this file when the session ends
+        """
+        self.games = []
+        self.session = {}
+        self.session_ns = 0
+        self.stats_path = stats_path
+        self._current = {}
+        self._active = False
+        self._patches = []
+        self._game_started_at = None
+        self._session_started_at = None
+        self._cprofile = None
+
+    def wrap(self, func, phase):
+        """
+        Wrap a function so its calls are timed as a phase.
+
+        Args:
+            func: Function to wrap
+            phase: Phase name
+
+        Returns:
+            The timed function
+        """
+        profiler = self
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if profiler._active:
+                return func(*args, **kwargs)
+            profiler._active = True
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                profiler._active = False
+                stats = profiler._current.get(phase)
+                if stats is None:
+                    stats = profiler._current[phase] = [0, 0, 0]
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+
+        return timed
+
+    def instrument(self, owner, name, phase):
+        """
+        Replace a function or method with a timed version until restore().
+
+        Args:
+            owner: Class or module holding the function
+            name: Attribute name
+            phase: Phase name
+        """
+        original = getattr(owner, name)
+        self._patches.append((owner, name, original))
+        setattr(owner, name, self.wrap(original, phase))
+
+    def restore(self):
+        """Put back every function replaced by instrument()."""
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches.clear()
+
+    def start_session(self):
+        """Start timing the session (and cProfile, if requested)."""
+        self._session_started_at = time.perf_counter_ns()
+        if self.stats_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def start_game(self):
+        """Start timing a game."""
+        self._current = {}
+        self._game_started_at = time.perf_counter_ns()
+
+    def end_game(self):
+        """
+        Finish the current game and add it to the session totals.
+
+        Returns:
+            dict: The game's breakdown (see breakdown())
+        """
+        wall_ns = time.perf_counter_ns() - self._game_started_at
+        for phase, (calls, total_ns, max_ns) in self._current.items():
+            stats = self.session.setdefault(phase, [0, 0, 0])
+            stats[0] += calls
+            stats[1] += total_ns
+            stats[2] = max(stats[2], max_ns)
+        game = self.breakdown(self._current, wall_ns)
+        self.games.append(game)
+        self._current = {}
+        return game
+
+    def end_session(self):
+        """
+        Stop timing the session, restore instrumented functions and dump the
+        cProfile statistics, if requested.
+
+        Returns:
+            dict: The session breakdown (see breakdown())
+        """
+        if self._cprofile:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.stats_path)
+        self.session_ns = time.perf_counter_ns() - self._session_started_at
+        self.restore()
+        return self.breakdown(self.session, self.session_ns)
+
+    @staticmethod
+    def breakdown(phases, wall_ns):
+        """
+        Turn raw phase counters into a report-friendly dict.
+
+        Args:
+            phases: Phase name -> [calls, total_ns, max_ns]
+            wall_ns: Wall-clock time the phases were measured over
+
+        Returns:
+            dict: wall_ms and, per phase (plus "other"), calls, total_ms,
+            mean_ms, max_ms and share of the wall-clock time
+        """
+        report = {"wall_ms": wall_ns / 1e6, "phases": {}}
+        timed_ns = 0
+        for phase, (calls, total_ns, max_ns) in sorted(phases.items(), key=lambda item: -item[1][1]):
+            timed_ns += total_ns
+            report["phases"][phase] = {
+                "calls": calls,
+                "total_ms": total_ns / 1e6,
+                "mean_ms": total_ns / calls / 1e6,
+                "max_ms": max_ns / 1e6,
+                "share": total_ns / wall_ns if wall_ns else 0.0,
+            }
+        other_ns = max(wall_ns - timed_ns, 0)
+        report["phases"]["other"] = {
+            "calls": 0, "total_ms": other_ns / 1e6, "mean_ms": 0.0, "max_ms": 0.0,
+            "share": other_ns / wall_ns if wall_ns else 0.0,
+        }
+        return report
+
+    @staticmethod
+    def format_breakdown(title, report):
+        """
+        Format a breakdown as a small table.
+
+        Args:
+            title: Heading line
+            report: Breakdown from breakdown()
+
+        Returns:
+            str: The table
+        """
+        lines = [f"{title} ({report['wall_ms']:.1f} ms wall clock)",
+                 f"  {'phase':<14}{'calls':>7}{'total ms':>11}{'mean ms':>10}{'max ms':>10}{'share':>8}"]
+        for phase, stats in report["phases"].items():
+            lines.append(
+                f"  {phase:<14}{stats['calls']:>7}{stats['total_ms']:>11.1f}"
+                f"{stats['mean_ms']:>10.2f}{stats['max_ms']:>10.2f}{stats['share']:>8.1%}"
+            )
+        return "\n".join(lines)
+
+    def hot_functions(self, limit=15):
+        """
+        Format the functions with the highest cumulative time under cProfile.
+
+        Args:
+            limit: Number of functions to list
+
+        Returns:
+            str: pstats listing, or an empty string without cProfile
+        """
+        if not self.stats_path:
+            return ""
+        output = io.StringIO()
+        pstats.Stats(self.stats_path, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+    def export(self, path):
+        """
+        Write the per-game and session breakdowns as JSON.
+
+        Args:
+            path: Output file
+        """
+        with open(path, "w", encoding="utf-8") as export_file:
+            json.dump({
+                "games": self.games,
+                "session": self.breakdown(self.session, self.session_ns),
+            }, export_file, indent=2)
+
+
+def add_profile_arguments(parser):
+    """
+    Add the profiling options to an entry point's argument parser.
+
+    Args:
+        parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--profile", action="store_true",
+                        help="time input, search, rendering and winner checks per game and session")
+    parser.add_argument("--profile-export", default=None,
+                        help="with --profile, also write the breakdown to this JSON file")
+    parser.add_argument("--profile-stats", default=None,
+                        help="with --profile, also run cProfile and dump pstats to this file")
+
+
+def finish_session(profiler, export_path=None):
+    """
+    End a profiled session and print (and optionally export) the results.
+
+    Args:
+        profiler: The session's PhaseProfiler
+        export_path: JSON file for the breakdown, or None
+    """
+    report = profiler.end_session()
+    print()
+    print(PhaseProfiler.format_breakdown(f"Profile: session of {len(profiler.games)} game(s)", report))
+    if export_path:
+        profiler.export(export_path)
+        print(f"Profile written to {export_path}")
+    if profiler.stats_path:
+        print(f"cProfile statistics written to {profiler.stats_path}; hottest functions:")
+        print(profiler.hot_functions())
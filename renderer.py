@@ -0,0 +1,179 @@
+"""
+Board rendering for the terminal
+
+render_board() builds a whole board frame as one string, so it reaches the
+terminal in a single write instead of dozens of small print calls. Frames
+are cached by position key, and the coloured text of every cell is rendered
+once per board size.
+
+DiffRenderer keeps the board pinned to the top of the screen and redraws
+only the cells that changed, using ANSI cursor movement. Prompts and
+messages scroll in the region below it, which avoids flicker and cuts the
+bytes sent per turn on slow remote terminals.
+"""
+import shutil
+import sys
+from ui_utils import Colors, colored_text
+
+_FRAME_CACHE_LIMIT = 4096
+_frame_cache = {}
+_cell_texts = {}
+
+
+def _get_cell_texts(size):
+    """
+    Get the pre-rendered text of every cell for a board size.
+
+    Args:
+        size: Board size
+
+    Returns:
+        tuple: For each cell index, (empty_text, x_text, o_text)
+    """
+    texts = _cell_texts.get(size)
+    if texts is None:
+        width = len(str(size * size))
+        texts = _cell_texts[size] = tuple(
+            (
+                colored_text(str(index + 1).rjust(width), Colors.BLUE),
+                colored_text("X".rjust(width), Colors.RED),
+                colored_text("O".rjust(width), Colors.GREEN),
+            )
+            for index in range(size * size)
+        )
+    return texts
+
+
+def _cell_text(board, row, col, texts):
+    """Return the rendered text of one cell."""
+    cell = board.grid[row][col]
+    empty_text, x_text, o_text = texts[row * board.size + col]
+    if cell == board.EMPTY:
+        return empty_text
+    elif cell == board.PLAYER_X:
+        return x_text
+    return o_text
+
+
+def _separator(size):
+    """Return the horizontal rule between board rows."""
+    width = len(str(size * size))
+    return "  " + "-" * ((width + 3) * size + 1)
+
+
+def render_board(board):
+    """
+    Render the board as it is shown to players, as a single string.
+
+    Args:
+        board: The board to render
+
+    Returns:
+        str: The frame, including the "Current Board:" header
+    """
+    key = (board.size, board.hash_key)
+    frame = _frame_cache.get(key)
+    if frame is not None:
+        return frame
+
+    size = board.size
+    texts = _get_cell_texts(size)
+    separator = _separator(size)
+    lines = ["", "  Current Board:", separator]
+    for row in range(size):
+        cells = " | ".join(_cell_text(board, row, col, texts) for col in range(size))
+        lines.append(f"  | {cells} | ")
+        lines.append(separator)
+    lines.append("")
+    frame = "\n".join(lines) + "\n"
+
+    if len(_frame_cache) >= _FRAME_CACHE_LIMIT:
+        _frame_cache.clear()
+    _frame_cache[key] = frame
+    return frame
+
+
+class FrameRenderer:
+    """Prints the full frame each turn in one write (works on any terminal)."""
+
+    def __init__(self, stream=None):
+        """
+        Args:
+            stream: Output stream (defaults to sys.stdout)
+        """
+        self.stream = stream or sys.stdout
+
+    def draw(self, board):
+        """Print the current board."""
+        self.stream.write(render_board(board))
+        self.stream.flush()
+
+    def close(self):
+        """Nothing to restore for plain output."""
+
+
+class DiffRenderer:
+    """
+    Keeps the board at the top of the screen and redraws only changed cells.
+    """
+
+    def __init__(self, stream=None):
+        """
+        Args:
+            stream: Output stream (defaults to sys.stdout); must be an
+                ANSI-capable terminal
+        """
+        self.stream = stream or sys.stdout
+        self._size = None
+        self._cells = None
+        self._frame_lines = 0
+
+    def _cell_screen_position(self, row, col):
+        """Return the 1-based (line, column) of a cell on the screen."""
+        width = len(str(self._size * self._size))
+        # Frame lines: blank, header, separator, then cell rows and separators
+        return 4 + 2 * row, 5 + col * (width + 3)
+
+    def _full_redraw(self, board):
+        """Clear the screen, draw the whole frame and set up the scroll region."""
+        frame = render_board(board)
+        self._size = board.size
+        self._frame_lines = frame.count("\n")
+        height = shutil.get_terminal_size().lines
+        # Clear, home, frame, then confine scrolling to the lines below it
+        self.stream.write(
+            "\033[2J\033[H" + frame
+            + f"\033[{self._frame_lines + 1};{height}r\033[{self._frame_lines + 1};1H"
+        )
+
+    def draw(self, board):
+        """
+        Bring the on-screen board up to date with as little output as possible.
+
+        Args:
+            board: The board to show
+        """
+        cells = [row[:] for row in board.grid]
+        if self._cells is None or board.size != self._size:
+            self._full_redraw(board)
+        else:
+            texts = _get_cell_texts(board.size)
+            updates = []
+            for row in range(board.size):
+                for col in range(board.size):
+                    if cells[row][col] != self._cells[row][col]:
+                        line, column = self._cell_screen_position(row, col)
+                        updates.append(f"\033[{line};{column}H" + _cell_text(board, row, col, texts))
+            if updates:
+                # Save the cursor, paint the changed cells, restore the cursor
+                self.stream.write("\0337" + "".join(updates) + "\0338")
+        self._cells = cells
+        self.stream.flush()
+
+    def close(self):
+        """Restore full-screen scrolling."""
+        if self._cells is not None:
+            height = shutil.get_terminal_size().lines
+            self.stream.write(f"\033[r\033[{height};1H\n")
+            self.stream.flush()
+            self._cells = None
@@ -0,0 +1,641 @@
+"""
+HTTP JSON move service
+
+MoveService answers "best move" and "evaluate position" requests for other
+programs over HTTP, so they need not embed the engine. Searches run in a
+pool of worker processes started (and warmed up) before the server accepts
+connections, one search per worker at a time, while a single asyncio event
+loop handles every connection. An LRU cache keyed by canonical position
+sits in front of the pool: a position that is a rotation or reflection of
+one already answered is served from the cache, its move mapped back onto
+the board as sent, and concurrent requests for the same uncached position
+share one search.
+
+Endpoints (requests and responses are JSON):
+
+    POST /move      {"cells": "X...O....", "difficulty": 3}
+                    -> {"move": [row, col], "cell": 4, "cached": false}
+    POST /evaluate  {"cells": "X...O...."}
+                    -> {"result": "draw", "score": 0, "move": [...], ...}
+    POST /batch     {"requests": [{"op": "move", "cells": ...}, ...]}
+                    -> {"results": [...]}, one result or {"error": ...} each
+    GET  /stats     Request, cache and latency counters
+
+A position is its cells row by row as "X", "O" or "." (the lobby's state
+format), optionally with to_move ("X" or "O"; needed only when both sides
+have as many marks, and then defaulting to X), win_length and max_depth.
+Boards larger than 3x3 are searched to a limited depth (max_depth may ask
+for less). Only hard moves and evaluations are cached; easy and medium moves
+are partly random.
+
+Usage:
+    python service.py serve --port 8080 --workers 4
+    python service.py load --address localhost:8080 --requests 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from board import Board
+from netutil import parse_address, percentile
+from player import ComputerPlayer
+from tablebase import load_tablebase
+from transposition import TranspositionTable
+
+_LATENCY_SAMPLES = 10000
+_MAX_BODY_BYTES = 1 << 20
+_MAX_BATCH = 1000
+# Largest board served
+_MAX_SIZE = 15
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Per worker process: computer players by (size, win_length, letter to
+# move, difficulty, max_depth), so transposition tables persist between
+# requests
+_players = {}
+
+
+class RequestError(Exception):
+    """Raised for a request the service cannot answer; sent back as a 400."""
+
+
+def _build_board(cells, win_length):
+    """
+    Build a board from a cells string.
+
+    Args:
+        cells: One "X", "O" or "." per cell, row by row
+        win_length: Marks in a row needed to win, or None for the size
+
+    Returns:
+        Board: The position
+    """
+    size = math.isqrt(len(cells))
+    board = Board(size=size, win_length=win_length)
+    for index, letter in enumerate(cells):
+        if letter != ".":
+            board.make_move(*divmod(index, size), board.PLAYER_X if letter == "X" else board.PLAYER_O)
+    return board
+
+
+def _get_player(size, win_length, to_move, difficulty, max_depth):
+    """Get this worker's computer player for a kind of request."""
+    key = (size, win_length, to_move, difficulty, max_depth)
+    player = _players.get(key)
+    if player is None:
+        board = Board(size=size, win_length=win_length)
+        symbol = board.PLAYER_X if to_move == "X" else board.PLAYER_O
+        player = _players[key] = ComputerPlayer(
+            symbol, difficulty, "Service", max_depth=max_depth,
+            transposition_table=TranspositionTable(), tablebase=load_tablebase(size, board.win_length),
+        )
+    return player
+
+
+def _warm_up():
+    """Worker start-up task: build the 3x3 tables and caches by solving the empty board."""
+    _get_player(3, 3, "X", 3, None).evaluate(Board())
+    return os.getpid()
+
+
+def _search(op, cells, to_move, win_length, difficulty, max_depth):
+    """
+    Answer one request in a worker process.
+
+    Args:
+        op: "move" or "evaluate"
+        cells: Validated cells string
+        to_move: "X" or "O"
+        win_length: Marks in a row needed to win
+        difficulty: Difficulty of the move (evaluations always search hard)
+        max_depth: Look-ahead limit, or None to search to the end
+
+    Returns:
+        dict: The answer, with the move as a cell index
+    """
+    board = _build_board(cells, win_length)
+    player = _get_player(board.size, board.win_length, to_move, difficulty if op == "move" else 3, max_depth)
+    if op == "move":
+        row, col = player.choose_move(board)
+        return {"cell": row * board.size + col}
+
+    score, (row, col) = player.evaluate(board)
+    answer = {"cell": row * board.size + col, "score": score}
+    win_score = player._win_score(board)
+    if abs(score) >= 1:
+        answer["result"] = "win" if score > 0 else "loss"
+        # The first move is not counted in the score
+        answer["plies"] = int(win_score - abs(score)) + 1
+    elif max_depth is None:
+        answer["result"] = "draw"
+    else:
+        answer["result"] = "unknown"
+    return answer
+
+
+class ResponseCache:
+    """
+    Least-recently-used cache of answers by canonical request key.
+    """
+
+    def __init__(self, max_entries=100000):
+        """
+        Args:
+            max_entries: Answers kept before the least recently used ones
+                are dropped (0 disables the cache)
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """Number of cached answers."""
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Look an answer up, counting the hit or miss.
+
+        Args:
+            key: Canonical request key
+
+        Returns:
+            The cached answer, or None
+        """
+        answer = self._entries.get(key)
+        if answer is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return answer
+
+    def put(self, key, answer):
+        """
+        Store an answer, dropping the least recently used one if full.
+
+        Args:
+            key: Canonical request key
+            answer: Answer to store
+        """
+        if not self.max_entries:
+            return
+        self._entries[key] = answer
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class MoveService:
+    """
+    Asyncio HTTP server in front of a process pool of searches.
+    """
+
+    def __init__(self, host="0.0.0.0", port=8080, workers=None, cache_size=100000, large_board_depth=3):
+        """
+        Args:
+            host: Interface to listen on
+            port: TCP port
+            workers: Worker processes (defaults to the CPU count)
+            cache_size: Answers kept in the LRU cache (0 disables it)
+            large_board_depth: Look-ahead limit for boards larger than 3x3;
+                requests may ask for a smaller max_depth, which bounds the
+                time a single request can take
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.large_board_depth = large_board_depth
+        self.cache = ResponseCache(cache_size)
+        self._executor = None
+        self._server = None
+        # Connection handler tasks and their streams
+        self._handlers = {}
+        # Searches running for uncached keys, shared by identical requests
+        self._pending = {}
+        self._latencies = deque(maxlen=_LATENCY_SAMPLES)
+        self.requests = 0
+        self.errors = 0
+        self.searches = 0
+
+    async def start(self):
+        """Start and warm up the workers, then listen; returns once bound."""
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        # Submitting as many tasks as workers starts every process now
+        # rather than on the first requests
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _warm_up) for _ in range(self.workers)
+        ))
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start (if needed) and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting requests, close connections and stop the workers."""
+        if self._server:
+            self._server.close()
+        # Closed streams end each handler at its next read
+        for writer in list(self._handlers.values()):
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server:
+            await self._server.wait_closed()
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+
+    def stats(self):
+        """
+        Get service metrics.
+
+        Returns:
+            dict: Request, search and cache counters plus percentiles (in
+            ms) of the time spent answering requests
+        """
+        latencies = sorted(self._latencies)
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            "workers": self.workers,
+            "requests": self.requests,
+            "errors": self.errors,
+            "searches": self.searches,
+            "cache": {
+                "entries": len(self.cache),
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "hit_rate": self.cache.hits / lookups if lookups else 0.0,
+            },
+            "latency_ms": {
+                "samples": len(latencies),
+                "p50": percentile(latencies, 0.50) * 1000,
+                "p99": percentile(latencies, 0.99) * 1000,
+                "max": (latencies[-1] if latencies else 0.0) * 1000,
+            },
+        }
+
+    def _parse_position(self, request):
+        """
+        Validate a position request.
+
+        Args:
+            request: Decoded JSON object
+
+        Returns:
+            tuple: (board, to_move, win_length, difficulty, max_depth)
+
+        Raises:
+            RequestError: If the request is malformed or the game is over
+        """
+        if not isinstance(request, dict):
+            raise RequestError("request must be a JSON object")
+        cells = request.get("cells")
+        if not isinstance(cells, str) or set(cells) - set("XO."):
+            raise RequestError('cells must be a string of "X", "O" and "."')
+        size = math.isqrt(len(cells))
+        if size * size != len(cells) or not 3 <= size <= _MAX_SIZE:
+            raise RequestError(f"cells must describe a square board from 3x3 to {_MAX_SIZE}x{_MAX_SIZE}")
+
+        x_count, o_count = cells.count("X"), cells.count("O")
+        if abs(x_count - o_count) > 1:
+            raise RequestError("the players' mark counts differ by more than one")
+        to_move = "O" if x_count > o_count else "X" if o_count > x_count else request.get("to_move", "X")
+        if request.get("to_move", to_move) != to_move:
+            raise RequestError(f"{to_move} must be to move in this position")
+        if to_move not in ("X", "O"):
+            raise RequestError('to_move must be "X" or "O"')
+
+        win_length = request.get("win_length") or size
+        difficulty = request.get("difficulty", 3)
+        max_depth = request.get("max_depth")
+        depth_limit = self.large_board_depth if size > 3 else size * size
+        if max_depth is None and size > 3:
+            max_depth = depth_limit
+        for name, value, low, high in (("win_length", win_length, 3, size), ("difficulty", difficulty, 1, 3),
+                                       ("max_depth", max_depth if max_depth is not None else 1, 1, depth_limit)):
+            if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+                raise RequestError(f"{name} must be an integer from {low} to {high}")
+        board = _build_board(cells, win_length)
+        if board.check_winner() is not None:
+            raise RequestError("the game is already won")
+        if board.is_full():
+            raise RequestError("the board is full")
+        return board, to_move, win_length, difficulty, max_depth
+
+    async def answer(self, op, request):
+        """
+        Answer a move or evaluate request through the cache and the pool.
+
+        Args:
+            op: "move" or "evaluate"
+            request: Decoded JSON object
+
+        Returns:
+            dict: The response body
+
+        Raises:
+            RequestError: If the request cannot be answered
+        """
+        board, to_move, win_length, difficulty, max_depth = self._parse_position(request)
+        if op == "evaluate":
+            difficulty = 3
+
+        # Key by the canonical orientation of the position: permutation maps
+        # cells of the request to cells of the canonical position
+        cells = request["cells"]
+        _, permutation = board.canonical_transform()
+        canonical = [""] * len(cells)
+        for index, letter in enumerate(cells):
+            canonical[permutation[index]] = letter
+        key = (op, "".join(canonical), to_move, win_length, difficulty, max_depth)
+
+        cacheable = difficulty == 3
+        answer = self.cache.get(key) if cacheable else None
+        cached = answer is not None
+        if answer is None:
+            pending = self._pending.get(key) if cacheable else None
+            if pending is None:
+                loop = asyncio.get_running_loop()
+                self.searches += 1
+                # The worker searches the canonical position, so its answer
+                # can be cached as is
+                pending = loop.run_in_executor(
+                    self._executor, _search, op, key[1], to_move, win_length, difficulty, max_depth
+                )
+                if cacheable:
+                    self._pending[key] = pending
+                    pending.add_done_callback(lambda _, key=key: self._pending.pop(key, None))
+            answer = await asyncio.shield(pending)
+            if cacheable:
+                self.cache.put(key, answer)
+
+        cell = permutation.index(answer["cell"])
+        return {**answer, "move": list(divmod(cell, board.size)), "cell": cell, "cached": cached}
+
+    async def _route(self, method, path, body):
+        """
+        Dispatch a request.
+
+        Returns:
+            tuple: (status, response object)
+        """
+        if path == "/stats":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, self.stats()
+        if path not in ("/move", "/evaluate", "/batch"):
+            return 404, {"error": f"unknown endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            request = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            return 400, {"error": f"invalid JSON: {error}"}
+        try:
+            if path != "/batch":
+                return 200, await self.answer(path[1:], request)
+            items = request.get("requests") if isinstance(request, dict) else None
+            if not isinstance(items, list) or len(items) > _MAX_BATCH:
+                raise RequestError(f"requests must be a list of at most {_MAX_BATCH} objects")
+            results = await asyncio.gather(*(self._answer_item(item) for item in items))
+            return 200, {"results": results}
+        except RequestError as error:
+            return 400, {"error": str(error)}
+
+    async def _answer_item(self, item):
+        """Answer one request of a batch; errors are reported in its place."""
+        op = item.get("op", "move") if isinstance(item, dict) else None
+        try:
+            if op not in ("move", "evaluate"):
+                raise RequestError('op must be "move" or "evaluate"')
+            return await self.answer(op, item)
+        except RequestError as error:
+            return {"error": str(error)}
+
+    async def _handle_client(self, reader, writer):
+        """Connection handler: answer HTTP/1.1 requests until the client closes."""
+        self._handlers[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                started_at = time.perf_counter()
+                self.requests += 1
+                length = int(headers.get("content-length", 0))
+                if length > _MAX_BODY_BYTES:
+                    status, response = 413, {"error": "request body too large"}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, response = await self._route(method, path.split("?", 1)[0], body)
+                    except Exception as error:
+                        status, response = 500, {"error": str(error)}
+                if status != 200:
+                    self.errors += 1
+                self._latencies.append(time.perf_counter() - started_at)
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.strip() == "HTTP/1.1" and status != 413)
+                payload = json.dumps(response).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}"
+                    "\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.pop(asyncio.current_task(), None)
+            writer.close()
+
+
+async def _http_request(reader, writer, method, path, body=None):
+    """
+    Send one request on a keep-alive connection and read the response.
+
+    Returns:
+        tuple: (status, decoded JSON body)
+    """
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: service\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def random_positions(count, size=3, seed=None):
+    """
+    Build positions reachable in play, as cells strings, for load tests.
+
+    Args:
+        count: Number of positions
+        size: Board size
+        seed: Optional random seed
+
+    Returns:
+        list: Cells strings of unfinished positions (with repeats, as real
+        traffic would have)
+    """
+    rng = random.Random(seed)
+    board = Board(size=size)
+    positions = []
+    while len(positions) < count:
+        board.reset()
+        symbol = board.PLAYER_X
+        for _ in range(rng.randrange(board.size * board.size - 1)):
+            row, col = rng.choice(board.get_empty_positions())
+            board.make_move(row, col, symbol)
+            if board.check_winner():
+                board.undo_move(row, col)
+                break
+            symbol = board.PLAYER_O if symbol == board.PLAYER_X else board.PLAYER_X
+        positions.append("".join(
+            "X" if cell == board.PLAYER_X else "O" if cell == board.PLAYER_O else "."
+            for row in board.grid for cell in row
+        ))
+    return positions
+
+
+async def run_load(address, requests=5000, concurrency=32, endpoint="move", size=3, seed=None):
+    """
+    Send requests to a running service from keep-alive connections and
+    measure the latency the clients see.
+
+    Args:
+        address: "host:port" of the service
+        requests: Requests to send in total
+        concurrency: Connections sending requests in parallel, one at a time
+            each
+        endpoint: "move" or "evaluate"
+        size: Board size of the positions sent
+        seed: Optional random seed for the positions
+
+    Returns:
+        dict: Requests, errors, requests_per_second, p50/p99/max latency in
+        ms and the service's stats afterwards
+    """
+    host, port = parse_address(address)
+    positions = random_positions(requests, size, seed)
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def client():
+        nonlocal errors, next_index
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while next_index < len(positions):
+                cells = positions[next_index]
+                next_index += 1
+                sent_at = time.perf_counter()
+                status, _ = await _http_request(reader, writer, "POST", f"/{endpoint}", {"cells": cells})
+                latencies.append(time.perf_counter() - sent_at)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, stats = await _http_request(reader, writer, "GET", "/stats")
+    writer.close()
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "service": stats,
+    }
+
+
+def main():
+    """Command-line entry point for running the service or loading it."""
+    parser = argparse.ArgumentParser(description="Tic-Tac-Toe HTTP move service.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the service")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    serve.add_argument("--cache-size", type=int, default=100000, help="cached answers (0 disables the cache)")
+    serve.add_argument("--large-board-depth", type=int, default=3,
+                       help="look-ahead limit for boards above 3x3")
+    load = commands.add_parser("load", help="load-test a running service")
+    load.add_argument("--address", default="localhost:8080")
+    load.add_argument("--requests", type=int, default=5000)
+    load.add_argument("--concurrency", type=int, default=32)
+    load.add_argument("--endpoint", default="move", choices=("move", "evaluate"))
+    load.add_argument("--size", type=int, default=3)
+    load.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "load":
+        result = asyncio.run(run_load(args.address, args.requests, args.concurrency,
+                                      args.endpoint, args.size, args.seed))
+        print(f"{result['requests']} requests, {result['errors']} errors: "
+              f"{result['requests_per_second']:.0f} requests/s, p50 {result['p50_ms']:.2f} ms, "
+              f"p99 {result['p99_ms']:.2f} ms, max {result['max_ms']:.2f} ms")
+        print(f"Service cache hit rate {result['service']['cache']['hit_rate']:.1%}, "
+              f"{result['service']['searches']} searches")
+        return
+
+    service = MoveService(args.host, args.port, args.workers, args.cache_size, args.large_board_depth)
+
+    async def serve():
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    print(f"Move service listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(json.dumps(service.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
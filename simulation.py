@@ -0,0 +1,225 @@
+"""
+Headless game runner for Tic-Tac-Toe simulations
+
+Plays computer-vs-computer games without any console output, for
+benchmarks, tuning and data collection.
+
+Usage: python simulation.py --games 1000 --x-difficulty 3 --o-difficulty 1
+"""
+import argparse
+import random
+import time
+from analytics import AnalyticsSink
+from board import Board
+from events import GameEventLog, describe_player, new_game_id
+from player import ComputerPlayer
+from pool import BoardPool, ObjectPool
+from tablebase import load_tablebase
+from variants import VARIANTS, get_variant
+
+
+def play_headless_game(board, players, first_index=0, event_log=None, analytics=None):
+    """
+    Play one game between two computer players on an empty board.
+
+    Args:
+        board: An empty board to play on (a Board, or the rule variant's
+            board)
+        players: Two ComputerPlayer instances, X first, playing by the same
+            rule variant (if any)
+        first_index: Index into players of the side that moves first
+        event_log: Optional GameEventLog receiving the game's events
+        analytics: Optional analytics sink or GameRecordBuffer receiving
+            the finished game and its moves
+
+    Returns:
+        Symbol of the winner, or None for a draw
+    """
+    game_id = None
+    started_at = time.perf_counter()
+    if event_log:
+        game_id = new_game_id()
+        event_log.emit(
+            "game_start", game_id=game_id, mode="headless",
+            size=board.size, win_length=board.win_length,
+            variant=players[0].variant.name if players[0].variant else "standard",
+            players=[describe_player(p) for p in players],
+            first_player=players[first_index].name,
+        )
+
+    cells = [] if analytics is not None else None
+    variant = players[0].variant
+    index = first_index
+    while True:
+        player = players[index]
+        move_started_at = time.perf_counter()
+        row, col, *mark = player.choose_move(board)
+        symbol = mark[0] if mark else player.symbol
+        board.make_move(row, col, symbol)
+        if cells is not None:
+            cells.append(row * board.size + col)
+
+        if event_log:
+            event_log.emit(
+                "move", game_id=game_id, ply=board.move_count,
+                player=player.name, symbol=symbol, row=row, col=col,
+                think_ms=(time.perf_counter() - move_started_at) * 1000,
+            )
+
+        if variant:
+            winner = variant.winner(board, player.symbol)
+            if winner or variant.is_draw(board):
+                break
+        else:
+            winner = board.check_winner()
+            if winner or board.is_full():
+                break
+        index ^= 1
+
+    winner_name = None
+    for player in players:
+        if winner is None:
+            player.update_stats("draw")
+        elif player.symbol == winner:
+            player.update_stats("win")
+            winner_name = player.name
+        else:
+            player.update_stats("loss")
+
+    if event_log:
+        event_log.emit(
+            "game_end", game_id=game_id, result="win" if winner else "draw",
+            winner=winner_name, moves=board.move_count,
+            duration_ms=(time.perf_counter() - started_at) * 1000,
+        )
+    if analytics is not None:
+        analytics.record_game(players, first_index, winner, cells)
+    return winner
+
+
+def run_games(games, x_difficulty=3, o_difficulty=3, size=3, win_length=None,
+              event_log=None, seed=None, max_depth=None, pooled=False, analytics=None, variant=None):
+    """
+    Play a batch of headless games, alternating who moves first (unless the
+    rule variant fixes it). Hard players look up endgames in the board's
+    tablebase if one has been generated (see tablebase.py).
+
+    Args:
+        games: Number of games to play
+        x_difficulty: Difficulty of the X player
+        o_difficulty: Difficulty of the O player
+        size: Board size
+        win_length: Marks in a row needed to win (defaults to size)
+        event_log: Optional GameEventLog receiving every game's events
+        seed: Optional random seed for reproducible runs
+        max_depth: Look-ahead limit for hard players (None searches to the end)
+        pooled: Recycle boards through a pool instead of building a new
+            board per game (the players are kept for the whole batch)
+        analytics: Optional AnalyticsSink recording every game
+        variant: Optional variants.RuleVariant to play instead of the
+            standard rules; its board size and win length replace size and
+            win_length
+
+    Returns:
+        dict: Win/draw counts and the elapsed time in seconds
+
+    Raises:
+        ValueError: If analytics is given for a variant where players place
+            either mark, which its records cannot hold
+    """
+    if seed is not None:
+        random.seed(seed)
+    if variant is not None:
+        if analytics is not None and variant.free_marks:
+            raise ValueError(f"Analytics records cannot hold the marks of {variant.title} games")
+        size, win_length = variant.size, variant.win_length
+
+    template = variant.new_board() if variant is not None else Board(size=size, win_length=win_length)
+    solved = load_tablebase(size, template.win_length) if variant is None else None
+    players = [
+        ComputerPlayer(template.PLAYER_X, x_difficulty, "Computer X", max_depth=max_depth, tablebase=solved,
+                       variant=variant),
+        ComputerPlayer(template.PLAYER_O, o_difficulty, "Computer O", max_depth=max_depth, tablebase=solved,
+                       variant=variant),
+    ]
+
+    board_pool = None
+    if pooled:
+        if variant is not None:
+            # The variant's board may not be a Board
+            board_pool = ObjectPool(variant.new_board, lambda board: board.reset())
+        else:
+            board_pool = BoardPool(size, win_length)
+    started_at = time.perf_counter()
+    for game in range(games):
+        if board_pool:
+            board = board_pool.acquire()
+        elif variant is not None:
+            board = variant.new_board()
+        else:
+            board = Board(size=size, win_length=win_length)
+        first_index = 0 if variant is not None and variant.x_moves_first else game % 2
+        play_headless_game(board, players, first_index, event_log, analytics)
+        if board_pool:
+            board_pool.release(board)
+
+    return {
+        "games": games,
+        "x_wins": players[0].wins,
+        "o_wins": players[1].wins,
+        "draws": players[0].draws,
+        "seconds": time.perf_counter() - started_at,
+    }
+
+
+def main():
+    """Command-line entry point for headless simulations."""
+    parser = argparse.ArgumentParser(description="Run headless Tic-Tac-Toe simulations.")
+    parser.add_argument("--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("--x-difficulty", type=int, default=3, choices=(1, 2, 3))
+    parser.add_argument("--o-difficulty", type=int, default=3, choices=(1, 2, 3))
+    parser.add_argument("--size", type=int, default=None, help="board size (default 3, or the variant's)")
+    parser.add_argument("--win-length", type=int, default=None, help="marks in a row to win")
+    parser.add_argument("--variant", default="standard", choices=sorted(VARIANTS),
+                        help="rule variant to play (see variants.py)")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="look-ahead limit for hard players on large boards")
+    parser.add_argument("--pooled", action="store_true",
+                        help="reuse pooled boards instead of allocating one per game")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--event-log", default=None, help="write JSON-lines events to this file")
+    parser.add_argument("--analytics", default=None,
+                        help="record every game in this SQLite database (see analytics_queries.py)")
+    args = parser.parse_args()
+
+    variant = get_variant(args.variant, args.size, args.win_length)
+    size, win_length = (variant.size, variant.win_length) if variant else (args.size or 3, args.win_length)
+    if variant and variant.free_marks and args.analytics:
+        parser.error(f"--analytics cannot record {variant.title} games")
+    event_log = GameEventLog(args.event_log) if args.event_log else None
+    analytics = None
+    if args.analytics:
+        analytics = AnalyticsSink(args.analytics, "simulation", size, win_length, variant=args.variant)
+    try:
+        result = run_games(
+            args.games, args.x_difficulty, args.o_difficulty,
+            size, win_length, event_log, args.seed, args.max_depth, args.pooled,
+            analytics, variant,
+        )
+    finally:
+        if event_log:
+            event_log.close()
+        if analytics:
+            analytics.close()
+
+    print(f"{result['games']} games in {result['seconds']:.2f}s: "
+          f"X wins {result['x_wins']}, O wins {result['o_wins']}, draws {result['draws']}")
+    if event_log:
+        print(f"{event_log.events_written} events written to {args.event_log}"
+              f" ({event_log.events_dropped} dropped)")
+    if analytics:
+        print(f"{analytics.games_written} games recorded in {args.analytics} (run {analytics.run_id})")
+
+
+if __name__ == "__main__":
+    main()
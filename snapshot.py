@@ -0,0 +1,313 @@
+"""
+Snapshots of in-progress games
+
+snapshot_game() packs everything a TicTacToeGame needs to carry on - the
+board, whose turn it is, both players with their statistics and the
+computer's search state (settings, evaluator, aspiration guess and
+transposition table) - into a compact, versioned binary blob, and
+restore_game() rebuilds the game from it. A stateless front end can keep
+games in a database or cache and, per request, restore a game, apply a
+move and snapshot it again:
+
+    game = restore_game(blob)
+    ... play one turn ...
+    blob = snapshot_game(game)
+
+The event log, difficulty ladder and renderer belong to the session, not
+the game, and are passed to restore_game() again. A shared transposition
+table or a tablebase is stored by reference and re-attached on restore if
+it still exists.
+
+Format (little-endian), version 2:
+    header     magic "TTSG", version, flags (game active, vs computer),
+               current player index
+    game id    string (empty if none)
+    variant    rule variant name (empty for the standard rules; not in
+               version 1 snapshots)
+    board      size, win length, the three symbols, X and O cell masks
+               (ceil(N * N / 8) bytes each)
+    tables     count, then per distinct transposition table its kind and
+               either its entries or the shared table's name and size
+    players    count, then per player its kind, symbol, name, wins, losses,
+               draws and, for computer players, the search settings, the
+               aspiration guess, the index of its table, the tablebase
+               directory and the evaluator (JSON)
+Strings are UTF-8 with a uint16 length prefix.
+"""
+import json
+import struct
+import time
+from board import Board
+from evaluation import Evaluator
+from game import TicTacToeGame
+from player import ComputerPlayer, HumanPlayer
+from tablebase import load_tablebase
+from transposition import SharedTranspositionTable, TranspositionTable
+from variants import get_variant
+
+_MAGIC = b"TTSG"
+_VERSION = 2
+# Snapshots of these versions can still be restored
+_READABLE_VERSIONS = (1, 2)
+
+_HEADER = struct.Struct("<4sBBB")
+_BOARD = struct.Struct("<BB")
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<H")
+_PLAYER = struct.Struct("<BIII")
+_COMPUTER = struct.Struct("<BBHHddh")
+_TABLE = struct.Struct("<BQ")
+_ENTRY = struct.Struct("<QdBB")
+
+_GAME_ACTIVE = 1
+_VS_COMPUTER = 2
+
+_HUMAN = 0
+_COMPUTER_PLAYER = 1
+
+_LOCAL_TABLE = 1
+_SHARED_TABLE = 2
+
+_THREAT_SEARCH = 1
+_USE_PVS = 2
+_HAS_LAST_SCORE = 4
+
+_NO_DEPTH = 0xFFFF
+
+_SCORER_CLASSES = {cls.__name__: cls for cls in ComputerPlayer.SCORERS.values()}
+
+
+def _pack_string(text):
+    """Encode a string with its length prefix."""
+    data = text.encode("utf-8")
+    return _LENGTH.pack(len(data)) + data
+
+
+def _pack_evaluator(evaluator):
+    """Describe an evaluator's scorers, weights and scale as JSON."""
+    if evaluator is None:
+        return ""
+    return json.dumps({
+        "scorers": [[type(scorer).__name__, vars(scorer), weight] for scorer, weight in evaluator.scorers],
+        "scale": evaluator.scale,
+    })
+
+
+def _pack_table(table):
+    """
+    Encode a transposition table.
+
+    Args:
+        table: TranspositionTable or SharedTranspositionTable
+
+    Returns:
+        bytes: Kind and contents, or kind, size and name for a shared table
+    """
+    if isinstance(table, SharedTranspositionTable):
+        return _TABLE.pack(_SHARED_TABLE, table.slots) + _pack_string(table.name)
+    entries = table.entries
+    return b"".join((
+        _TABLE.pack(_LOCAL_TABLE, table.max_entries),
+        _COUNT.pack(len(entries)),
+        b"".join(_ENTRY.pack(key, value, depth, flag) for key, (value, depth, flag) in entries.items()),
+    ))
+
+
+def snapshot_game(game):
+    """
+    Serialise a game.
+
+    Args:
+        game: TicTacToeGame with a board and players
+
+    Returns:
+        bytes: The snapshot
+
+    Raises:
+        TypeError: If the game is played on a board or by a player the
+            format cannot hold
+    """
+    board = game.board
+    if not isinstance(board, Board):
+        raise TypeError(f"Cannot snapshot a {type(board).__name__}")
+    flags = (_GAME_ACTIVE if game.game_active else 0) | (_VS_COMPUTER if game.vs_computer else 0)
+    mask_bytes = (board.size * board.size + 7) // 8
+    o_mask = ~(board.empty_mask | board.x_mask) & ((1 << (board.size * board.size)) - 1)
+    parts = [
+        _HEADER.pack(_MAGIC, _VERSION, flags, game.current_player_index),
+        _pack_string(game.game_id or ""),
+        _pack_string(game.variant.name if game.variant else ""),
+        _BOARD.pack(board.size, board.win_length),
+        _pack_string(board.EMPTY), _pack_string(board.PLAYER_X), _pack_string(board.PLAYER_O),
+        board.x_mask.to_bytes(mask_bytes, "little"),
+        o_mask.to_bytes(mask_bytes, "little"),
+    ]
+
+    # Players may share a table, so tables are stored once and referenced
+    tables = []
+    for player in game.players:
+        table = getattr(player, "transposition_table", None)
+        if table is not None and not any(table is known for known in tables):
+            tables.append(table)
+    parts.append(_COUNT.pack(len(tables)))
+    parts.extend(_pack_table(table) for table in tables)
+
+    parts.append(_COUNT.pack(len(game.players)))
+    for player in game.players:
+        is_computer = isinstance(player, ComputerPlayer)
+        if not is_computer and not isinstance(player, HumanPlayer):
+            raise TypeError(f"Cannot snapshot a {type(player).__name__}")
+        parts.append(_PLAYER.pack(
+            _COMPUTER_PLAYER if is_computer else _HUMAN, player.wins, player.losses, player.draws
+        ))
+        parts.append(_pack_string(player.symbol))
+        parts.append(_pack_string(player.name))
+        if not is_computer:
+            continue
+        settings = ((_THREAT_SEARCH if player.threat_search else 0)
+                    | (_USE_PVS if player.use_pvs else 0)
+                    | (_HAS_LAST_SCORE if player._last_score is not None else 0))
+        table_index = -1
+        for index, table in enumerate(tables):
+            if table is player.transposition_table:
+                table_index = index
+        parts.append(_COMPUTER.pack(
+            player.difficulty, settings, player.workers,
+            _NO_DEPTH if player.max_depth is None else player.max_depth,
+            player.noise, player._last_score or 0.0, table_index,
+        ))
+        parts.append(_pack_string(player.tablebase.directory if player.tablebase is not None else ""))
+        parts.append(_pack_string(_pack_evaluator(player.evaluator)))
+    return b"".join(parts)
+
+
+class _Reader:
+    """Sequential reader over snapshot bytes."""
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, layout):
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def raw(self, length):
+        start = self.offset
+        self.offset += length
+        if self.offset > len(self.data):
+            raise ValueError("Truncated game snapshot")
+        return self.data[start:self.offset]
+
+    def string(self):
+        length, = self.unpack(_LENGTH)
+        return bytes(self.raw(length)).decode("utf-8")
+
+
+def _read_table(reader):
+    """Rebuild a transposition table; a shared table that is gone becomes None."""
+    kind, size = reader.unpack(_TABLE)
+    if kind == _SHARED_TABLE:
+        name = reader.string()
+        try:
+            return SharedTranspositionTable.attach(name, size)
+        except FileNotFoundError:
+            return None
+    count, = reader.unpack(_COUNT)
+    table = TranspositionTable(size)
+    table.entries = {
+        key: (int(value) if value.is_integer() else value, depth, flag)
+        for key, value, depth, flag in _ENTRY.iter_unpack(reader.raw(count * _ENTRY.size))
+    }
+    return table
+
+
+def _read_evaluator(description):
+    """Rebuild an evaluator from its JSON description."""
+    if not description:
+        return None
+    config = json.loads(description)
+    return Evaluator(
+        tuple((_SCORER_CLASSES[name](**params), weight) for name, params, weight in config["scorers"]),
+        config["scale"],
+    )
+
+
+def restore_game(data, event_log=None, ladder=None, renderer=None):
+    """
+    Rebuild a game from a snapshot.
+
+    Args:
+        data: Bytes from snapshot_game()
+        event_log: Optional GameEventLog for the restored game
+        ladder: Optional calibrated difficulty ladder
+        renderer: Optional renderer
+
+    Returns:
+        TicTacToeGame: The game, ready to continue with the player to move
+    """
+    reader = _Reader(memoryview(data))
+    magic, version, flags, current_player_index = reader.unpack(_HEADER)
+    if magic != _MAGIC:
+        raise ValueError("Not a game snapshot")
+    if version not in _READABLE_VERSIONS:
+        raise ValueError(f"Unsupported game snapshot version {version}")
+
+    game = TicTacToeGame(event_log, ladder, renderer)
+    game.game_id = reader.string() or None
+    variant_name = reader.string() if version >= 2 else ""
+    size, win_length = reader.unpack(_BOARD)
+    variant = game.variant = get_variant(variant_name, size, win_length) if variant_name else None
+    empty, player_x, player_o = reader.string(), reader.string(), reader.string()
+    board = game.board = Board(empty, player_x, player_o, size, win_length)
+    mask_bytes = (size * size + 7) // 8
+    x_mask = int.from_bytes(reader.raw(mask_bytes), "little")
+    o_mask = int.from_bytes(reader.raw(mask_bytes), "little")
+    cells = board.cells
+    for marks, symbol in ((x_mask, player_x), (o_mask, player_o)):
+        while marks:
+            lowest = marks & -marks
+            board.make_move(*cells[lowest.bit_length() - 1], symbol)
+            marks ^= lowest
+
+    table_count, = reader.unpack(_COUNT)
+    tables = [_read_table(reader) for _ in range(table_count)]
+
+    player_count, = reader.unpack(_COUNT)
+    players = []
+    for _ in range(player_count):
+        kind, wins, losses, draws = reader.unpack(_PLAYER)
+        symbol, name = reader.string(), reader.string()
+        if kind == _COMPUTER_PLAYER:
+            (difficulty, settings, workers, max_depth, noise,
+             last_score, table_index) = reader.unpack(_COMPUTER)
+            tablebase_directory = reader.string()
+            evaluator = _read_evaluator(reader.string())
+            player = ComputerPlayer(
+                symbol, difficulty, name,
+                threat_search=bool(settings & _THREAT_SEARCH),
+                workers=workers,
+                max_depth=None if max_depth == _NO_DEPTH else max_depth,
+                evaluator=evaluator,
+                noise=noise,
+                transposition_table=tables[table_index] if table_index >= 0 else None,
+                tablebase=load_tablebase(size, win_length, tablebase_directory) if tablebase_directory else None,
+                use_pvs=bool(settings & _USE_PVS),
+                variant=variant,
+            )
+            if settings & _HAS_LAST_SCORE:
+                player._last_score = int(last_score) if last_score.is_integer() else last_score
+        elif kind == _HUMAN:
+            player = HumanPlayer(symbol, name, variant)
+        else:
+            raise ValueError(f"Unknown player kind {kind} in game snapshot")
+        player.wins, player.losses, player.draws = wins, losses, draws
+        players.append(player)
+
+    game.players = players
+    game.current_player_index = current_player_index
+    game.game_active = bool(flags & _GAME_ACTIVE)
+    game.vs_computer = bool(flags & _VS_COMPUTER)
+    game._game_started_at = time.perf_counter()
+    return game
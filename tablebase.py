@@ -0,0 +1,563 @@
+"""
+Endgame tablebases for N x N boards with K in a row
+
+A tablebase holds the solved value of every position with at most E empty
+cells: whether the side to move wins, loses or draws with best play, and in
+how many plies the game ends. It is generated once, bottom-up from the full
+board, and stored compressed:
+
+    python tablebase.py --size 4 --max-empty 6
+
+At runtime load_tablebase() memory-maps the file and decompresses blocks on
+demand, so ComputerPlayer can answer sparse endgames with a lookup instead
+of searching them again and again.
+
+Positions are indexed by a combinatorial ranking rather than a hash, so
+every position has its own slot and there are no collisions: the number of
+empty cells selects a level, then come the colex rank of the set of empty
+cells, the side to move and the colex rank of X's cells among the occupied
+ones. Each position is one byte, the result in the top two bits and the
+distance to the end of the game in the low six.
+
+File layout (little-endian):
+    header        magic "TTEB", version, N, K, E, positions per block,
+                  position count, block count
+    level starts  (E + 2) uint64 ranks of the first position with e empty
+                  cells, for e = 0 .. E + 1
+    block index   (block count + 1) uint64 offsets into the block data
+    block data    zlib-compressed blocks of one byte per position
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+import zlib
+from itertools import combinations
+from operator import itemgetter
+from win_lines import load_tables
+
+DEFAULT_TABLEBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+
+# Results, from the point of view of the side to move
+DRAW = 0
+WIN = 1
+LOSS = 2
+# Positions that cannot occur in a game, e.g. both sides have a line
+INVALID = 3
+
+MAX_DISTANCE = 63
+
+_MAGIC = b"TTEB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHBBBxIQI")
+_BLOCK_POSITIONS = 1 << 16
+_CACHED_BLOCKS = 64
+
+_INVALID_CODE = INVALID << 6
+
+# Preference of the side that moves into a position, by the position's code:
+# winning sooner beats winning later, which beats a draw, which beats losing
+# later, which beats losing sooner. The parent's code is read back from the
+# best preference with a per-level table (see _parent_codes).
+_PREFERENCE = bytes(
+    255 - (code & MAX_DISTANCE) if code >> 6 == LOSS
+    else 128 if code >> 6 == DRAW
+    else code & MAX_DISTANCE if code >> 6 == WIN
+    else 0
+    for code in range(256)
+)
+
+_loaded = {}
+
+
+def tablebase_path(size, win_length, directory=DEFAULT_TABLEBASE_DIR):
+    """
+    Get the file name of the tablebase for a board.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+        directory: Tablebase directory
+
+    Returns:
+        str: Path of the tablebase file
+    """
+    return os.path.join(directory, f"endgame_{size}x{size}_k{win_length}.bin")
+
+
+def _binomials(n):
+    """
+    Pascal's triangle up to n, padded with zeros.
+
+    Returns:
+        list: binomial[i][j] = i choose j, for 0 <= i <= n and 0 <= j <= n + 1
+    """
+    binomial = [[1] + [0] * (n + 1)]
+    for i in range(1, n + 1):
+        previous = binomial[-1]
+        binomial.append([1] + [previous[j - 1] + previous[j] for j in range(1, n + 2)])
+    return binomial
+
+
+def _level_layout(cells, max_empty):
+    """
+    Work out where each level starts.
+
+    Args:
+        cells: Number of cells on the board
+        max_empty: Largest number of empty cells in the tablebase
+
+    Returns:
+        tuple: (level_starts, slice_sizes) where level_starts has the first
+        rank of each level plus the total at the end and slice_sizes[e] is
+        the number of X placements for one set of e empty cells and one side
+        to move
+    """
+    binomial = _binomials(cells)
+    level_starts = [0]
+    slice_sizes = []
+    for empty in range(max_empty + 1):
+        occupied = cells - empty
+        slice_size = binomial[occupied][occupied // 2]
+        slice_sizes.append(slice_size)
+        level_starts.append(level_starts[-1] + binomial[cells][empty] * 2 * slice_size)
+    return level_starts, slice_sizes
+
+
+def _x_count(occupied, x_to_move):
+    """Number of X marks when `occupied` cells are filled and X is (not) to move."""
+    return occupied // 2 if x_to_move or occupied % 2 == 0 else occupied // 2 + 1
+
+
+def _colex_rank(indices, binomial):
+    """Rank of a sorted index combination in colexicographic order."""
+    rank = 0
+    for position, index in enumerate(indices):
+        rank += binomial[index][position + 1]
+    return rank
+
+
+def _subsets(bits, count):
+    """
+    Every count-element subset of range(bits) as a bit mask, in colex order.
+    """
+    return [
+        sum(1 << index for index in reversed(indices))
+        for indices in sorted(combinations(range(bits), count), key=lambda indices: indices[::-1])
+    ]
+
+
+def _gatherer(indices):
+    """Return a function picking the given indices out of a sequence as a tuple."""
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda sequence: (sequence[index],)
+    return itemgetter(*indices)
+
+
+def _parent_codes(empty):
+    """
+    Translation table from the best preference over a position's moves to
+    the position's own code.
+
+    Args:
+        empty: Number of empty cells of the position
+
+    Returns:
+        bytes: 256-entry table for bytes.translate
+    """
+    table = bytearray([_INVALID_CODE]) * 256
+    for preference in range(1, 64):
+        table[preference] = (LOSS << 6) | min(preference + 1, MAX_DISTANCE)
+    table[128] = (DRAW << 6) | empty
+    for preference in range(192, 256):
+        table[preference] = (WIN << 6) | min(256 - preference, MAX_DISTANCE)
+    return bytes(table)
+
+
+def build_tablebase(size, win_length, max_empty, progress=None):
+    """
+    Solve every position with at most max_empty empty cells.
+
+    Levels are solved in order of empty cells. A position's moves lead to
+    positions one level down, which are already solved, so each level is a
+    lookup and a maximum over the previous one rather than a search.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+        max_empty: Largest number of empty cells to include (at most 63)
+        progress: Optional callable receiving (empty, positions) after
+            each level
+
+    Returns:
+        bytes: One code per position, in rank order
+    """
+    cells = size * size
+    if not 0 <= max_empty <= min(cells, MAX_DISTANCE):
+        raise ValueError(f"max_empty must be between 0 and {min(cells, MAX_DISTANCE)}")
+    binomial = _binomials(cells)
+    level_starts, slice_sizes = _level_layout(cells, max_empty)
+    line_masks = [load_tables(size, win_length).line_mask(line)
+                  for line in range(load_tables(size, win_length).line_count)]
+
+    subsets = {}
+    subset_ranks = {}
+
+    def subsets_of(bits, count):
+        key = (bits, count)
+        if key not in subsets:
+            subsets[key] = _subsets(bits, count)
+            subset_ranks[key] = {mask: rank for rank, mask in enumerate(subsets[key])}
+        return subsets[key]
+
+    # Moves into the occupied position `index` map X placements of a parent
+    # to those of the child; the map depends only on the counts, not on the
+    # actual cells, and is shared by every set of empty cells
+    move_maps = {}
+
+    def move_map(occupied, x_count, index, x_moves):
+        key = (occupied, x_count, index, x_moves)
+        gather = move_maps.get(key)
+        if gather is None:
+            subsets_of(occupied + 1, x_count + x_moves)
+            child_ranks = subset_ranks[(occupied + 1, x_count + x_moves)]
+            low = (1 << index) - 1
+            placed = x_moves << index
+            gather = move_maps[key] = _gatherer([
+                child_ranks[(mask & low) | ((mask & ~low) << 1) | placed]
+                for mask in subsets_of(occupied, x_count)
+            ])
+        return gather
+
+    # Placements in which a line (given as occupied positions) is all X or
+    # all O, as bit sets over placement ranks
+    line_owners = {}
+
+    def owners(occupied, x_count, line):
+        key = (occupied, x_count, line)
+        owned = line_owners.get(key)
+        if owned is None:
+            x_owned = o_owned = 0
+            for rank, mask in enumerate(subsets_of(occupied, x_count)):
+                if mask & line == line:
+                    x_owned |= 1 << rank
+                elif not mask & line:
+                    o_owned |= 1 << rank
+            owned = line_owners[key] = (x_owned, o_owned)
+        return owned
+
+    levels = []
+    previous_preferences = None
+    for empty in range(max_empty + 1):
+        occupied = cells - empty
+        slice_size = slice_sizes[empty]
+        parent_codes = _parent_codes(empty)
+        level = bytearray()
+        for empty_cells in sorted(combinations(range(cells), empty), key=lambda c: c[::-1]):
+            empty_mask = sum(1 << cell for cell in empty_cells)
+            occupied_below = [bin(~empty_mask & ((1 << cell) - 1)).count("1") for cell in range(cells)]
+            full_lines = []
+            for mask in line_masks:
+                if not mask & empty_mask:
+                    line = 0
+                    for cell in range(cells):
+                        if mask >> cell & 1:
+                            line |= 1 << occupied_below[cell]
+                    full_lines.append(line)
+            child_bases = []
+            for cell in empty_cells:
+                child_empty = [other for other in empty_cells if other != cell]
+                child_bases.append(2 * _colex_rank(child_empty, binomial) * slice_sizes[empty - 1]
+                                   if empty else 0)
+
+            for x_to_move in (True, False):
+                x_count = _x_count(occupied, x_to_move)
+                subsets_of(occupied, x_count)
+                if empty:
+                    child_side = 1 if x_to_move else 0
+                    child_size = slice_sizes[empty - 1]
+                    choices = []
+                    for cell, base in zip(empty_cells, child_bases):
+                        start = base + child_side * child_size
+                        gather = move_map(occupied, x_count, occupied_below[cell], int(x_to_move))
+                        choices.append(gather(previous_preferences[start:start + child_size]))
+                    best = choices[0] if len(choices) == 1 else map(max, *choices)
+                    codes = bytearray(bytes(best).translate(parent_codes))
+                else:
+                    codes = bytearray([DRAW << 6]) * slice_size
+
+                # Positions already decided by a line: the side that just
+                # moved has won; a line of the side to move cannot occur
+                x_lines = o_lines = 0
+                for line in full_lines:
+                    x_owned, o_owned = owners(occupied, x_count, line)
+                    x_lines |= x_owned
+                    o_lines |= o_owned
+                mover_lines, waiting_lines = (x_lines, o_lines) if x_to_move else (o_lines, x_lines)
+                decided = x_lines | o_lines
+                while decided:
+                    lowest = decided & -decided
+                    rank = lowest.bit_length() - 1
+                    codes[rank] = _INVALID_CODE if mover_lines & lowest else LOSS << 6
+                    decided ^= lowest
+                level += codes
+
+        levels.append(bytes(level))
+        previous_preferences = levels[-1].translate(_PREFERENCE)
+        if progress:
+            progress(empty, level_starts[empty + 1] - level_starts[empty])
+    return b"".join(levels)
+
+
+def write_tablebase(size, win_length, max_empty, directory=DEFAULT_TABLEBASE_DIR, progress=None):
+    """
+    Generate and compress the tablebase file for a board.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+        max_empty: Largest number of empty cells to include
+        directory: Tablebase directory (created if missing)
+        progress: Optional callable passed on to build_tablebase()
+
+    Returns:
+        str: Path of the written file
+    """
+    codes = build_tablebase(size, win_length, max_empty, progress)
+    level_starts, _ = _level_layout(size * size, max_empty)
+    blocks = [
+        zlib.compress(codes[start:start + _BLOCK_POSITIONS])
+        for start in range(0, len(codes), _BLOCK_POSITIONS)
+    ]
+    offsets = [0]
+    for block in blocks:
+        offsets.append(offsets[-1] + len(block))
+
+    os.makedirs(directory, exist_ok=True)
+    path = tablebase_path(size, win_length, directory)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as tablebase_file:
+        tablebase_file.write(_HEADER.pack(
+            _MAGIC, _VERSION, size, win_length, max_empty, _BLOCK_POSITIONS, len(codes), len(blocks)
+        ))
+        tablebase_file.write(struct.pack(f"<{len(level_starts)}Q", *level_starts))
+        tablebase_file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        for block in blocks:
+            tablebase_file.write(block)
+    os.replace(temporary_path, path)
+    return path
+
+
+class Tablebase:
+    """
+    Read-only view of a tablebase file.
+    """
+
+    def __init__(self, buffer, directory=DEFAULT_TABLEBASE_DIR):
+        """
+        Args:
+            buffer: File contents, usually a read-only mmap
+            directory: Directory the file was loaded from, so worker
+                processes can load it again
+        """
+        (magic, version, size, win_length, max_empty,
+         block_positions, positions, block_count) = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a tablebase file (or an unsupported version)")
+        self.buffer = buffer
+        self.directory = directory
+        self.size = size
+        self.win_length = win_length
+        self.max_empty = max_empty
+        self.positions = positions
+        self._block_positions = block_positions
+        offset = _HEADER.size
+        self._level_starts = struct.unpack_from(f"<{max_empty + 2}Q", buffer, offset)
+        offset += 8 * (max_empty + 2)
+        self._block_offsets = struct.unpack_from(f"<{block_count + 1}Q", buffer, offset)
+        self._data_offset = offset + 8 * (block_count + 1)
+        self._slice_sizes = _level_layout(size * size, max_empty)[1]
+        self._binomial = _binomials(size * size)
+        self._blocks = {}
+        self.probes = 0
+        self.hits = 0
+
+    def __reduce__(self):
+        """Pickle as a reference to the file, which worker processes map again."""
+        return (load_tablebase, (self.size, self.win_length, self.directory))
+
+    def rank(self, empty_mask, x_mask, x_to_move):
+        """
+        Get the index of a position.
+
+        Args:
+            empty_mask: Empty cells (bit row * size + col)
+            x_mask: X's cells
+            x_to_move: True if X is to move
+
+        Returns:
+            int: Rank of the position, or None if it is not in the
+            tablebase (too many empty cells, or mark counts that do not fit
+            the side to move)
+        """
+        cells = self.size * self.size
+        empty_count = bin(empty_mask).count("1")
+        if empty_count > self.max_empty:
+            return None
+        occupied = cells - empty_count
+        x_count = bin(x_mask).count("1")
+        if x_count != _x_count(occupied, x_to_move):
+            return None
+
+        binomial = self._binomial
+        empty_rank = x_rank = 0
+        empty_seen = occupied_seen = x_seen = 0
+        for cell in range(cells):
+            bit = 1 << cell
+            if empty_mask & bit:
+                empty_seen += 1
+                empty_rank += binomial[cell][empty_seen]
+            else:
+                if x_mask & bit:
+                    x_seen += 1
+                    x_rank += binomial[occupied_seen][x_seen]
+                occupied_seen += 1
+        slice_size = self._slice_sizes[empty_count]
+        side = 0 if x_to_move else 1
+        return self._level_starts[empty_count] + (2 * empty_rank + side) * slice_size + x_rank
+
+    def code(self, rank):
+        """
+        Get the stored byte of a position, decompressing its block if needed.
+
+        Args:
+            rank: Rank of the position
+
+        Returns:
+            int: Result in the top two bits, distance in the low six
+        """
+        block_index, index = divmod(rank, self._block_positions)
+        block = self._blocks.get(block_index)
+        if block is None:
+            start = self._data_offset + self._block_offsets[block_index]
+            end = self._data_offset + self._block_offsets[block_index + 1]
+            block = zlib.decompress(self.buffer[start:end])
+            if len(self._blocks) >= _CACHED_BLOCKS:
+                del self._blocks[next(iter(self._blocks))]
+            self._blocks[block_index] = block
+        return block[index]
+
+    def probe(self, board, symbol_to_move):
+        """
+        Look up a board position.
+
+        Args:
+            board: Board to look up
+            symbol_to_move: Symbol of the side to move
+
+        Returns:
+            tuple: (result, distance) from the point of view of the side to
+            move, with result WIN, LOSS or DRAW and distance the number of
+            plies until the game ends, or None if the position is not in the
+            tablebase
+        """
+        if board.size * board.size - board.move_count > self.max_empty:
+            return None
+        self.probes += 1
+        rank = self.rank(board.empty_mask, board.x_mask, symbol_to_move == board.PLAYER_X)
+        if rank is None:
+            return None
+        code = self.code(rank)
+        if code >> 6 == INVALID:
+            return None
+        self.hits += 1
+        return code >> 6, code & MAX_DISTANCE
+
+    def best_move(self, board, symbol):
+        """
+        Pick the best move from the tablebase: the fastest win, else a draw,
+        else the slowest loss. Ties go to the first cell in row-major order.
+
+        The move itself may leave the tablebase's range by one cell, since
+        only the positions after each move are looked up.
+
+        Args:
+            board: Current board
+            symbol: Symbol of the side to move
+
+        Returns:
+            tuple: (row, col) of the move, or None if a position after some
+            move is not in the tablebase
+        """
+        if board.size * board.size - board.move_count > self.max_empty + 1:
+            return None
+        opponent_to_move = symbol == board.PLAYER_O
+        best_preference = -1
+        best_move = None
+        for row, col in board.iter_empty_positions():
+            board.make_move(row, col, symbol)
+            rank = self.rank(board.empty_mask, board.x_mask, opponent_to_move)
+            board.undo_move(row, col)
+            if rank is None:
+                return None
+            preference = _PREFERENCE[self.code(rank)]
+            if preference > best_preference:
+                best_preference = preference
+                best_move = (row, col)
+        return best_move
+
+
+def load_tablebase(size, win_length, directory=DEFAULT_TABLEBASE_DIR):
+    """
+    Get the tablebase for a board, memory-mapping its file. Loaded
+    tablebases are cached for the life of the process.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+        directory: Tablebase directory
+
+    Returns:
+        Tablebase: The tablebase, or None if it has not been generated
+    """
+    key = (size, win_length, directory)
+    if key not in _loaded:
+        path = tablebase_path(size, win_length, directory)
+        tablebase = None
+        if os.path.exists(path):
+            with open(path, "rb") as tablebase_file:
+                buffer = mmap.mmap(tablebase_file.fileno(), 0, access=mmap.ACCESS_READ)
+            tablebase = Tablebase(buffer, directory)
+        _loaded[key] = tablebase
+    return _loaded[key]
+
+
+def main():
+    """Command-line entry point for generating tablebases."""
+    parser = argparse.ArgumentParser(description="Generate endgame tablebases for N x N boards.")
+    parser.add_argument("--size", type=int, default=3, help="board size")
+    parser.add_argument("--win-length", type=int, default=None, help="marks in a row (default: size)")
+    parser.add_argument("--max-empty", type=int, default=None,
+                        help="largest number of empty cells to solve (default: all cells, at most 63)")
+    parser.add_argument("--directory", default=DEFAULT_TABLEBASE_DIR)
+    args = parser.parse_args()
+
+    max_empty = args.max_empty
+    if max_empty is None:
+        max_empty = min(args.size * args.size, MAX_DISTANCE)
+    started_at = time.perf_counter()
+
+    def progress(empty, positions):
+        print(f"  {empty:>2} empty: {positions:>10} positions ({time.perf_counter() - started_at:.1f} s)")
+
+    path = write_tablebase(args.size, args.win_length or args.size, max_empty, args.directory, progress)
+    with open(path, "rb") as tablebase_file:
+        positions = _HEADER.unpack(tablebase_file.read(_HEADER.size))[6]
+    print(f"{path}: {positions} positions in {os.path.getsize(path)} bytes "
+          f"({time.perf_counter() - started_at:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Threat-space search for Tic-Tac-Toe and K-in-a-row boards
+
+A threat is a line holding win_length - 1 of a player's marks and one empty
+cell, so the opponent must block it on the next move. The search below only
+considers attacker moves that create threats, which leaves the defender
+exactly one forced reply each time. That keeps the tree tiny compared to a
+full minimax and finds forced wins that end in a double threat (two open
+winning cells, e.g. an open four in five-in-a-row) many plies deep.
+
+Every win it reports is a genuine forced win. It can miss wins that need a
+quiet (non-threatening) move along the way; callers fall back to a general
+search when it returns None.
+"""
+
+DEFAULT_MAX_DEPTH = 8
+
+
+def _opponent(board, symbol):
+    """Return the symbol of the other player."""
+    return board.PLAYER_X if symbol == board.PLAYER_O else board.PLAYER_O
+
+
+def find_winning_cells(board, symbol):
+    """
+    Find every empty cell that would complete a line for a player.
+
+    Args:
+        board: The current game board
+        symbol: The player's symbol
+
+    Returns:
+        set: (row, col) cells where symbol wins immediately
+    """
+    return set(board.winning_cells(symbol))
+
+
+def _threat_moves(board, symbol):
+    """
+    Find the empty cells where a move creates at least one new threat.
+
+    Args:
+        board: The current game board
+        symbol: The attacking player's symbol
+
+    Returns:
+        list: (row, col) cells in row-major order
+    """
+    grid = board.grid
+    empty = board.EMPTY
+    needed = board.win_length - 2
+    candidates = set()
+
+    for line in board.lines:
+        marks = 0
+        gaps = []
+        for row, col in line:
+            cell = grid[row][col]
+            if cell == symbol:
+                marks += 1
+            elif cell == empty:
+                gaps.append((row, col))
+            else:
+                break
+        else:
+            if marks == needed and len(gaps) == 2:
+                candidates.update(gaps)
+    return sorted(candidates)
+
+
+def find_forced_win(board, symbol, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    Search for a forced win built from consecutive threats.
+
+    Args:
+        board: The current game board (left unchanged)
+        symbol: Symbol of the player to move
+        max_depth: Maximum number of attacker moves in the sequence
+
+    Returns:
+        tuple: (row, col) of the first move of a forced win, or None
+    """
+    refuted = {}
+    return _search(board, symbol, _opponent(board, symbol), max_depth, refuted)
+
+
+def _search(board, attacker, defender, depth, refuted):
+    """
+    Recursive threat-space search with the attacker to move.
+
+    Args:
+        board: Board searched in place (moves are undone before returning)
+        attacker: Symbol of the player looking for a forced win
+        defender: Symbol of the opponent
+        depth: Remaining attacker moves
+        refuted: Maps position keys to the depth they were refuted at
+
+    Returns:
+        tuple: (row, col) of the winning move, or None
+    """
+    own_wins = find_winning_cells(board, attacker)
+    if own_wins:
+        return min(own_wins)
+
+    if depth <= 0 or refuted.get(board.hash_key, -1) >= depth:
+        return None
+
+    # If the defender is threatening to win, the only playable move is the
+    # block, and it only keeps the sequence going if it is itself a threat.
+    defender_wins = find_winning_cells(board, defender)
+    if len(defender_wins) > 1:
+        return None
+    candidates = list(defender_wins) if defender_wins else _threat_moves(board, attacker)
+
+    for row, col in candidates:
+        board.make_move(row, col, attacker)
+        threats = find_winning_cells(board, attacker)
+        found = False
+
+        # Once the defender cannot win on the spot, two threats cannot both
+        # be blocked, and a single threat forces the reply.
+        if threats and not find_winning_cells(board, defender):
+            if len(threats) > 1:
+                found = True
+            else:
+                block_row, block_col = next(iter(threats))
+                board.make_move(block_row, block_col, defender)
+                found = _search(board, attacker, defender, depth - 1, refuted) is not None
+                board.undo_move(block_row, block_col)
+
+        board.undo_move(row, col)
+        if found:
+            return row, col
+
+    refuted[board.hash_key] = depth
+    return None
@@ -0,0 +1,540 @@
+"""
+Transposition tables for the minimax search
+
+A transposition table remembers the scores of positions already searched,
+keyed by the board's Zobrist key, so a position reached through a different
+move order is not searched again. Each entry stores the score, the depth it
+was searched to and whether the score is exact or only a bound from
+alpha-beta pruning.
+
+TranspositionTable is a plain in-process table. SharedTranspositionTable
+lives in multiprocessing.shared_memory, so every worker process of a
+parallel search or tournament reads and writes the same table. It is
+lock-free: each slot stores key ^ data next to data, and a reader accepts
+the slot only if the two words are consistent. A slot torn by a concurrent
+write simply reads as a miss.
+
+Every process publishing statistics to a shared table claims a row of its
+own under one lock shared by the whole process tree. Pools whose workers
+use shared tables pass it to them with
+initializer=init_worker, initargs=(stats_lock(),).
+"""
+import multiprocessing
+import os
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+EXACT = 1
+LOWER_BOUND = 2
+UPPER_BOUND = 3
+
+# Depth recorded for searches that ran to the end of the game
+UNLIMITED_DEPTH = 255
+
+_MASK64 = (1 << 64) - 1
+_VALUE_BITS = 48
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+_VALUE_SCALE = 1 << 32  # fixed point: scores keep 32 fractional bits
+
+_SLOT = struct.Struct("<QQ")
+_STAT_ROWS = 1024
+_STAT_ROW = struct.Struct("<QQQQQQ")  # pid, hits, misses, stores, collisions, torn reads
+_STAT_PID = struct.Struct("<Q")
+
+# Lock serialising statistics row claims across processes (see stats_lock)
+_stats_lock = None
+
+
+def stats_lock():
+    """
+    Get the lock that serialises statistics row claims, creating it in the
+    first process that asks.
+
+    Returns:
+        multiprocessing.Lock: The lock, to be handed to worker processes
+        through init_worker
+    """
+    global _stats_lock
+    if _stats_lock is None:
+        _stats_lock = multiprocessing.Lock()
+    return _stats_lock
+
+
+def init_worker(lock):
+    """
+    Process pool initializer: share the parent's statistics row lock.
+
+    Args:
+        lock: The parent's stats_lock()
+    """
+    global _stats_lock
+    _stats_lock = lock
+
+
+class TranspositionTable:
+    """In-process transposition table backed by a dict."""
+
+    def __init__(self, max_entries=1 << 20):
+        """
+        Args:
+            max_entries: The table is cleared when it grows beyond this size
+        """
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key: Position key
+
+        Returns:
+            tuple: (value, depth, flag), or None if the position is unknown
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, key, value, depth, flag):
+        """
+        Record the result of a search.
+
+        Args:
+            key: Position key
+            value: Score
+            depth: Remaining depth searched (UNLIMITED_DEPTH for full depth)
+            flag: EXACT, LOWER_BOUND or UPPER_BOUND
+        """
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = (value, depth, flag)
+        self.stores += 1
+
+    def flush_metrics(self):
+        """Nothing to publish for an in-process table."""
+
+    def metrics(self):
+        """
+        Get usage statistics.
+
+        Returns:
+            dict: hits, misses, stores, hit_rate and entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+        }
+
+    def clear(self):
+        """Forget every stored position."""
+        self.entries.clear()
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing block without registering it for cleanup here."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block, and a
+        # worker's resource tracker would then unlink it when the worker
+        # exits; skip the registration the way track=False does
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedTranspositionTable:
+    """
+    Fixed-size, lock-free transposition table in shared memory.
+
+    Create it once in the parent process; pickling it (e.g. as an attribute
+    of a ComputerPlayer sent to a worker) only transfers its name, and the
+    worker attaches to the same memory.
+    """
+
+    _attached = {}
+
+    def __init__(self, slots=1 << 20, name=None, create=True):
+        """
+        Args:
+            slots: Number of entries, rounded up to a power of two
+            name: Shared memory block name (generated when creating)
+            create: Create a new block (True) or attach to an existing one
+        """
+        self.slots = 1 << max(slots - 1, 1).bit_length()
+        self._stats_offset = self.slots * _SLOT.size
+        size = self._stats_offset + _STAT_ROWS * _STAT_ROW.size
+        if create:
+            self._memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._memory.buf[:size] = bytes(size)
+        else:
+            self._memory = _attach_shared_memory(name)
+        self.name = self._memory.name
+        self._owner = create
+        self._buffer = self._memory.buf
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.collisions = 0
+        self.torn_reads = 0
+        # Statistics row claimed by this process (see _claim_stats_row)
+        self._stats_pid = None
+        self._stats_row = None
+
+    @classmethod
+    def attach(cls, name, slots):
+        """
+        Attach to a table created by another process (once per process).
+
+        Args:
+            name: Shared memory block name
+            slots: Number of entries the table was created with
+
+        Returns:
+            SharedTranspositionTable: The attached table
+        """
+        table = cls._attached.get(name)
+        if table is None:
+            table = cls._attached[name] = cls(slots, name, create=False)
+        return table
+
+    def __reduce__(self):
+        return (SharedTranspositionTable.attach, (self.name, self.slots))
+
+    @staticmethod
+    def _encode(value, depth, flag):
+        """Pack a score, depth and flag into one 64-bit word."""
+        fixed = int(round(value * _VALUE_SCALE)) & _VALUE_MASK
+        return (fixed << 16) | (depth << 8) | flag
+
+    @staticmethod
+    def _decode(data):
+        """Unpack a word written by _encode."""
+        fixed = data >> 16
+        if fixed >> (_VALUE_BITS - 1):
+            fixed -= 1 << _VALUE_BITS
+        return fixed / _VALUE_SCALE, (data >> 8) & 0xFF, data & 0xFF
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key: Position key (64-bit)
+
+        Returns:
+            tuple: (value, depth, flag), or None if the position is unknown
+        """
+        offset = (key & (self.slots - 1)) * _SLOT.size
+        check, data = _SLOT.unpack_from(self._buffer, offset)
+        if data & 0xFF and check ^ data == key:
+            self.hits += 1
+            return self._decode(data)
+
+        if data & 0xFF:
+            # Either another position lives here, or a concurrent write tore
+            # the slot; a second read tells the two apart.
+            check, data = _SLOT.unpack_from(self._buffer, offset)
+            if check ^ data == key:
+                self.torn_reads += 1
+                self.hits += 1
+                return self._decode(data)
+        self.misses += 1
+        return None
+
+    def store(self, key, value, depth, flag):
+        """
+        Record the result of a search, replacing whatever was in the slot.
+
+        Args:
+            key: Position key (64-bit)
+            value: Score
+            depth: Remaining depth searched (UNLIMITED_DEPTH for full depth)
+            flag: EXACT, LOWER_BOUND or UPPER_BOUND
+        """
+        offset = (key & (self.slots - 1)) * _SLOT.size
+        check, data = _SLOT.unpack_from(self._buffer, offset)
+        if data & 0xFF and check ^ data != key:
+            self.collisions += 1
+        data = self._encode(value, depth, flag)
+        _SLOT.pack_into(self._buffer, offset, (key ^ data) & _MASK64, data)
+        self.stores += 1
+
+    def _claim_stats_row(self):
+        """
+        Get the offset of this process's statistics row, claiming one on the
+        first flush.
+
+        A process takes the first free row from its pid (modulo the number
+        of rows) onwards and keeps it. The check and the claim happen under
+        stats_lock(), so two processes never take the same row.
+
+        Returns:
+            int: Buffer offset of the row
+
+        Raises:
+            RuntimeError: If every row is taken by another process
+        """
+        pid = os.getpid()
+        if self._stats_pid != pid:
+            with stats_lock():
+                for probe in range(_STAT_ROWS):
+                    offset = self._stats_offset + (pid + probe) % _STAT_ROWS * _STAT_ROW.size
+                    if not _STAT_PID.unpack_from(self._buffer, offset)[0]:
+                        break
+                else:
+                    raise RuntimeError(f"All {_STAT_ROWS} statistics rows of the transposition table are taken")
+                _STAT_PID.pack_into(self._buffer, offset, pid)
+            self._stats_pid = pid
+            self._stats_row = offset
+        return self._stats_row
+
+    def flush_metrics(self):
+        """Nothing to publish for an in-process table."""
+
+    def metrics(self):
+        """
+        Get usage statistics.
+
+        Returns:
+            dict: hits, misses, stores, hit_rate and entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+        }
+
+    def clear(self):
+        """Forget every stored position."""
+        self.entries.clear()
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing block without registering it for cleanup here."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block, and a
+        # worker's resource tracker would then unlink it when the worker
+        # exits; skip the registration the way track=False does
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedTranspositionTable:
+    """
+    Fixed-size, lock-free transposition table in shared memory.
+
+    Create it once in the parent process; pickling it (e.g. as an attribute
+    of a ComputerPlayer sent to a worker) only transfers its name, and the
+    worker attaches to the same memory.
+    """
+
+    _attached = {}
+
+    def __init__(self, slots=1 << 20, name=None, create=True):
+        """
+        Args:
+            slots: Number of entries, rounded up to a power of two
+            name: Shared memory block name (generated when creating)
+            create: Create a new block (True) or attach to an existing one
+        """
+        self.slots = 1 << max(slots - 1, 1).bit_length()
+        self._stats_offset = self.slots * _SLOT.size
+        size = self._stats_offset + _STAT_ROWS * _STAT_ROW.size
+        if create:
+            self._memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._memory.buf[:size] = bytes(size)
+        else:
+            self._memory = _attach_shared_memory(name)
+        self.name = self._memory.name
+        self._owner = create
+        self._buffer = self._memory.buf
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.collisions = 0
+        self.torn_reads = 0
+        # Statistics row claimed by this process (see _claim_stats_row)
+        self._stats_pid = None
+        self._stats_row = None
+
+    @classmethod
+    def attach(cls, name, slots):
+        """
+        Attach to a table created by another process (once per process).
+
+        Args:
+            name: Shared memory block name
+            slots: Number of entries the table was created with
+
+        Returns:
+            SharedTranspositionTable: The attached table
+        """
+        table = cls._attached.get(name)
+        if table is None:
+            table = cls._attached[name] = cls(slots, name, create=False)
+        return table
+
+    def __reduce__(self):
+        return (SharedTranspositionTable.attach, (self.name, self.slots))
+
+    @staticmethod
+    def _encode(value, depth, flag):
+        """Pack a score, depth and flag into one 64-bit word."""
+        fixed = int(round(value * _VALUE_SCALE)) & _VALUE_MASK
+        return (fixed << 16) | (depth << 8) | flag
+
+    @staticmethod
+    def _decode(data):
+        """Unpack a word written by _encode."""
+        fixed = data >> 16
+        if fixed >> (_VALUE_BITS - 1):
+            fixed -= 1 << _VALUE_BITS
+        return fixed / _VALUE_SCALE, (data >> 8) & 0xFF, data & 0xFF
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key: Position key (64-bit)
+
+        Returns:
+            tuple: (value, depth, flag), or None if the position is unknown
+        """
+        offset = (key & (self.slots - 1)) * _SLOT.size
+        check, data = _SLOT.unpack_from(self._buffer, offset)
+        if data & 0xFF and check ^ data == key:
+            self.hits += 1
+            return self._decode(data)
+
+        if data & 0xFF:
+            # Either another position lives here, or a concurrent write tore
+            # the slot; a second read tells the two apart.
+            check, data = _SLOT.unpack_from(self._buffer, offset)
+            if check ^ data == key:
+                self.torn_reads += 1
+                self.hits += 1
+                return self._decode(data)
+        self.misses += 1
+        return None
+
+    def store(self, key, value, depth, flag):
+        """
+        Record the result of a search, replacing whatever was in the slot.
+
+        Args:
+            key: Position key (64-bit)
+            value: Score
+            depth: Remaining depth searched (UNLIMITED_DEPTH for full depth)
+            flag: EXACT, LOWER_BOUND or UPPER_BOUND
+        """
+        offset = (key & (self.slots - 1)) * _SLOT.size
+        check, data = _SLOT.unpack_from(self._buffer, offset)
+        if data & 0xFF and check ^ data != key:
+            self.collisions += 1
+        data = self._encode(value, depth, flag)
+        _SLOT.pack_into(self._buffer, offset, (key ^ data) & _MASK64, data)
+        self.stores += 1
+
+    def _claim_stats_row(self):
+        """
+        Get the offset of this process's statistics row, claiming one on the
+        first flush.
+
+        A process takes the first free row from its pid (modulo the number
+        of rows) onwards and keeps it, so processes whose pids map to the
+        same row publish to different rows instead of overwriting each
+        other.
+
+        Returns:
+            int: Buffer offset of the row
+
+        Raises:
+            RuntimeError: If every row is taken by another process
+        """
+        pid = os.getpid()
+        if self._stats_pid != pid:
+            for probe in range(_STAT_ROWS):
+                offset = self._stats_offset + (pid + probe) % _STAT_ROWS * _STAT_ROW.size
+                if not _STAT_PID.unpack_from(self._buffer, offset)[0]:
+                    break
+            else:
+                raise RuntimeError(f"All {_STAT_ROWS} statistics rows of the transposition table are taken")
+            _STAT_PID.pack_into(self._buffer, offset, pid)
+            self._stats_pid = pid
+            self._stats_row = offset
+        return self._stats_row
+
+    def flush_metrics(self):
+        """Publish this process's counters so metrics() in any process sees them."""
+        pid = os.getpid()
+        offset = self._claim_stats_row()
+        _STAT_ROW.pack_into(
+            self._buffer, offset, pid, self.hits, self.misses,
+            self.stores, self.collisions, self.torn_reads,
+        )
+
+    def metrics(self):
+        """
+        Get usage statistics summed over every process that published them.
+
+        Returns:
+            dict: hits, misses, stores, collisions (slots overwritten by a
+            different position), torn_reads (reads that raced a concurrent
+            write, a measure of contention), hit_rate and processes
+        """
+        self.flush_metrics()
+        totals = [0, 0, 0, 0, 0]
+        processes = 0
+        for row in range(_STAT_ROWS):
+            pid, *counters = _STAT_ROW.unpack_from(self._buffer, self._stats_offset + row * _STAT_ROW.size)
+            if pid:
+                processes += 1
+                totals = [total + counter for total, counter in zip(totals, counters)]
+        hits, misses, stores, collisions, torn_reads = totals
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "stores": stores,
+            "collisions": collisions,
+            "torn_reads": torn_reads,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "processes": processes,
+        }
+
+    def clear(self):
+        """Forget every stored position (statistics are kept)."""
+        self._buffer[:self._stats_offset] = bytes(self._stats_offset)
+
+    def close(self):
+        """Detach from the shared memory, unlinking it if this process created it."""
+        self._attached.pop(self.name, None)
+        self._buffer.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
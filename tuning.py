@@ -0,0 +1,361 @@
+"""
+Self-play tuning harness for computer player strength
+
+Plays round-robin matches between computer player configurations (search
+depth, evaluation weights, random-move noise), estimates an Elo rating for
+each configuration and writes a calibrated difficulty ladder that the game
+offers in place of the three fixed levels.
+
+Matches are split into chunks that run in parallel across processes. Every
+finished chunk is recorded in a checkpoint file, so an interrupted run picks
+up where it stopped. With --table-slots the workers share one transposition
+table, so positions one worker has searched are not searched again by the
+others.
+
+Usage: python tuning.py --games-per-pair 200 --workers 4 --output difficulty_ladder.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from analytics import AnalyticsSink, GameRecordBuffer
+from board import Board
+from player import ComputerPlayer
+from pool import BoardPool
+from simulation import play_headless_game
+from transposition import SharedTranspositionTable, init_worker, stats_lock
+
+DEFAULT_LADDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "difficulty_ladder.json")
+
+# Board pools of this worker process by (size, win_length), kept across
+# chunks when tasks ask for pooled boards
+_board_pools = {}
+
+
+def default_configs():
+    """
+    Candidate configurations spanning random play to perfect play.
+
+    Returns:
+        list: Configuration dictionaries with a unique name each
+    """
+    configs = [
+        {"name": "random", "difficulty": 1},
+        {"name": "medium", "difficulty": 2},
+        {"name": "medium-threats", "difficulty": 2, "threat_search": True},
+    ]
+    for noise in (0.5, 0.3, 0.15):
+        configs.append({"name": f"hard-noise-{noise}", "difficulty": 3, "noise": noise})
+    for depth in (1, 2, 3):
+        configs.append({"name": f"hard-depth-{depth}", "difficulty": 3, "max_depth": depth})
+    configs.append({
+        "name": "hard-depth-2-open-lines", "difficulty": 3, "max_depth": 2,
+        "weights": {"open": 1.0},
+    })
+    configs.append({"name": "hard", "difficulty": 3})
+    return configs
+
+
+def _play_chunk(task):
+    """
+    Play one chunk of games between two configurations (worker process).
+
+    Args:
+        task: dict with keys id, a, b (configs), games, size, win_length,
+            seed, table (a SharedTranspositionTable or None), record
+            (collect analytics records of every game) and pooled (recycle
+            boards through this process's pool)
+
+    Returns:
+        dict: The task id with wins for a and b, the number of draws and,
+        if requested, the game records
+    """
+    random.seed(task["seed"])
+    table = task["table"]
+    board_pool = None
+    if task["pooled"]:
+        shape = (task["size"], task["win_length"])
+        board_pool = _board_pools.get(shape)
+        if board_pool is None:
+            board_pool = _board_pools[shape] = BoardPool(*shape)
+        board = board_pool.acquire()
+    else:
+        board = Board(size=task["size"], win_length=task["win_length"])
+    players = [
+        ComputerPlayer.from_config(board.PLAYER_X, task["a"], task["a"]["name"], table),
+        ComputerPlayer.from_config(board.PLAYER_O, task["b"], task["b"]["name"], table),
+    ]
+    records = GameRecordBuffer() if task["record"] else None
+    for game in range(task["games"]):
+        if game:
+            # A pooled board is cleared for the next game, otherwise each
+            # game gets a new one
+            if board_pool:
+                board.reset()
+            else:
+                board = Board(size=task["size"], win_length=task["win_length"])
+        play_headless_game(board, players, game % 2, analytics=records)
+    if board_pool:
+        board_pool.release(board)
+    if table is not None:
+        table.flush_metrics()
+    return {
+        "id": task["id"],
+        "wins_a": players[0].wins,
+        "wins_b": players[1].wins,
+        "draws": players[0].draws,
+        "records": records.records if records else None,
+    }
+
+
+def _load_checkpoint(path, configs, settings):
+    """
+    Load finished chunk results, discarding a checkpoint from another setup.
+
+    Returns:
+        dict: Chunk id -> result
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint.get("configs") != configs or checkpoint.get("settings") != settings:
+        print(f"Checkpoint {path} is for a different run; starting over.")
+        return {}
+    return checkpoint["results"]
+
+
+def _save_checkpoint(path, configs, settings, results):
+    """Atomically write the checkpoint so an interruption cannot corrupt it."""
+    if not path:
+        return
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump({"configs": configs, "settings": settings, "results": results}, checkpoint_file)
+    os.replace(temporary_path, path)
+
+
+def run_tournament(configs, games_per_pair=100, size=3, win_length=None, workers=None,
+                   chunk_games=20, checkpoint_path=None, seed=0, table_slots=None,
+                   analytics_path=None, pooled=False):
+    """
+    Play a round robin between all configurations.
+
+    Args:
+        configs: Configuration dictionaries (see ComputerPlayer.from_config)
+        games_per_pair: Games played between every pair of configurations
+        size: Board size
+        win_length: Marks in a row needed to win (defaults to size)
+        workers: Worker processes (defaults to the number of CPUs)
+        chunk_games: Games per unit of work and per checkpoint entry
+        checkpoint_path: File to resume from and record progress in
+        seed: Base random seed; each chunk derives its own from it
+        table_slots: Size of a transposition table shared by all workers
+            (None gives every search its own, empty one)
+        analytics_path: SQLite database recording every game played (games
+            restored from the checkpoint are not recorded again)
+        pooled: Recycle boards through a pool in each worker instead of
+            building a new board per game
+
+    Returns:
+        list: Per-pair results as dicts with a, b, wins_a, wins_b and draws
+    """
+    settings = {"games_per_pair": games_per_pair, "size": size,
+                "win_length": win_length, "chunk_games": chunk_games, "seed": seed}
+    results = _load_checkpoint(checkpoint_path, configs, settings)
+
+    tasks = []
+    for i in range(len(configs)):
+        for j in range(i + 1, len(configs)):
+            for chunk, start in enumerate(range(0, games_per_pair, chunk_games)):
+                task_id = f"{i}-{j}-{chunk}"
+                if task_id in results:
+                    continue
+                tasks.append({
+                    "id": task_id, "a": configs[i], "b": configs[j],
+                    "games": min(chunk_games, games_per_pair - start),
+                    "size": size, "win_length": win_length,
+                    "seed": seed * 1000003 + i * 10007 + j * 101 + chunk,
+                })
+
+    if tasks:
+        print(f"{len(results)} chunks restored from checkpoint, {len(tasks)} to play.")
+        table = SharedTranspositionTable(table_slots) if table_slots else None
+        analytics = None
+        if analytics_path:
+            analytics = AnalyticsSink(analytics_path, "tournament", size, win_length)
+        for task in tasks:
+            task["table"] = table
+            task["record"] = analytics is not None
+            task["pooled"] = pooled
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(stats_lock(),)) as executor:
+                futures = [executor.submit(_play_chunk, task) for task in tasks]
+                for done, future in enumerate(as_completed(futures), 1):
+                    result = future.result()
+                    records = result.pop("records")
+                    if analytics:
+                        analytics.add_records(records)
+                        analytics.flush()
+                    results[result.pop("id")] = result
+                    _save_checkpoint(checkpoint_path, configs, settings, results)
+                    if done % 10 == 0 or done == len(tasks):
+                        print(f"  {done}/{len(tasks)} chunks played")
+            if table is not None:
+                metrics = table.metrics()
+                print(f"Shared transposition table: hit rate {metrics['hit_rate']:.1%}, "
+                      f"{metrics['collisions']} collisions, {metrics['torn_reads']} torn reads")
+        finally:
+            if table is not None:
+                table.close()
+            if analytics:
+                analytics.close()
+
+    pairs = {}
+    for task_id, result in results.items():
+        i, j, _ = (int(part) for part in task_id.split("-"))
+        pair = pairs.setdefault((i, j), {"a": i, "b": j, "wins_a": 0, "wins_b": 0, "draws": 0})
+        pair["wins_a"] += result["wins_a"]
+        pair["wins_b"] += result["wins_b"]
+        pair["draws"] += result["draws"]
+    return list(pairs.values())
+
+
+def estimate_elo(count, pairs, iterations=1000, prior_draws=1.0):
+    """
+    Fit Bradley-Terry strengths to the match results and express them as
+    Elo ratings relative to the first configuration.
+
+    Args:
+        count: Number of configurations
+        pairs: Per-pair results from run_tournament
+        iterations: Minorisation-maximisation iterations
+        prior_draws: Virtual draws added to every pair so players that
+            never score (or never drop points) still get finite ratings
+
+    Returns:
+        list: Elo rating per configuration (first configuration is 0)
+    """
+    scores = [0.0] * count
+    games = [[0.0] * count for _ in range(count)]
+    for pair in pairs:
+        a, b = pair["a"], pair["b"]
+        played = pair["wins_a"] + pair["wins_b"] + pair["draws"] + prior_draws
+        scores[a] += pair["wins_a"] + (pair["draws"] + prior_draws) / 2
+        scores[b] += pair["wins_b"] + (pair["draws"] + prior_draws) / 2
+        games[a][b] += played
+        games[b][a] += played
+
+    strengths = [1.0] * count
+    for _ in range(iterations):
+        updated = []
+        for i in range(count):
+            denominator = sum(
+                games[i][j] / (strengths[i] + strengths[j])
+                for j in range(count) if games[i][j]
+            )
+            updated.append(scores[i] / denominator if denominator else strengths[i])
+        strengths = updated
+
+    reference = strengths[0]
+    return [400 * math.log10(strength / reference) for strength in strengths]
+
+
+def build_ladder(configs, ratings, levels=None, min_gap=50.0):
+    """
+    Turn rated configurations into an ordered difficulty ladder.
+
+    Args:
+        configs: Configuration dictionaries
+        ratings: Elo rating per configuration
+        levels: Maximum number of levels (None keeps every distinct one)
+        min_gap: Configurations closer than this in Elo to the level below
+            are dropped, so every step is a measurable increase
+
+    Returns:
+        list: Ladder entries with level, name, elo and config
+    """
+    ranked = sorted(zip(ratings, range(len(configs))))
+    chosen = []
+    for rating, index in ranked:
+        if not chosen or rating - chosen[-1][0] >= min_gap:
+            chosen.append((rating, index))
+    if levels == 1:
+        chosen = chosen[-1:]
+    elif levels and len(chosen) > levels:
+        step = (len(chosen) - 1) / (levels - 1)
+        chosen = [chosen[round(level * step)] for level in range(levels)]
+    return [
+        {"level": level, "name": configs[index]["name"], "elo": round(rating, 1),
+         "config": configs[index]}
+        for level, (rating, index) in enumerate(chosen, 1)
+    ]
+
+
+def load_ladder(path=DEFAULT_LADDER_PATH):
+    """
+    Load a difficulty ladder written by this module.
+
+    Args:
+        path: Ladder file
+
+    Returns:
+        dict: size and win_length of the board the ladder was calibrated
+        on and its levels (ladder entries), or None if the file does not
+        exist; files from before the board was recorded have a size and
+        win_length of None
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as ladder_file:
+        ladder = json.load(ladder_file)
+    if isinstance(ladder, list):
+        return {"size": None, "win_length": None, "levels": ladder}
+    return ladder
+
+
+def main():
+    """Command-line entry point for tuning runs."""
+    parser = argparse.ArgumentParser(description="Calibrate computer player strength by self-play.")
+    parser.add_argument("--games-per-pair", type=int, default=100)
+    parser.add_argument("--chunk-games", type=int, default=20, help="games per unit of work")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPUs)")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win-length", type=int, default=None)
+    parser.add_argument("--levels", type=int, default=None, help="maximum ladder levels")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--table-slots", type=int, default=None,
+                        help="entries in a transposition table shared by all workers")
+    parser.add_argument("--analytics", default=None,
+                        help="record every game in this SQLite database (see analytics_queries.py)")
+    parser.add_argument("--pooled", action="store_true",
+                        help="reuse pooled boards instead of allocating one per game")
+    parser.add_argument("--checkpoint", default="tuning_checkpoint.json")
+    parser.add_argument("--output", default=DEFAULT_LADDER_PATH)
+    args = parser.parse_args()
+
+    configs = default_configs()
+    pairs = run_tournament(
+        configs, args.games_per_pair, args.size, args.win_length,
+        args.workers, args.chunk_games, args.checkpoint, args.seed, args.table_slots,
+        args.analytics, args.pooled,
+    )
+    ratings = estimate_elo(len(configs), pairs)
+
+    print("\nRatings:")
+    for rating, config in sorted(zip(ratings, configs), key=lambda item: item[0]):
+        print(f"  {rating:7.1f}  {config['name']}")
+
+    ladder = build_ladder(configs, ratings, args.levels)
+    # The levels are only calibrated for the board they were played on
+    win_length = Board(size=args.size, win_length=args.win_length).win_length
+    with open(args.output, "w", encoding="utf-8") as ladder_file:
+        json.dump({"size": args.size, "win_length": win_length, "levels": ladder}, ladder_file, indent=2)
+    print(f"\nDifficulty ladder with {len(ladder)} levels written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
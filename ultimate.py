@@ -0,0 +1,333 @@
+"""
+Ultimate Tic-Tac-Toe engine
+
+A 3x3 grid of small boards. Winning a small board claims its square of the
+big (meta) board, and three claimed squares in a row win the game. Each
+move sends the opponent to the small board matching the cell just played;
+if that board is already won or full, the opponent may play in any open
+board.
+
+UltimateBoard keeps each small board as a pair of 9-bit masks and the meta
+board as won / closed masks, all updated incrementally by make_move and
+undo_move: a move only ever checks its own small board (one table lookup)
+and, if that board was won, the meta board (another lookup). It offers the
+same interface as Board - (row, col) moves on the 9x9 grid, check_winner,
+is_full, get_empty_positions (the legal moves under the sent-to rule),
+hash_key, get_copy - so the computer players search it through the
+"ultimate" rule variant (see variants.py) without ever copying boards.
+"""
+import random
+from board import ZOBRIST_SIDE
+from ui_utils import Colors, colored_text
+
+# next_board value when the player to move may choose any open board
+ANY_BOARD = 9
+
+_FULL = 0x1FF
+LINES = (0b000000111, 0b000111000, 0b111000000, 0b001001001,
+         0b010010010, 0b100100100, 0b100010001, 0b001010100)
+# _WINNING[mask] is True if the 9-bit mask holds a complete line
+_WINNING = tuple(any(mask & line == line for line in LINES) for mask in range(512))
+# MASK_BITS[mask] lists the set bits of a 9-bit mask
+MASK_BITS = tuple(tuple(bit for bit in range(9) if mask >> bit & 1) for mask in range(512))
+
+# Grid coordinates of (small board, cell) and back
+_GRID = tuple(
+    tuple((sub // 3 * 3 + cell // 3, sub % 3 * 3 + cell % 3) for cell in range(9))
+    for sub in range(9)
+)
+_SUB_CELL = {_GRID[sub][cell]: (sub, cell) for sub in range(9) for cell in range(9)}
+
+_rng = random.Random("ultimate-zobrist")
+# Key for cell index sub * 9 + cell at 2 * index for X and 2 * index + 1
+# for O, and for each board the player to move is sent to
+_ZOBRIST = tuple(_rng.getrandbits(64) for _ in range(2 * 81))
+_NEXT_KEYS = tuple(_rng.getrandbits(64) for _ in range(ANY_BOARD)) + (0,)
+
+
+class UltimateBoard:
+    """
+    Ultimate Tic-Tac-Toe position with packed small boards and an
+    incrementally tracked meta board.
+    """
+
+    __slots__ = (
+        "EMPTY", "PLAYER_X", "PLAYER_O", "x_boards", "o_boards", "meta_x", "meta_o", "closed",
+        "next_board", "move_count", "hash_key", "_winner", "_history",
+    )
+
+    # The 9x9 grid, for code written against Board
+    size = 9
+    win_length = 3
+    positions = {index + 1: divmod(index, 9) for index in range(81)}
+
+    def __init__(self, empty_symbol="⬜️", player_x_symbol="❌", player_o_symbol="⭕"):
+        """
+        Initialize an empty board.
+
+        Args:
+            empty_symbol: Symbol for empty cells
+            player_x_symbol: Symbol for player X
+            player_o_symbol: Symbol for player O
+        """
+        self.EMPTY = empty_symbol
+        self.PLAYER_X = player_x_symbol
+        self.PLAYER_O = player_o_symbol
+        self.reset()
+
+    def reset(self):
+        """Reset the board to its initial empty state."""
+        # Cells of each small board (bit row * 3 + col)
+        self.x_boards = [0] * 9
+        self.o_boards = [0] * 9
+        # Small boards won by each side, and small boards won or full
+        self.meta_x = 0
+        self.meta_o = 0
+        self.closed = 0
+        self.next_board = ANY_BOARD
+        self.move_count = 0
+        self.hash_key = 0
+        self._winner = None
+        # next_board before each move, for undo_move
+        self._history = []
+
+    def get_copy(self):
+        """
+        Create a copy of the current position.
+
+        Returns:
+            UltimateBoard: A new board with the same state
+        """
+        new_board = UltimateBoard(self.EMPTY, self.PLAYER_X, self.PLAYER_O)
+        new_board.x_boards = self.x_boards[:]
+        new_board.o_boards = self.o_boards[:]
+        new_board.meta_x = self.meta_x
+        new_board.meta_o = self.meta_o
+        new_board.closed = self.closed
+        new_board.next_board = self.next_board
+        new_board.move_count = self.move_count
+        new_board.hash_key = self.hash_key
+        new_board._winner = self._winner
+        new_board._history = self._history[:]
+        return new_board
+
+    def is_valid_move(self, row, col):
+        """
+        Check if a move is legal: on the grid, on an empty cell, in the board
+        the player was sent to (or any open board) and before the game ended.
+
+        Args:
+            row: Row index on the 9x9 grid
+            col: Column index on the 9x9 grid
+
+        Returns:
+            bool: True if the move is valid, False otherwise
+        """
+        sub_cell = _SUB_CELL.get((row, col))
+        if sub_cell is None or self._winner is not None:
+            return False
+        sub, cell = sub_cell
+        if self.closed >> sub & 1 or (self.next_board != ANY_BOARD and sub != self.next_board):
+            return False
+        return not (self.x_boards[sub] | self.o_boards[sub]) >> cell & 1
+
+    def make_move(self, row, col, symbol):
+        """
+        Place a symbol and send the opponent to the matching small board.
+
+        Args:
+            row: Row index on the 9x9 grid
+            col: Column index on the 9x9 grid
+            symbol: Symbol to place (PLAYER_X or PLAYER_O)
+
+        Returns:
+            bool: True if move was successful, False otherwise
+        """
+        if not self.is_valid_move(row, col):
+            return False
+
+        sub, cell = _SUB_CELL[row, col]
+        bit = 1 << cell
+        is_o = symbol != self.PLAYER_X
+        boards = self.o_boards if is_o else self.x_boards
+        marks = boards[sub] = boards[sub] | bit
+
+        # Only this small board can have changed hands
+        if _WINNING[marks]:
+            sub_bit = 1 << sub
+            self.closed |= sub_bit
+            if is_o:
+                self.meta_o |= sub_bit
+                if _WINNING[self.meta_o]:
+                    self._winner = symbol
+            else:
+                self.meta_x |= sub_bit
+                if _WINNING[self.meta_x]:
+                    self._winner = symbol
+        elif self.x_boards[sub] | self.o_boards[sub] == _FULL:
+            self.closed |= 1 << sub
+
+        previous = self.next_board
+        self._history.append(previous)
+        self.next_board = ANY_BOARD if self.closed >> cell & 1 else cell
+        self.move_count += 1
+        self.hash_key ^= (_ZOBRIST[2 * (sub * 9 + cell) + is_o] ^ ZOBRIST_SIDE
+                          ^ _NEXT_KEYS[previous] ^ _NEXT_KEYS[self.next_board])
+        return True
+
+    def undo_move(self, row, col):
+        """
+        Take back the most recent move, reverting make_move.
+
+        Args:
+            row: Row index of the last move on the 9x9 grid
+            col: Column index of the last move on the 9x9 grid
+
+        Returns:
+            bool: True if a symbol was removed, False if the cell was empty
+        """
+        sub, cell = _SUB_CELL[row, col]
+        bit = 1 << cell
+        if self.x_boards[sub] & bit:
+            is_o = False
+            self.x_boards[sub] ^= bit
+        elif self.o_boards[sub] & bit:
+            is_o = True
+            self.o_boards[sub] ^= bit
+        else:
+            return False
+
+        # The move can only have closed its own small board, and no move
+        # follows a win
+        sub_bit = 1 << sub
+        if self.closed & sub_bit:
+            self.closed ^= sub_bit
+            self.meta_x &= ~sub_bit
+            self.meta_o &= ~sub_bit
+        self._winner = None
+
+        previous = self._history.pop()
+        self.hash_key ^= (_ZOBRIST[2 * (sub * 9 + cell) + is_o] ^ ZOBRIST_SIDE
+                          ^ _NEXT_KEYS[previous] ^ _NEXT_KEYS[self.next_board])
+        self.next_board = previous
+        self.move_count -= 1
+        return True
+
+    def check_winner(self):
+        """
+        Check if a player has three small boards in a row.
+
+        Returns:
+            Symbol of the winner (PLAYER_X or PLAYER_O) or None if no winner
+        """
+        return self._winner
+
+    def is_full(self):
+        """
+        Check if no move is left: every small board is won or full.
+
+        Returns:
+            bool: True if the game cannot continue, False otherwise
+        """
+        return self.closed == _FULL
+
+    def get_empty_positions(self):
+        """
+        Get the legal moves: the empty cells of the small board the player
+        was sent to, or of every open small board.
+
+        Returns:
+            list: (row, col) tuples on the 9x9 grid
+        """
+        if self._winner is not None:
+            return []
+        x_boards = self.x_boards
+        o_boards = self.o_boards
+        if self.next_board != ANY_BOARD:
+            subs = (self.next_board,)
+        else:
+            subs = MASK_BITS[~self.closed & _FULL]
+        moves = []
+        for sub in subs:
+            grid = _GRID[sub]
+            moves.extend(grid[cell] for cell in MASK_BITS[~(x_boards[sub] | o_boards[sub]) & _FULL])
+        return moves
+
+    @property
+    def grid(self):
+        """The 9x9 grid of symbols, built on demand (e.g. for renderers)."""
+        rows = [[self.EMPTY] * 9 for _ in range(9)]
+        for sub in range(9):
+            grid = _GRID[sub]
+            for boards, symbol in ((self.x_boards, self.PLAYER_X), (self.o_boards, self.PLAYER_O)):
+                for cell in MASK_BITS[boards[sub]]:
+                    row, col = grid[cell]
+                    rows[row][col] = symbol
+        return rows
+
+    def sub_board_winner(self, sub):
+        """
+        Get the owner of a small board.
+
+        Args:
+            sub: Small board index (board row * 3 + board column)
+
+        Returns:
+            Symbol of the player who won it, or None
+        """
+        if self.meta_x >> sub & 1:
+            return self.PLAYER_X
+        if self.meta_o >> sub & 1:
+            return self.PLAYER_O
+        return None
+
+    def display(self):
+        """
+        Display the grid with the small boards outlined, the boards already
+        won and the board the next player must play in.
+        """
+        print(render_ultimate(self), end="", flush=True)
+
+
+def render_ultimate(board):
+    """
+    Render an ultimate board as it is shown to players, as a single string.
+
+    Args:
+        board: UltimateBoard to render
+
+    Returns:
+        str: The frame
+    """
+    grid = board.grid
+    separator = "  " + "+".join(["-" * 11] * 3)
+    lines = ["", "  Current Board:", separator]
+    for row in range(9):
+        blocks = []
+        for block in range(3):
+            cells = []
+            for col in range(block * 3, block * 3 + 3):
+                cell = grid[row][col]
+                if cell == board.PLAYER_X:
+                    cells.append(colored_text(" X", Colors.RED))
+                elif cell == board.PLAYER_O:
+                    cells.append(colored_text(" O", Colors.GREEN))
+                elif board.is_valid_move(row, col):
+                    cells.append(colored_text(str(row * 9 + col + 1).rjust(2), Colors.BLUE))
+                else:
+                    cells.append(" .")
+            blocks.append(" ".join(cells) + " ")
+        lines.append("  " + "|".join(blocks))
+        if row % 3 == 2:
+            lines.append(separator)
+
+    won = [f"{sub + 1}: {board.sub_board_winner(sub)}" for sub in range(9) if board.sub_board_winner(sub)]
+    if won:
+        lines.append("  Boards won: " + ", ".join(won))
+    if board.check_winner() is None and not board.is_full():
+        if board.next_board == ANY_BOARD:
+            lines.append("  Next move: any open board")
+        else:
+            lines.append(f"  Next move: board {board.next_board + 1} (numbered cells)")
+    lines.append("")
+    return "\n".join(lines) + "\n"
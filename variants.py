@@ -0,0 +1,326 @@
+"""
+Rule variants for Tic-Tac-Toe
+
+The standard game is played by Board, TicTacToeGame and ComputerPlayer
+directly and never goes through this module, so its hot paths stay as they
+are. A RuleVariant plugs other rules into the same core board: it says
+which moves a player may make, who (if anyone) has won after a move, when
+the game is drawn, and how good an unfinished position looks when the
+search has to stop early. ComputerPlayer searches any variant through
+these hooks (see ComputerPlayer._get_variant_move).
+
+Players keep their symbols as identities - X and O - even in variants where
+either mark may be placed; the winner is always reported as a player's
+symbol.
+
+    misere           Three in a row loses
+    wild             Either mark on your turn; completing a line of
+                     either mark wins
+    order-and-chaos  6x6, either mark on your turn; Order (X, moves first)
+                     wins with five in a row of either mark, Chaos (O)
+                     wins if the board fills up without one
+    ultimate         Nine small boards; win three in a row of them, and
+                     each move sends the opponent to a small board (see
+                     ultimate.py)
+"""
+from board import Board
+from evaluation import Evaluator
+from ultimate import MASK_BITS, LINES, UltimateBoard
+from win_lines import load_tables
+
+
+class RuleVariant:
+    """
+    Base class for rule variants; the defaults are the standard rules.
+    """
+
+    name = "standard"
+    title = "Standard"
+    description = "Three in a row wins"
+    default_size = 3
+    default_win_length = None
+    # True if players may place either mark, so moves carry the mark
+    free_marks = False
+    # True if X always makes the first move
+    x_moves_first = False
+    # Plies the hard computer player searches before scoring positions
+    # heuristically (None searches to the end of the game)
+    default_max_depth = None
+
+    def __init__(self, size=None, win_length=None):
+        """
+        Args:
+            size: Board size (defaults to the variant's)
+            win_length: Marks in a row that count as a line (defaults to the
+                variant's, or the board size)
+        """
+        self.size = size or self.default_size
+        self.win_length = win_length or self.default_win_length or self.size
+        self._line_masks = None
+
+    def new_board(self):
+        """
+        Create an empty board for the variant.
+
+        Returns:
+            Board: Board of the variant's size and win length
+        """
+        return Board(size=self.size, win_length=self.win_length)
+
+    def moves(self, board, symbol):
+        """
+        Get the moves a player may make.
+
+        Args:
+            board: The current game board
+            symbol: Symbol of the player to move
+
+        Returns:
+            list: (row, col, mark) tuples
+        """
+        if self.free_marks:
+            marks = (board.PLAYER_X, board.PLAYER_O)
+            return [(row, col, mark) for row, col in board.get_empty_positions() for mark in marks]
+        return [(row, col, symbol) for row, col in board.get_empty_positions()]
+
+    def winner(self, board, mover):
+        """
+        Decide who has won after a move.
+
+        Args:
+            board: Board with the move made
+            mover: Symbol of the player who just moved
+
+        Returns:
+            Symbol of the winning player, or None if nobody has won
+        """
+        return board.check_winner()
+
+    def is_draw(self, board):
+        """
+        Check whether a position without a winner ends the game drawn.
+
+        Args:
+            board: The current game board
+
+        Returns:
+            bool: True if the game is over without a winner
+        """
+        return board.is_full()
+
+    def evaluate(self, board, symbol):
+        """
+        Score an unfinished position heuristically.
+
+        Args:
+            board: The board to score
+            symbol: Player whose point of view the score is from
+
+        Returns:
+            float: Score in the open interval (-1, 1), so proven wins and
+            losses always outrank it
+        """
+        return 0.0
+
+    def opponent(self, board, symbol):
+        """Return the symbol of the other player."""
+        return board.PLAYER_X if symbol == board.PLAYER_O else board.PLAYER_O
+
+    def line_masks(self, board):
+        """
+        Get the bit masks of every line of the board, built on first use.
+
+        Args:
+            board: Board of the variant's size and win length
+
+        Returns:
+            tuple: Line masks (bit row * size + col)
+        """
+        if self._line_masks is None:
+            self._line_masks = load_tables(board.size, board.win_length).masks()
+        return self._line_masks
+
+
+class StandardRules(RuleVariant):
+    """
+    The standard rules through the variant hooks, as a reference for the
+    other variants; games without a variant use the faster core directly.
+    """
+
+    def __init__(self, size=None, win_length=None):
+        super().__init__(size, win_length)
+        self._evaluator = Evaluator()
+
+    def evaluate(self, board, symbol):
+        return self._evaluator.score(board, symbol)
+
+
+class MisereRules(StandardRules):
+    """Completing a line of your own marks loses."""
+
+    name = "misere"
+    title = "Misère"
+    description = "Three in a row loses"
+
+    def winner(self, board, mover):
+        line_owner = board.check_winner()
+        return self.opponent(board, line_owner) if line_owner is not None else None
+
+    def evaluate(self, board, symbol):
+        return -self._evaluator.score(board, symbol)
+
+
+class WildRules(RuleVariant):
+    """Either mark may be placed; whoever completes a line wins."""
+
+    name = "wild"
+    title = "Wild"
+    description = "Place X or O on your turn; whoever completes a line of either wins"
+    free_marks = True
+
+    def winner(self, board, mover):
+        return mover if board.check_winner() is not None else None
+
+
+class OrderAndChaosRules(RuleVariant):
+    """
+    Order (X) wants five in a row of either mark, Chaos (O) a full board
+    without one. Any line of five counts, including five of a row of six.
+    """
+
+    name = "order-and-chaos"
+    title = "Order and Chaos"
+    description = "Order (X) needs five in a row of either mark; Chaos (O) wins if the board fills up"
+    default_size = 6
+    default_win_length = 5
+    free_marks = True
+    x_moves_first = True
+    default_max_depth = 3
+
+    # Raw score that maps to a normalised score of 0.5
+    SCALE = 16.0
+
+    def winner(self, board, mover):
+        if board.check_winner() is not None:
+            return board.PLAYER_X
+        if board.is_full():
+            return board.PLAYER_O
+        return None
+
+    def is_draw(self, board):
+        return False
+
+    def evaluate(self, board, symbol):
+        # Lines holding only one kind of mark are Order's chances, growing
+        # fourfold per mark; lines holding both are dead, a small gain for
+        # Chaos
+        x_mask = board.x_mask
+        o_mask = ~(board.empty_mask | x_mask)
+        raw = 0.0
+        for mask in self.line_masks(board):
+            x_marks = (x_mask & mask).bit_count()
+            o_marks = (o_mask & mask).bit_count()
+            if x_marks and o_marks:
+                raw -= 1.0
+            elif x_marks or o_marks:
+                raw += 4.0 ** (x_marks + o_marks - 1)
+        if symbol != board.PLAYER_X:
+            raw = -raw
+        return raw / (abs(raw) + self.SCALE)
+
+
+class UltimateRules(RuleVariant):
+    """
+    Ultimate Tic-Tac-Toe on an UltimateBoard, whose legal moves, winner and
+    full-board check already follow the sent-to rule.
+    """
+
+    name = "ultimate"
+    title = "Ultimate"
+    description = ("Win three small boards in a row; your move's cell picks "
+                   "the small board your opponent plays in next")
+    default_size = 9
+    default_win_length = 3
+    default_max_depth = 6
+
+    # Raw score that maps to a normalised score of 0.5
+    SCALE = 12.0
+    # Value of a won small board by position: center, corners, edges
+    BOARD_WEIGHTS = (3.0, 2.0, 3.0, 2.0, 4.0, 2.0, 3.0, 2.0, 3.0)
+
+    def __init__(self, size=None, win_length=None):
+        super().__init__(9, 3)
+        # Two-in-a-row counts of small boards by (X cells, O cells)
+        self._local_scores = {}
+
+    def new_board(self):
+        return UltimateBoard()
+
+    def _local_score(self, x_cells, o_cells):
+        """Open lines X is one cell from completing, minus O's, in a small board."""
+        key = x_cells << 9 | o_cells
+        score = self._local_scores.get(key)
+        if score is None:
+            score = 0
+            for line in LINES:
+                x_marks = (x_cells & line).bit_count()
+                o_marks = (o_cells & line).bit_count()
+                if x_marks == 2 and not o_marks:
+                    score += 1
+                elif o_marks == 2 and not x_marks:
+                    score -= 1
+            self._local_scores[key] = score
+        return score
+
+    def evaluate(self, board, symbol):
+        # Won small boards by position, meta lines one board from complete,
+        # and near-complete lines inside the open small boards
+        raw = 0.0
+        weights = self.BOARD_WEIGHTS
+        for sub in MASK_BITS[board.meta_x]:
+            raw += weights[sub]
+        for sub in MASK_BITS[board.meta_o]:
+            raw -= weights[sub]
+        for line in LINES:
+            x_boards = (board.meta_x & line).bit_count()
+            o_boards = (board.meta_o & line).bit_count()
+            if x_boards == 2 and not o_boards:
+                raw += 4.0
+            elif o_boards == 2 and not x_boards:
+                raw -= 4.0
+        x_cells = board.x_boards
+        o_cells = board.o_boards
+        for sub in MASK_BITS[~board.closed & 0x1FF]:
+            raw += 0.5 * self._local_score(x_cells[sub], o_cells[sub])
+        if symbol != board.PLAYER_X:
+            raw = -raw
+        return raw / (abs(raw) + self.SCALE)
+
+
+VARIANTS = {
+    variant.name: variant
+    for variant in (StandardRules, MisereRules, WildRules, OrderAndChaosRules, UltimateRules)
+}
+
+
+def get_variant(name, size=None, win_length=None):
+    """
+    Create a rule variant by name.
+
+    Args:
+        name: Key of VARIANTS
+        size: Optional board size overriding the variant's
+        win_length: Optional line length overriding the variant's
+
+    Returns:
+        RuleVariant: The variant, or None for the standard rules, which are
+        played by the core classes without a variant
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name not in VARIANTS:
+        raise ValueError(f"Unknown rule variant '{name}' (choose from {', '.join(VARIANTS)})")
+    if name == StandardRules.name:
+        return None
+    return VARIANTS[name](size, win_length)
@@ -0,0 +1,278 @@
+"""
+Precomputed win-line tables for N x N boards with K in a row
+
+For every (N, K) the tables list each winning line's cells, the lines that
+pass through each cell and a bit mask per line (bit row * N + col). They can
+be generated once into compact binary files:
+
+    python win_lines.py --size 15 --win-length 5
+
+At runtime load_tables() memory-maps the file read-only, so building a board
+does no geometry work and every process shares the same pages through the
+operating system. Rows are decoded lazily, the first time a cell or line is
+used. Without a file the same tables are built in memory.
+
+File layout (little-endian):
+    header        magic "TTWL", version, N, K, mask bytes, line count,
+                  membership count
+    line cells    line count * K uint16 cell indices
+    cell offsets  (N * N + 1) uint32 offsets into the membership list
+    membership    uint16 line indices, grouped by cell
+    line masks    line count * mask bytes
+"""
+import argparse
+import mmap
+import os
+import struct
+
+DEFAULT_TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "win_line_tables")
+
+_MAGIC = b"TTWL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHHHII")
+_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+_loaded = {}
+
+
+def table_path(size, win_length, directory=DEFAULT_TABLE_DIR):
+    """
+    Get the file name of the tables for a board.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+        directory: Table directory
+
+    Returns:
+        str: Path of the table file
+    """
+    return os.path.join(directory, f"lines_{size}x{size}_k{win_length}.bin")
+
+
+def build_tables(size, win_length):
+    """
+    Compute the tables for a board.
+
+    Lines are ordered by direction (rows, columns, diagonals, anti-diagonals)
+    and then by their first cell in row-major order.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+
+    Returns:
+        bytes: The tables in the file layout described above
+    """
+    lines = []
+    for d_row, d_col in _DIRECTIONS:
+        for row in range(size):
+            for col in range(size):
+                end_row = row + d_row * (win_length - 1)
+                end_col = col + d_col * (win_length - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    lines.append([
+                        (row + d_row * i) * size + col + d_col * i
+                        for i in range(win_length)
+                    ])
+
+    lines_of_cell = [[] for _ in range(size * size)]
+    for line_index, cells in enumerate(lines):
+        for cell in cells:
+            lines_of_cell[cell].append(line_index)
+
+    mask_bytes = (size * size + 7) // 8
+    offsets = [0]
+    for indices in lines_of_cell:
+        offsets.append(offsets[-1] + len(indices))
+    membership = [line_index for indices in lines_of_cell for line_index in indices]
+
+    parts = [
+        _HEADER.pack(_MAGIC, _VERSION, size, win_length, mask_bytes, len(lines), len(membership)),
+        struct.pack(f"<{len(lines) * win_length}H", *(cell for cells in lines for cell in cells)),
+        struct.pack(f"<{len(offsets)}I", *offsets),
+        struct.pack(f"<{len(membership)}H", *membership),
+    ]
+    for cells in lines:
+        mask = 0
+        for cell in cells:
+            mask |= 1 << cell
+        parts.append(mask.to_bytes(mask_bytes, "little"))
+    return b"".join(parts)
+
+
+def write_tables(size, win_length, directory=DEFAULT_TABLE_DIR):
+    """
+    Generate the table file for a board.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+        directory: Table directory (created if missing)
+
+    Returns:
+        str: Path of the written file
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = table_path(size, win_length, directory)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as table_file:
+        table_file.write(build_tables(size, win_length))
+    os.replace(temporary_path, path)
+    return path
+
+
+class WinLineTables:
+    """
+    Read-only view of the win-line tables of one board size and win length.
+    """
+
+    def __init__(self, buffer):
+        """
+        Args:
+            buffer: Table bytes, either in memory or a read-only mmap
+        """
+        magic, version, size, win_length, mask_bytes, line_count, membership_count = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a win-line table file (or an unsupported version)")
+        self.buffer = buffer
+        self.size = size
+        self.win_length = win_length
+        self.line_count = line_count
+        self._mask_bytes = mask_bytes
+        self._cells_offset = _HEADER.size
+        self._offsets_offset = self._cells_offset + 2 * line_count * win_length
+        self._membership_offset = self._offsets_offset + 4 * (size * size + 1)
+        self._masks_offset = self._membership_offset + 2 * membership_count
+        self._masks_through = [None] * (size * size)
+        self._masks = None
+        self._lines = None
+
+    def line_cells(self, line):
+        """
+        Get the cells of one line.
+
+        Args:
+            line: Line index
+
+        Returns:
+            tuple: Cell indices (row * size + col)
+        """
+        return struct.unpack_from(
+            f"<{self.win_length}H", self.buffer,
+            self._cells_offset + 2 * line * self.win_length,
+        )
+
+    def line_mask(self, line):
+        """
+        Get the bit mask of one line.
+
+        Args:
+            line: Line index
+
+        Returns:
+            int: Mask with bit row * size + col set for each cell of the line
+        """
+        start = self._masks_offset + line * self._mask_bytes
+        return int.from_bytes(self.buffer[start:start + self._mask_bytes], "little")
+
+    def lines_through(self, cell):
+        """
+        Get the lines that pass through a cell.
+
+        Args:
+            cell: Cell index (row * size + col)
+
+        Returns:
+            tuple: Line indices
+        """
+        start, end = struct.unpack_from("<2I", self.buffer, self._offsets_offset + 4 * cell)
+        return struct.unpack_from(f"<{end - start}H", self.buffer, self._membership_offset + 2 * start)
+
+    def masks_through(self, cell):
+        """
+        Get the bit masks of the lines through a cell, decoded on first use.
+
+        Args:
+            cell: Cell index (row * size + col)
+
+        Returns:
+            tuple: Line masks
+        """
+        masks = self._masks_through[cell]
+        if masks is None:
+            masks = self._masks_through[cell] = tuple(
+                self.line_mask(line) for line in self.lines_through(cell)
+            )
+        return masks
+
+    def masks(self):
+        """
+        Get the bit mask of every line, decoded on first use.
+
+        Returns:
+            tuple: Line masks in line order
+        """
+        if self._masks is None:
+            self._masks = tuple(self.line_mask(line) for line in range(self.line_count))
+        return self._masks
+
+    def lines(self):
+        """
+        Get every line as (row, col) cells, decoded on first use.
+
+        Returns:
+            tuple: Tuples of (row, col) cells
+        """
+        if self._lines is None:
+            size = self.size
+            self._lines = tuple(
+                tuple(divmod(cell, size) for cell in self.line_cells(line))
+                for line in range(self.line_count)
+            )
+        return self._lines
+
+
+def load_tables(size, win_length, directory=DEFAULT_TABLE_DIR):
+    """
+    Get the tables for a board, memory-mapping the generated file if there
+    is one and building them in memory otherwise. Loaded tables are cached
+    for the life of the process, separately for each directory.
+
+    Args:
+        size: Board size
+        win_length: Marks in a row needed to win
+        directory: Table directory
+
+    Returns:
+        WinLineTables: The tables
+    """
+    key = (size, win_length, directory)
+    tables = _loaded.get(key)
+    if tables is None:
+        path = table_path(size, win_length, directory)
+        if os.path.exists(path):
+            with open(path, "rb") as table_file:
+                buffer = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = build_tables(size, win_length)
+        tables = _loaded[key] = WinLineTables(buffer)
+    return tables
+
+
+def main():
+    """Command-line entry point for generating table files."""
+    parser = argparse.ArgumentParser(description="Precompute win-line tables for N x N boards.")
+    parser.add_argument("--size", type=int, nargs="+", default=[3], help="board sizes")
+    parser.add_argument("--win-length", type=int, default=None, help="marks in a row (default: size)")
+    parser.add_argument("--directory", default=DEFAULT_TABLE_DIR)
+    args = parser.parse_args()
+
+    for size in args.size:
+        path = write_tables(size, args.win_length or size, args.directory)
+        print(f"{path}: {os.path.getsize(path)} bytes")
+
+
+if __name__ == "__main__":
+    main()